@@ -0,0 +1,2 @@
+@echo off
+python main_benchmark.py run
@@ -0,0 +1,469 @@
+# benchmark.py
+
+import gc
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+import scipy
+import sklearn
+import pandas as pd
+from data_loader import DataLoader, StreamedRatings
+from benchmarks.synthetic import synthetic_movielens
+from recommenders.content_based_recommender import ContentBasedRecommender
+from recommenders.collaborative_filtering import CollaborativeFilteringRecommender
+from recommenders.sequential_recommender import SequentialRecommender
+from recommenders.k_mean_collaborative_filtering import (
+    KMeansCollaborativeFilteringRecommender,
+)
+from recommenders.matrix_factorization import MatrixFactorizationRecommender
+from recommenders.hybrid_recommender import HybridRecommender
+from recommenders.recommender_base import top_n_positions
+
+# Recomendadores medidos: nombre -> función que construye el recomendador a partir de las
+# películas y las calificaciones
+RECOMMENDERS = {
+    "content_based": ContentBasedRecommender,
+    "collaborative_filtering": CollaborativeFilteringRecommender,
+    "sequential": SequentialRecommender,
+    "kmeans_collaborative_filtering": KMeansCollaborativeFilteringRecommender,
+    "matrix_factorization": MatrixFactorizationRecommender,
+    "hybrid": lambda movies, ratings: HybridRecommender(
+        [
+            ContentBasedRecommender,
+            CollaborativeFilteringRecommender,
+            SequentialRecommender,
+        ],
+        movies,
+        ratings,
+    ),
+}
+
+# Métricas comparadas entre ejecuciones: (sección, métrica) -> True si un valor mayor es mejor
+METRICS = {
+    ("build", "seconds"): False,
+    ("build", "peak_memory_mb"): False,
+    ("latency_ms", "p50"): False,
+    ("latency_ms", "p95"): False,
+    ("latency_ms", "p99"): False,
+    ("throughput", "users_per_second"): True,
+    ("recall", "exact_top_n"): True,
+}
+
+
+def load_datasets(data_dir="data", scales=(10, 100), seed=42, streamed=False):
+    """
+    Carga los datos incluidos en data_dir y genera las versiones sintéticas a mayor escala.
+
+    Los conjuntos se generan uno a uno, a medida que se recorren, para no tener en memoria
+    todas las escalas a la vez.
+
+    Parámetros:
+    data_dir (str): Directorio con ratings.csv, movies.csv y tags.csv.
+    scales (iterable): Factores de escala de los conjuntos sintéticos.
+    seed (int): Semilla de los conjuntos sintéticos; con la misma semilla dos ejecuciones
+        miden los mismos datos.
+    streamed (bool): Si es True, las calificaciones se entregan como StreamedRatings en lugar
+        de como DataFrame.
+
+    Devuelve:
+    iterator: Tuplas (nombre, ratings, movies).
+    """
+    data_loader = DataLoader(
+        os.path.join(data_dir, "ratings.csv"),
+        os.path.join(data_dir, "movies.csv"),
+        os.path.join(data_dir, "tags.csv"),
+        aggregate_tags=True,
+    )
+    ratings, movies = data_loader.load_data()
+    datasets = [("bundled", 1)] + [(f"synthetic_{scale:g}x", scale) for scale in scales]
+    for name, scale in datasets:
+        if name == "bundled":
+            dataset_ratings, dataset_movies = ratings, movies
+        else:
+            dataset_ratings, dataset_movies = synthetic_movielens(
+                ratings, movies, scale, seed
+            )
+        if streamed:
+            dataset_ratings = StreamedRatings.from_chunks([dataset_ratings])
+        yield name, dataset_ratings, dataset_movies
+        del dataset_ratings, dataset_movies
+        gc.collect()
+
+
+def measure_build(build, memory=True):
+    """
+    Mide el tiempo y la memoria que cuesta construir un recomendador.
+
+    El tiempo se mide sin tracemalloc, que ralentiza las asignaciones; la memoria se mide en
+    una segunda construcción, que se descarta.
+
+    Parámetros:
+    build (callable): Función sin argumentos que construye el recomendador.
+    memory (bool): Si es False, no se mide la memoria y solo se construye una vez.
+
+    Devuelve:
+    tuple: (recommender, stats) con el recomendador construido y un dict con los segundos de
+        la construcción y, si se midió, el pico de memoria y la memoria que sigue ocupada al
+        terminar (en MB, según tracemalloc).
+    """
+    stats = {}
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            recommender = build()
+            retained, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        stats["peak_memory_mb"] = peak / 2**20
+        stats["retained_memory_mb"] = retained / 2**20
+        del recommender
+
+    gc.collect()
+    start = time.perf_counter()
+    recommender = build()
+    stats["seconds"] = time.perf_counter() - start
+    return recommender, stats
+
+
+def measure_latency(recommender, user_ids, top_n=10, warmup=5, repeat=3):
+    """
+    Mide la latencia de recommend usuario a usuario.
+
+    Las consultas se repiten en repeat rondas y de cada estadístico se conserva el de la mejor
+    ronda, como en timeit: las interferencias de otros procesos solo pueden hacer más lenta
+    una ronda, así que el mínimo es la medida más estable entre ejecuciones.
+
+    Parámetros:
+    recommender (Recommender): Recomendador construido.
+    user_ids (numpy.ndarray): IDs de los usuarios consultados, uno por llamada.
+    top_n (int): Número de películas recomendadas por llamada.
+    warmup (int): Número de llamadas iniciales que no se cuentan.
+    repeat (int): Número de rondas de consultas.
+
+    Devuelve:
+    dict: Percentiles p50, p95 y p99, media y máximo de la latencia en milisegundos, y número
+        de llamadas medidas por ronda.
+    """
+    for user_id in user_ids[:warmup]:
+        recommender.recommend(user_id, top_n)
+
+    latencies = np.empty((repeat, len(user_ids)))
+    for round_ in range(repeat):
+        for i, user_id in enumerate(user_ids):
+            start = time.perf_counter()
+            recommender.recommend(user_id, top_n)
+            latencies[round_, i] = time.perf_counter() - start
+    latencies *= 1000
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99], axis=1).min(axis=1)
+    return {
+        "p50": p50,
+        "p95": p95,
+        "p99": p99,
+        "mean": latencies.mean(axis=1).min(),
+        "max": latencies.max(axis=1).min(),
+        "queries": len(user_ids),
+    }
+
+
+def measure_throughput(recommender, user_ids, top_n=10, batch_size=256, repeat=3):
+    """
+    Mide cuántos usuarios por segundo recomienda recommend_many.
+
+    Parámetros:
+    recommender (Recommender): Recomendador construido.
+    user_ids (numpy.ndarray): IDs de los usuarios recomendados en una sola llamada.
+    top_n (int): Número de películas recomendadas por usuario.
+    batch_size (int): Número de usuarios puntuados en cada bloque.
+    repeat (int): Número de llamadas; se conserva la más rápida, como en measure_latency.
+
+    Devuelve:
+    dict: Usuarios por segundo, segundos de la llamada y número de usuarios.
+    """
+    seconds = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        recommender.recommend_many(user_ids, top_n, batch_size=batch_size)
+        seconds = min(seconds, time.perf_counter() - start)
+    return {
+        "users_per_second": len(user_ids) / seconds,
+        "seconds": seconds,
+        "users": len(user_ids),
+    }
+
+
+def measure_recall(recommender, user_ids, top_n=10, batch_size=256):
+    """
+    Mide qué fracción del top_n exacto según score_many recupera recommend_many.
+
+    score_many puntúa todo el catálogo sin índices aproximados, así que la fracción solo baja
+    de 1 cuando recommend_many busca en un índice (IVF) o no sigue las mismas puntuaciones.
+    Una recomendación empatada con la última película del top_n exacto cuenta como acierto,
+    para no depender de cómo resuelve cada camino los empates.
+
+    Parámetros:
+    recommender (Recommender): Recomendador construido.
+    user_ids (numpy.ndarray): IDs de los usuarios comparados.
+    top_n (int): Número de películas recomendadas por usuario.
+    batch_size (int): Número de usuarios puntuados en cada bloque.
+
+    Devuelve:
+    float: Aciertos divididos por el número de películas del top_n exacto; 1 si ningún
+        usuario tiene películas puntuadas.
+    """
+    recommendations = np.asarray(
+        recommender.recommend_many(user_ids, top_n, batch_size=batch_size)
+    )
+    hits = total = 0
+    for start in range(0, len(user_ids), batch_size):
+        block = slice(start, start + batch_size)
+        scores = recommender.score_many(user_ids[block], batch_size)
+        scores[np.isnan(scores)] = -np.inf
+
+        # Puntuación de la última película del top_n exacto de cada usuario
+        exact = top_n_positions(scores, top_n)
+        n_exact = (exact >= 0).sum(axis=1)
+        last = np.take_along_axis(exact, np.maximum(n_exact - 1, 0)[:, None], axis=1)
+        threshold = np.take_along_axis(scores, np.maximum(last, 0), axis=1)
+
+        # Las recomendaciones que no están en el catálogo o no tienen puntuación no cuentan
+        positions = recommender.catalog_index.get_indexer(
+            recommendations[block].ravel()
+        ).reshape(recommendations[block].shape)
+        recommended_scores = np.where(
+            positions >= 0,
+            np.take_along_axis(scores, np.maximum(positions, 0), axis=1),
+            -np.inf,
+        )
+        found = (
+            (recommended_scores >= threshold) & np.isfinite(recommended_scores)
+        ).sum(axis=1)
+        hits += np.minimum(found, n_exact).sum()
+        total += n_exact.sum()
+    return float(hits / total) if total else 1.0
+
+
+def benchmark_recommender(
+    build,
+    ratings,
+    n_queries=200,
+    n_batch=1000,
+    top_n=10,
+    batch_size=256,
+    memory=True,
+    repeat=3,
+    seed=42,
+):
+    """
+    Mide la construcción, la latencia y el rendimiento por lotes de un recomendador.
+
+    Parámetros:
+    build (callable): Función sin argumentos que construye el recomendador.
+    ratings (DataFrame o StreamedRatings): Calificaciones con las que se construye; los
+        usuarios consultados se eligen entre los suyos.
+    n_queries (int): Número de llamadas a recommend medidas.
+    n_batch (int): Número de usuarios de la llamada a recommend_many medida.
+    top_n (int): Número de películas recomendadas por usuario.
+    batch_size (int): Número de usuarios puntuados en cada bloque por recommend_many.
+    memory (bool): Si es True, también se mide la memoria de la construcción.
+    repeat (int): Número de rondas de las mediciones de latencia y rendimiento.
+    seed (int): Semilla con la que se eligen los usuarios consultados.
+
+    Devuelve:
+    dict: Secciones "build", "latency_ms", "throughput" y "recall".
+    """
+    if isinstance(ratings, StreamedRatings):
+        user_ids = ratings.user_index.to_numpy()
+    else:
+        user_ids = ratings["userId"].unique()
+    rng = np.random.default_rng(seed)
+
+    recommender, build_stats = measure_build(build, memory)
+    queries = rng.choice(user_ids, size=n_queries)
+    batch = rng.choice(user_ids, size=min(n_batch, len(user_ids)), replace=False)
+    result = {
+        "build": build_stats,
+        "latency_ms": measure_latency(recommender, queries, top_n, repeat=repeat),
+        "throughput": measure_throughput(
+            recommender, batch, top_n, batch_size, repeat=repeat
+        ),
+        # Las recomendaciones se comparan con el top_n exacto de las puntuaciones, de modo
+        # que se comprueban también los caminos con índices aproximados
+        "recall": {
+            "exact_top_n": measure_recall(recommender, batch, top_n, batch_size)
+        },
+    }
+    return result
+
+
+def run_benchmarks(
+    recommenders=None,
+    data_dir="data",
+    scales=(10, 100),
+    seed=42,
+    streamed=False,
+    log=print,
+    **options,
+):
+    """
+    Mide los recomendadores con los datos incluidos y con los conjuntos sintéticos.
+
+    Parámetros:
+    recommenders (list, opcional): Nombres de RECOMMENDERS medidos; por defecto, todos.
+    data_dir (str): Directorio con los CSV incluidos.
+    scales (iterable): Factores de escala de los conjuntos sintéticos.
+    seed (int): Semilla de los conjuntos sintéticos y de los usuarios consultados.
+    streamed (bool): Si es True, los recomendadores se construyen con StreamedRatings.
+    log (callable, opcional): Función que recibe una línea de progreso; None para no mostrar
+        el progreso.
+    **options: Argumentos de benchmark_recommender (n_queries, n_batch, top_n, batch_size,
+        memory, repeat).
+
+    Devuelve:
+    dict: "environment" con la versión de Python, las bibliotecas y la máquina, y "results"
+        con una entrada por conjunto de datos y recomendador; si la medición falla, la entrada
+        tiene la clave "error" en lugar de las mediciones.
+    """
+    recommenders = recommenders or list(RECOMMENDERS)
+    results = []
+    for dataset, ratings, movies in load_datasets(data_dir, scales, seed, streamed):
+        shape = {
+            "ratings": len(ratings),
+            "users": (
+                len(ratings.user_index)
+                if isinstance(ratings, StreamedRatings)
+                else ratings["userId"].nunique()
+            ),
+            "movies": len(movies),
+        }
+        for name in recommenders:
+            if log:
+                log(f"{dataset} ({shape['ratings']} calificaciones): {name}")
+            result = {"dataset": dataset, "recommender": name, "shape": shape}
+            try:
+                result.update(
+                    benchmark_recommender(
+                        lambda: RECOMMENDERS[name](movies, ratings),
+                        ratings,
+                        seed=seed,
+                        **options,
+                    )
+                )
+            except Exception as error:
+                # Un recomendador que falla (por ejemplo, por falta de memoria a gran escala)
+                # queda registrado y no impide medir los demás
+                result["error"] = f"{type(error).__name__}: {error}"
+                gc.collect()
+            results.append(result)
+            if log and "error" in result:
+                log(f"  error: {result['error']}")
+            elif log:
+                log(
+                    f"  construcción {result['build']['seconds']:.2f} s, "
+                    f"p50 {result['latency_ms']['p50']:.2f} ms, "
+                    f"p99 {result['latency_ms']['p99']:.2f} ms, "
+                    f"{result['throughput']['users_per_second']:.0f} usuarios/s"
+                )
+    return {"environment": environment(seed, streamed), "results": results}
+
+
+def environment(seed=None, streamed=False):
+    """
+    Describe el entorno de la ejecución, para interpretar las comparaciones entre ejecuciones.
+
+    Parámetros:
+    seed (int, opcional): Semilla de los datos sintéticos.
+    streamed (bool): Si las calificaciones se entregaron como StreamedRatings.
+
+    Devuelve:
+    dict: Fecha, versiones de Python y de las bibliotecas, plataforma, número de CPU,
+        semilla y tipo de las calificaciones.
+    """
+    return {
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "scipy": scipy.__version__,
+        "scikit-learn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": seed,
+        "streamed": streamed,
+    }
+
+
+def compare_results(baseline, current, threshold=0.2):
+    """
+    Compara dos ejecuciones de run_benchmarks y marca las regresiones.
+
+    Solo se comparan los pares (conjunto de datos, recomendador) presentes en ambas
+    ejecuciones con datos de la misma forma (los conjuntos sintéticos solo coinciden si se
+    generaron con la misma semilla). Una métrica empeora si su cambio relativo en la dirección
+    mala supera el umbral; el umbral por defecto deja margen para el ruido de las mediciones
+    de tiempo. Un recomendador que falla y no fallaba en la referencia es una regresión.
+
+    Parámetros:
+    baseline (dict): Resultados de referencia.
+    current (dict): Resultados nuevos.
+    threshold (float): Cambio relativo máximo tolerado (0.2 = 20 %).
+
+    Devuelve:
+    DataFrame: Una fila por métrica comparada con las columnas dataset, recommender, metric,
+        baseline, current, change (cambio relativo, positivo si la métrica empeora) y
+        regression.
+    """
+    baseline_results = {
+        (result["dataset"], result["recommender"]): result
+        for result in baseline["results"]
+    }
+    rows = []
+    for result in current["results"]:
+        reference = baseline_results.get((result["dataset"], result["recommender"]))
+        if reference is None or reference["shape"] != result["shape"]:
+            continue
+        if "error" in result and "error" not in reference:
+            rows.append(
+                {
+                    "dataset": result["dataset"],
+                    "recommender": result["recommender"],
+                    "metric": "error",
+                    "baseline": None,
+                    "current": result["error"],
+                    "change": np.inf,
+                    "regression": True,
+                }
+            )
+            continue
+        for (section, metric), higher_is_better in METRICS.items():
+            old = reference.get(section, {}).get(metric)
+            new = result.get(section, {}).get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else 0.0
+            if higher_is_better:
+                change = -change
+            rows.append(
+                {
+                    "dataset": result["dataset"],
+                    "recommender": result["recommender"],
+                    "metric": f"{section}.{metric}",
+                    "baseline": old,
+                    "current": new,
+                    "change": change,
+                    "regression": change > threshold,
+                }
+            )
+    columns = [
+        "dataset",
+        "recommender",
+        "metric",
+        "baseline",
+        "current",
+        "change",
+        "regression",
+    ]
+    return pd.DataFrame(rows, columns=columns)
@@ -0,0 +1,74 @@
+# synthetic.py
+
+import numpy as np
+import pandas as pd
+
+
+def synthetic_movielens(ratings, movies, scale, seed=None):
+    """
+    Genera calificaciones y películas con la forma de MovieLens a scale veces su tamaño.
+
+    Los datos se obtienen remuestreando las distribuciones de los datos de referencia, de modo
+    que conservan su forma: el número de calificaciones por usuario, la popularidad de las
+    películas (cada película sintética copia los metadatos y la popularidad de una película de
+    referencia), la distribución de las calificaciones y el rango de timestamps de cada
+    usuario. El número de usuarios crece con scale y el de películas con su raíz cuadrada,
+    como entre las versiones pequeñas y grandes de MovieLens, así que el número de
+    calificaciones crece aproximadamente con scale.
+
+    Parámetros:
+    ratings (DataFrame): Calificaciones de referencia con las columnas userId, movieId,
+        rating y timestamp.
+    movies (DataFrame): Películas de referencia, una fila por movieId.
+    scale (float): Factor de escala respecto a los datos de referencia.
+    seed (int, opcional): Semilla del generador aleatorio; con la misma semilla los datos
+        generados son siempre los mismos.
+
+    Devuelve:
+    tuple: Un par (ratings, movies) de DataFrames con las mismas columnas que los de
+        referencia.
+    """
+    rng = np.random.default_rng(seed)
+    user_counts = ratings["userId"].value_counts().to_numpy()
+    user_times = ratings.groupby("userId")["timestamp"].agg(["min", "max"])
+    movie_counts = (
+        ratings["movieId"].value_counts().reindex(movies["movieId"], fill_value=0)
+    ).to_numpy()
+
+    n_users = max(int(round(len(user_counts) * scale)), 1)
+    n_movies = max(int(round(len(movies) * np.sqrt(scale))), 1)
+
+    # Cada película sintética copia una película de referencia: sus metadatos y su popularidad
+    templates = rng.integers(len(movies), size=n_movies)
+    synthetic_movies = movies.iloc[templates].reset_index(drop=True)
+    movie_ids = np.arange(1, n_movies + 1)
+    synthetic_movies["movieId"] = movie_ids
+    synthetic_movies["title"] = [f"Movie {movie_id}" for movie_id in movie_ids]
+    popularity = movie_counts[templates] + 1.0
+    popularity /= popularity.sum()
+
+    # Número de calificaciones de cada usuario y película de cada calificación; los pares
+    # repetidos se descartan, como en MovieLens, donde cada usuario califica una película una vez
+    counts = np.minimum(rng.choice(user_counts, size=n_users), n_movies)
+    user_codes = np.repeat(np.arange(n_users), counts)
+    movie_codes = rng.choice(n_movies, size=len(user_codes), p=popularity)
+    keys = np.unique(user_codes.astype(np.int64) * n_movies + movie_codes)
+    user_codes, movie_codes = np.divmod(keys, n_movies)
+
+    # Cada usuario toma el rango de timestamps de un usuario de referencia
+    periods = rng.integers(len(user_times), size=n_users)
+    starts = user_times["min"].to_numpy(dtype=np.int64)[periods]
+    spans = user_times["max"].to_numpy(dtype=np.int64)[periods] - starts + 1
+    timestamps = starts[user_codes] + (
+        rng.random(len(user_codes)) * spans[user_codes]
+    ).astype(np.int64)
+
+    synthetic_ratings = pd.DataFrame(
+        {
+            "userId": user_codes + 1,
+            "movieId": movie_ids[movie_codes],
+            "rating": rng.choice(ratings["rating"].to_numpy(), size=len(user_codes)),
+            "timestamp": timestamps,
+        }
+    )
+    return synthetic_ratings, synthetic_movies
@@ -1,8 +1,25 @@
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
 import pandas as pd
+from scipy import sparse
+
+# Valor con el que se guardan en caché los timestamps ausentes; al ser el máximo, ordena al final
+MISSING_TIMESTAMP = np.iinfo(np.int32).max
 
 
 class DataLoader:
-    def __init__(self, ratings_file, movies_file, tags_file):
+    def __init__(
+        self,
+        ratings_file,
+        movies_file,
+        tags_file,
+        aggregate_tags=False,
+        cache_dir=None,
+        chunksize=None,
+    ):
         """
         Inicializa el cargador de datos con las rutas de los archivos de calificaciones, películas y tags.
 
@@ -10,27 +27,76 @@ class DataLoader:
         ratings_file (str): Ruta del archivo CSV que contiene las calificaciones.
         movies_file (str): Ruta del archivo CSV que contiene los datos de las películas.
         tags_file (str): Ruta del archivo CSV que contiene los tags de las películas.
+        aggregate_tags (bool): Si es True, agrupa los tags de cada película en una única fila
+            en lugar de generar una fila por cada par película-tag.
+        cache_dir (str, opcional): Directorio de la caché binaria. Si se indica, los CSV se
+            convierten una vez a columnas .npy con tipos compactos (IDs int32, calificaciones
+            float32) y a un pickle de películas con columnas categóricas; las cargas siguientes
+            proyectan las columnas en memoria. La caché se invalida si cambia algún CSV.
+        chunksize (int, opcional): Si se indica, las calificaciones se leen por bloques de
+            chunksize filas y load_data devuelve un StreamedRatings en lugar de un DataFrame,
+            sin construir nunca el DataFrame completo. Con cache_dir, cada bloque se escribe
+            en disco en cuanto se lee y las estructuras se construyen por bloques en la caché,
+            así que las calificaciones no necesitan caber en memoria; sin cache_dir, las
+            columnas compactas de todos los bloques se unen en memoria.
         """
         self.ratings_file = ratings_file
         self.movies_file = movies_file
         self.tags_file = tags_file
+        self.aggregate_tags = aggregate_tags
+        self.cache_dir = cache_dir
+        self.chunksize = chunksize
+
+        # Índice movieId -> posición de la fila en el DataFrame de películas (modo agregado)
+        self.movie_index = None
 
     def load_data(self):
         """
         Carga los datos de calificaciones, películas y tags desde los archivos CSV.
 
         Devuelve:
-        tuple: Un par que contiene el DataFrame de calificaciones y el DataFrame de películas con metadatos combinados.
+        tuple: Un par que contiene las calificaciones (DataFrame, o StreamedRatings si se indicó
+            chunksize) y el DataFrame de películas con metadatos combinados.
         """
+        if self.cache_dir is not None:
+            return self._load_cached()
+
         # Cargar los datos de calificaciones desde el archivo CSV
-        ratings = pd.read_csv(self.ratings_file)
+        if self.chunksize is not None:
+            ratings = StreamedRatings.from_chunks(self._read_rating_chunks())
+        else:
+            ratings = pd.read_csv(self.ratings_file)
+        return ratings, self._load_movies()
+
+    def _read_rating_chunks(self):
+        """
+        Lee el CSV de calificaciones por bloques de chunksize filas.
+
+        Devuelve:
+        iterator: DataFrames con las columnas userId, movieId, rating y timestamp.
+        """
+        return pd.read_csv(
+            self.ratings_file,
+            usecols=["userId", "movieId", "rating", "timestamp"],
+            chunksize=self.chunksize,
+        )
+
+    def _load_movies(self):
+        """
+        Carga las películas y los tags desde los archivos CSV y combina sus metadatos.
 
+        Devuelve:
+        DataFrame: Películas con las columnas 'tag' y 'metadata'.
+        """
         # Cargar los datos de películas desde el archivo CSV
         movies = pd.read_csv(self.movies_file)
 
         # Cargar los datos de tags desde el archivo CSV
         tags = pd.read_csv(self.tags_file)
 
+        if self.aggregate_tags:
+            return self._aggregate_tags(movies, tags)
+
         # Combinar datos de películas y tags utilizando el ID de la película
         movies = pd.merge(movies, tags, on="movieId", how="left")
 
@@ -40,4 +106,755 @@ class DataLoader:
         # Crear una columna 'metadata' que combine los géneros y los tags de cada película
         movies["metadata"] = movies["genres"] + " " + movies["tag"]
 
-        return ratings, movies
+        return movies
+
+    def _aggregate_tags(self, movies, tags):
+        """
+        Combina los tags de cada película en una sola fila de metadatos.
+
+        Parámetros:
+        movies (DataFrame): Datos de las películas.
+        tags (DataFrame): Tags asignados por los usuarios a las películas.
+
+        Devuelve:
+        DataFrame: Una fila por movieId con las columnas de la película, 'tag' y 'metadata'.
+        """
+        # Eliminar películas duplicadas y ordenar por ID para que las posiciones sean estables
+        movies = (
+            movies.drop_duplicates(subset="movieId")
+            .sort_values("movieId")
+            .reset_index(drop=True)
+        )
+
+        # Unir todos los tags de cada película separados por espacios
+        movie_tags = tags.dropna(subset=["tag"]).groupby("movieId")["tag"].agg(" ".join)
+
+        # Asignar a cada película sus tags (cadena vacía si no tiene ninguno)
+        movies["tag"] = movies["movieId"].map(movie_tags).fillna("")
+
+        # Crear una columna 'metadata' que combine los géneros y los tags de cada película
+        movies["metadata"] = movies["genres"] + " " + movies["tag"]
+
+        self._set_movie_index(movies)
+        return movies
+
+    def _set_movie_index(self, movies):
+        """
+        Guarda el índice movieId -> posición de la fila del DataFrame de películas agregado.
+
+        Parámetros:
+        movies (DataFrame): Una fila por movieId.
+        """
+        self.movie_index = pd.Series(
+            np.arange(len(movies)), index=movies["movieId"].to_numpy(), name="row"
+        )
+
+    def _load_cached(self):
+        """
+        Carga los datos desde la caché binaria, regenerándola si algún CSV ha cambiado.
+
+        Devuelve:
+        tuple: Un par que contiene las calificaciones (DataFrame, o StreamedRatings si se
+            indicó chunksize) y el DataFrame de películas.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        movies_cache = os.path.join(
+            self.cache_dir,
+            "movies_aggregated.pkl" if self.aggregate_tags else "movies.pkl",
+        )
+
+        if not self._cache_is_valid():
+            # Los archivos derivados de ambos modos se regeneran la próxima vez que se pidan
+            for name in (
+                "movies_aggregated.pkl",
+                "movies.pkl",
+                "ratings.userId.npy",
+                "ratings.movieId.npy",
+                "ratings.rating.npy",
+                "ratings.timestamp.npy",
+            ):
+                if os.path.exists(os.path.join(self.cache_dir, name)):
+                    os.remove(os.path.join(self.cache_dir, name))
+            shutil.rmtree(os.path.join(self.cache_dir, "streamed"), ignore_errors=True)
+            self._write_manifest(self._fingerprints())
+
+        if self.chunksize is not None:
+            # Las calificaciones se escriben en disco bloque a bloque y se construyen por
+            # bloques en el directorio de la caché (véase StreamedRatings.from_chunks)
+            streamed = os.path.join(self.cache_dir, "streamed")
+            if not os.path.exists(streamed):
+                shutil.rmtree(streamed + ".tmp", ignore_errors=True)
+                StreamedRatings.from_chunks(
+                    self._read_rating_chunks(), streamed + ".tmp"
+                )
+                os.replace(streamed + ".tmp", streamed)
+        elif not os.path.exists(os.path.join(self.cache_dir, "ratings.timestamp.npy")):
+            self._write_ratings_cache(pd.read_csv(self.ratings_file))
+
+        if not os.path.exists(movies_cache):
+            movies = self._compact_movies(self._load_movies())
+            temporary = movies_cache + ".tmp"
+            movies.to_pickle(temporary)
+            os.replace(temporary, movies_cache)
+
+        movies = pd.read_pickle(movies_cache)
+        if self.aggregate_tags:
+            self._set_movie_index(movies)
+        if self.chunksize is not None:
+            return (
+                StreamedRatings.open(os.path.join(self.cache_dir, "streamed")),
+                movies,
+            )
+        columns = self._read_ratings_cache()
+        timestamps = columns["timestamp"]
+        missing = timestamps == np.iinfo(timestamps.dtype).max
+        if missing.any():
+            columns["timestamp"] = pd.arrays.IntegerArray(timestamps, missing)
+        return pd.DataFrame(columns, copy=False), movies
+
+    def _sources(self):
+        """
+        Devuelve los archivos CSV de los que depende la caché.
+
+        Devuelve:
+        dict: Nombre lógico -> ruta del archivo.
+        """
+        return {
+            "ratings": self.ratings_file,
+            "movies": self.movies_file,
+            "tags": self.tags_file,
+        }
+
+    @staticmethod
+    def _file_sha1(path):
+        """
+        Calcula el hash SHA-1 de un archivo leyéndolo por bloques.
+
+        Parámetros:
+        path (str): Ruta del archivo.
+
+        Devuelve:
+        str: Hash en hexadecimal.
+        """
+        digest = hashlib.sha1()
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _fingerprints(self):
+        """
+        Calcula la fecha de modificación, el tamaño y el hash de cada CSV.
+
+        Devuelve:
+        dict: Nombre lógico -> {'path', 'mtime', 'size', 'sha1'}.
+        """
+        fingerprints = {}
+        for name, path in self._sources().items():
+            stat = os.stat(path)
+            fingerprints[name] = {
+                "path": os.path.abspath(path),
+                "mtime": stat.st_mtime,
+                "size": stat.st_size,
+                "sha1": self._file_sha1(path),
+            }
+        return fingerprints
+
+    def _write_manifest(self, fingerprints):
+        """
+        Guarda el manifiesto de la caché con las huellas de los CSV.
+
+        Parámetros:
+        fingerprints (dict): Huellas devueltas por _fingerprints.
+        """
+        manifest_path = os.path.join(self.cache_dir, "manifest.json")
+        with open(manifest_path + ".tmp", "w") as file:
+            json.dump({"sources": fingerprints}, file, indent=2)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+    def _cache_is_valid(self):
+        """
+        Comprueba si la caché corresponde a los CSV actuales.
+
+        Si la fecha de modificación y el tamaño coinciden, no se lee el archivo; si solo cambia
+        la fecha, se compara el hash y, si coincide, se actualiza el manifiesto. Los archivos
+        de la caché que falten se generan al cargar los datos.
+
+        Devuelve:
+        bool: True si la caché se puede usar.
+        """
+        manifest_path = os.path.join(self.cache_dir, "manifest.json")
+        if not os.path.exists(manifest_path):
+            return False
+        with open(manifest_path) as file:
+            cached = json.load(file)["sources"]
+
+        touched = False
+        for name, path in self._sources().items():
+            entry = cached.get(name)
+            stat = os.stat(path)
+            if entry is None or entry["path"] != os.path.abspath(path):
+                return False
+            if entry["size"] != stat.st_size:
+                return False
+            if entry["mtime"] != stat.st_mtime:
+                if entry["sha1"] != self._file_sha1(path):
+                    return False
+                entry["mtime"] = stat.st_mtime
+                touched = True
+        if touched:
+            self._write_manifest(cached)
+        return True
+
+    def _write_ratings_cache(self, ratings):
+        """
+        Guarda cada columna de calificaciones como un archivo .npy con tipos compactos.
+
+        Los timestamps ausentes (por ejemplo, 'NA' en las calificaciones añadidas a mano) se
+        guardan como MISSING_TIMESTAMP.
+
+        Parámetros:
+        ratings (DataFrame o dict): Columnas userId, movieId, rating y timestamp.
+        """
+        timestamps = np.asarray(ratings["timestamp"], dtype=float)
+        missing = np.isnan(timestamps)
+        timestamps = np.where(missing, 0, timestamps).astype(np.int64)
+        timestamps = compact_integers(timestamps)
+        timestamps[missing] = np.iinfo(timestamps.dtype).max
+
+        columns = {
+            "userId": compact_integers(np.asarray(ratings["userId"])),
+            "movieId": compact_integers(np.asarray(ratings["movieId"])),
+            "rating": np.asarray(ratings["rating"], dtype=np.float32),
+            "timestamp": timestamps,
+        }
+        for name, values in columns.items():
+            path = os.path.join(self.cache_dir, f"ratings.{name}.npy")
+            with open(path + ".tmp", "wb") as file:
+                np.save(file, values)
+            os.replace(path + ".tmp", path)
+
+    def _read_ratings_cache(self):
+        """
+        Abre las columnas de calificaciones de la caché sin copiarlas en memoria.
+
+        Las columnas se proyectan con mmap_mode="c": se comparten entre procesos y una
+        escritura solo modifica la copia del proceso. Los timestamps ausentes valen
+        MISSING_TIMESTAMP; en el DataFrame devuelto por load_data la columna es de tipo entero
+        con nulos (Int32 / Int64) y los ausentes son <NA>.
+
+        Devuelve:
+        dict: Columnas userId, movieId, rating y timestamp.
+        """
+        return {
+            name: np.load(
+                os.path.join(self.cache_dir, f"ratings.{name}.npy"), mmap_mode="c"
+            )
+            for name in ("userId", "movieId", "rating", "timestamp")
+        }
+
+    @staticmethod
+    def _compact_movies(movies):
+        """
+        Convierte movieId a int32 y a categóricas las columnas de texto con muchos valores
+        repetidos.
+
+        La columna 'metadata', que se vectoriza con TF-IDF, se mantiene como texto.
+
+        Parámetros:
+        movies (DataFrame): Películas con metadatos.
+
+        Devuelve:
+        DataFrame: Películas con columnas categóricas.
+        """
+        movies = movies.copy()
+        movies["movieId"] = compact_integers(movies["movieId"].to_numpy())
+        for column in movies.columns:
+            if column == "metadata" or movies[column].dtype.kind in "biuf":
+                continue
+            if movies[column].nunique() <= len(movies) // 2:
+                movies[column] = movies[column].astype("category")
+        return movies
+
+
+def compact_integers(values):
+    """
+    Convierte una columna entera a int32 si sus valores caben, o a int64 si no.
+
+    Parámetros:
+    values (numpy.ndarray): Valores enteros.
+
+    Devuelve:
+    numpy.ndarray: Valores con el tipo más compacto de los dos.
+    """
+    info = np.iinfo(np.int32)
+    if len(values) == 0 or (values.min() >= info.min and values.max() < info.max):
+        return values.astype(np.int32)
+    return values.astype(np.int64)
+
+
+def _index_dtype(size):
+    """
+    Devuelve el tipo entero con el que se guardan posiciones o códigos menores que size.
+
+    Parámetros:
+    size (int): Número de posiciones o códigos.
+
+    Devuelve:
+    numpy.dtype: int32 si caben, o int64 si no.
+    """
+    return np.dtype(np.int32 if size < np.iinfo(np.int32).max else np.int64)
+
+
+def _allocate(directory, name, length, dtype):
+    """
+    Reserva un arreglo en memoria o, si se indica un directorio, en un archivo .npy
+    proyectado en memoria.
+
+    Parámetros:
+    directory (str): Directorio del archivo, o None para reservarlo en memoria.
+    name (str): Nombre del archivo, sin la extensión .npy.
+    length (int): Número de elementos.
+    dtype (numpy.dtype): Tipo de los elementos.
+
+    Devuelve:
+    numpy.ndarray: Arreglo sin inicializar.
+    """
+    if directory is None:
+        return np.empty(length, dtype=dtype)
+    return np.lib.format.open_memmap(
+        os.path.join(directory, name + ".npy"), mode="w+", dtype=dtype, shape=(length,)
+    )
+
+
+def _chunk_columns(chunk):
+    """
+    Reduce un bloque de calificaciones a columnas de NumPy con tipos compactos.
+
+    Parámetros:
+    chunk (DataFrame): Calificaciones con las columnas userId, movieId, rating y timestamp.
+
+    Devuelve:
+    dict: Columnas userId y movieId (int32 o int64), rating (float32) y timestamp (float,
+        NaN si falta).
+    """
+    return {
+        "userId": compact_integers(chunk["userId"].to_numpy()),
+        "movieId": compact_integers(chunk["movieId"].to_numpy()),
+        "rating": chunk["rating"].to_numpy(dtype=np.float32),
+        "timestamp": chunk["timestamp"].to_numpy(dtype=float),
+    }
+
+
+class StreamedRatings:
+    def __init__(self, userId, movieId, rating, timestamp):
+        """
+        Calificaciones en columnas compactas con las estructuras que usan los recomendadores.
+
+        Se construye a partir de columnas de NumPy en lugar de un DataFrame: la matriz dispersa
+        usuario-película, el orden de las secuencias de cada usuario y los conteos de
+        popularidad se calculan una sola vez y los recomendadores los reutilizan a través de
+        las funciones de recommender_base.
+
+        Parámetros:
+        userId (numpy.ndarray): ID del usuario de cada calificación.
+        movieId (numpy.ndarray): ID de la película de cada calificación.
+        rating (numpy.ndarray): Calificación.
+        timestamp (numpy.ndarray): Timestamp de cada calificación (NaN si falta).
+        """
+        self.user_ids = userId
+        self.movie_ids = movieId
+        self.ratings = rating
+        self.timestamps = np.asarray(timestamp, dtype=float)
+        self._build(max(len(self), 1))
+
+    def _build(self, block_size, directory=None):
+        """
+        Calcula los índices, la matriz usuario-película, el orden de las secuencias y los
+        conteos de popularidad recorriendo las calificaciones por bloques.
+
+        Cada pasada lee como mucho block_size calificaciones a la vez, por lo que las columnas
+        pueden estar proyectadas en memoria desde disco. Si se indica directory, las
+        estructuras del tamaño de los datos se escriben en archivos .npy de ese directorio en
+        lugar de en memoria.
+
+        Parámetros:
+        block_size (int): Número de calificaciones de cada bloque.
+        directory (str, opcional): Directorio donde se escriben las estructuras.
+        """
+        n_ratings = len(self)
+        blocks = [
+            slice(start, min(start + block_size, n_ratings))
+            for start in range(0, n_ratings, block_size)
+        ]
+
+        # Índices ordenados de usuarios y películas, como los que devuelve np.unique
+        user_ids = np.unique(self.user_ids[:0])
+        movie_ids = np.unique(self.movie_ids[:0])
+        for block in blocks:
+            user_ids = np.union1d(user_ids, self.user_ids[block])
+            movie_ids = np.union1d(movie_ids, self.movie_ids[block])
+        self.user_index = pd.Index(user_ids)
+        self.movie_index = pd.Index(movie_ids)
+        n_users, n_movies = len(user_ids), len(movie_ids)
+
+        # Códigos de usuario y película de cada calificación y conteos por usuario y película
+        position_dtype = _index_dtype(max(n_ratings, n_movies))
+        self._user_codes = _allocate(
+            directory, "user_codes", n_ratings, _index_dtype(n_users)
+        )
+        self._movie_codes = _allocate(
+            directory, "movie_codes", n_ratings, position_dtype
+        )
+        user_counts = np.zeros(n_users, dtype=np.int64)
+        self.movie_counts = np.zeros(n_movies, dtype=np.int64)
+        self.movie_rating_sums = np.zeros(n_movies)
+        for block in blocks:
+            user_codes = np.searchsorted(user_ids, self.user_ids[block])
+            movie_codes = np.searchsorted(movie_ids, self.movie_ids[block])
+            self._user_codes[block] = user_codes
+            self._movie_codes[block] = movie_codes
+            user_counts += np.bincount(user_codes, minlength=n_users)
+            self.movie_counts += np.bincount(movie_codes, minlength=n_movies)
+            self.movie_rating_sums += np.bincount(
+                movie_codes, weights=self.ratings[block], minlength=n_movies
+            )
+        user_ends = np.cumsum(user_counts)
+        user_starts = user_ends - user_counts
+
+        # Posiciones de las calificaciones agrupadas por usuario, en el orden original dentro
+        # de cada usuario (ordenación por conteo estable)
+        by_user = _allocate(directory, "by_user", n_ratings, position_dtype)
+        cursor = user_starts.copy()
+        for block in blocks:
+            user_codes = self._user_codes[block]
+            order = np.argsort(user_codes, kind="stable")
+            user_codes = user_codes[order]
+            counts = np.bincount(user_codes, minlength=n_users)
+            ranks = np.arange(len(order)) - (np.cumsum(counts) - counts)[user_codes]
+            by_user[cursor[user_codes] + ranks] = block.start + order
+            cursor += counts
+        del cursor
+
+        # Cada grupo de usuarios consecutivos con unas block_size calificaciones se ordena por
+        # separado: por timestamp para las secuencias (los ausentes al final, como
+        # sort_values(by=["userId", "timestamp"])) y por película para la matriz, que guarda
+        # la última calificación de cada par, como drop_duplicates(keep="last")
+        self.sequence_order = _allocate(
+            directory, "sequence_order", n_ratings, position_dtype
+        )
+        self._pair_order = _allocate(directory, "pair_order", n_ratings, position_dtype)
+        data = _allocate(directory, "user_item.data", n_ratings, float)
+        indices = _allocate(directory, "user_item.indices", n_ratings, position_dtype)
+        indptr = np.zeros(n_users + 1, dtype=position_dtype)
+        nnz = row = 0
+        while row < n_users:
+            end = np.searchsorted(
+                user_ends, user_starts[row] + block_size, side="right"
+            )
+            end = min(max(end, row + 1), n_users)
+            segment = slice(user_starts[row], user_ends[end - 1])
+            positions = by_user[segment]
+            local_users = np.repeat(np.arange(end - row), user_counts[row:end])
+            movie_codes = self._movie_codes[positions]
+
+            order = np.lexsort((self.timestamps[positions], local_users))
+            self.sequence_order[segment] = positions[order]
+
+            keys = local_users.astype(np.int64) * n_movies + movie_codes
+            order = np.argsort(keys, kind="stable")
+            self._pair_order[segment] = positions[order]
+            keys = keys[order]
+            last = order[np.append(keys[1:] != keys[:-1], True)]
+            data[nnz : nnz + len(last)] = self.ratings[positions[last]]
+            indices[nnz : nnz + len(last)] = movie_codes[last]
+            indptr[row + 1 : end + 1] = nnz + np.cumsum(
+                np.bincount(local_users[last], minlength=end - row)
+            )
+            nnz += len(last)
+            row = end
+        del by_user
+
+        data, indices = data[:nnz], indices[:nnz]
+        if directory is None and nnz < n_ratings:
+            # Sin el espacio reservado para las calificaciones repetidas
+            data, indices = data.copy(), indices.copy()
+        self.user_item = sparse.csr_matrix(
+            (data, indices, indptr), shape=(n_users, n_movies), copy=False
+        )
+        self.user_item.has_sorted_indices = True
+
+        if directory is not None:
+            os.remove(os.path.join(directory, "by_user.npy"))
+            small = {
+                "user_index": user_ids,
+                "movie_index": movie_ids,
+                "movie_counts": self.movie_counts,
+                "movie_rating_sums": self.movie_rating_sums,
+                "user_item.indptr": indptr,
+            }
+            for name, values in small.items():
+                np.save(os.path.join(directory, name + ".npy"), values)
+
+    @classmethod
+    def open(cls, directory):
+        """
+        Abre unas calificaciones construidas con from_chunks en un directorio, sin copiarlas
+        en memoria.
+
+        Las columnas y las estructuras se proyectan con mmap_mode="c", como la caché de
+        DataLoader.
+
+        Parámetros:
+        directory (str): Directorio indicado a from_chunks.
+
+        Devuelve:
+        StreamedRatings: Las calificaciones guardadas.
+        """
+
+        def load(name):
+            return np.load(os.path.join(directory, name + ".npy"), mmap_mode="c")
+
+        ratings = cls.__new__(cls)
+        ratings.user_ids = load("userId")
+        ratings.movie_ids = load("movieId")
+        ratings.ratings = load("rating")
+        ratings.timestamps = load("timestamp")
+        ratings.user_index = pd.Index(np.asarray(load("user_index")))
+        ratings.movie_index = pd.Index(np.asarray(load("movie_index")))
+        ratings.movie_counts = np.asarray(load("movie_counts"))
+        ratings.movie_rating_sums = np.asarray(load("movie_rating_sums"))
+        ratings.sequence_order = load("sequence_order")
+        ratings._user_codes = load("user_codes")
+        ratings._movie_codes = load("movie_codes")
+        ratings._pair_order = load("pair_order")
+        indptr = np.asarray(load("user_item.indptr"))
+        ratings.user_item = sparse.csr_matrix(
+            (
+                load("user_item.data")[: indptr[-1]],
+                load("user_item.indices")[: indptr[-1]],
+                indptr,
+            ),
+            shape=(len(ratings.user_index), len(ratings.movie_index)),
+            copy=False,
+        )
+        ratings.user_item.has_sorted_indices = True
+        return ratings
+
+    def _encodings(self):
+        """
+        Devuelve los códigos de usuario y película de cada calificación y el orden estable de
+        las calificaciones por (usuario, película).
+
+        Las calcula _build; en las calificaciones obtenidas con subset se calculan la primera
+        vez que se piden y se conservan para las siguientes llamadas.
+
+        Devuelve:
+        tuple: (user_codes, movie_codes, pair_order) como numpy.ndarray.
+        """
+        if getattr(self, "_pair_order", None) is None:
+            self._user_codes = compact_integers(
+                self.user_index.get_indexer(self.user_ids)
+            )
+            self._movie_codes = compact_integers(
+                self.movie_index.get_indexer(self.movie_ids)
+            )
+            keys = (
+                self._user_codes.astype(np.int64) * len(self.movie_index)
+                + self._movie_codes
+            )
+            self._pair_order = compact_integers(np.argsort(keys, kind="stable"))
+        return self._user_codes, self._movie_codes, self._pair_order
+
+    def last_positions(self):
+        """
+        Devuelve las posiciones de la última calificación de cada par (usuario, película),
+        como drop_duplicates(subset=["userId", "movieId"], keep="last").
+
+        Devuelve:
+        numpy.ndarray: Posiciones en orden ascendente.
+        """
+        user_codes, movie_codes, pair_order = self._encodings()
+        keys = (
+            user_codes[pair_order].astype(np.int64) * len(self.movie_index)
+            + movie_codes[pair_order]
+        )
+        return np.sort(pair_order[np.append(keys[1:] != keys[:-1], True)])
+
+    def subset(self, positions):
+        """
+        Selecciona algunas calificaciones reutilizando la codificación de los IDs y los
+        órdenes ya calculados.
+
+        La matriz usuario-película, el orden de las secuencias y los conteos de popularidad se
+        obtienen filtrando los del conjunto completo, sin volver a ordenar, así que dividir los
+        datos en particiones (por ejemplo, para validación cruzada) cuesta tiempo lineal. El
+        resultado es el mismo que construir StreamedRatings con las filas seleccionadas.
+
+        Parámetros:
+        positions (numpy.ndarray): Posiciones de las calificaciones seleccionadas.
+
+        Devuelve:
+        StreamedRatings: Las calificaciones seleccionadas, en el orden original.
+        """
+        user_codes, movie_codes, pair_order = self._encodings()
+        selected = np.zeros(len(self), dtype=bool)
+        selected[positions] = True
+        positions = np.flatnonzero(selected)
+
+        subset = StreamedRatings.__new__(StreamedRatings)
+        subset.user_ids = self.user_ids[positions]
+        subset.movie_ids = self.movie_ids[positions]
+        subset.ratings = self.ratings[positions]
+        subset.timestamps = self.timestamps[positions]
+
+        # Usuarios y películas presentes y su código en el subconjunto; los índices siguen
+        # ordenados, como los que devuelve np.unique
+        user_present = (
+            np.bincount(user_codes[positions], minlength=len(self.user_index)) > 0
+        )
+        movie_present = (
+            np.bincount(movie_codes[positions], minlength=len(self.movie_index)) > 0
+        )
+        user_map = compact_integers(np.cumsum(user_present) - 1)
+        movie_map = compact_integers(np.cumsum(movie_present) - 1)
+        subset.user_index = self.user_index[user_present]
+        subset.movie_index = self.movie_index[movie_present]
+        n_users, n_movies = len(subset.user_index), len(subset.movie_index)
+
+        # El orden por (usuario, película) filtrado sigue siendo el orden de la CSR
+        order = pair_order[selected[pair_order]]
+        keys = user_codes[order].astype(np.int64) * len(self.movie_index) + (
+            movie_codes[order]
+        )
+        last = order[np.append(keys[1:] != keys[:-1], True)]
+        del keys, order
+        indptr = np.concatenate(
+            [
+                [0],
+                np.cumsum(np.bincount(user_map[user_codes[last]], minlength=n_users)),
+            ]
+        )
+        subset.user_item = sparse.csr_matrix(
+            (
+                self.ratings[last].astype(float),
+                movie_map[movie_codes[last]],
+                indptr,
+            ),
+            shape=(n_users, n_movies),
+        )
+        subset.user_item.has_sorted_indices = True
+
+        # El orden de las secuencias filtrado, con las posiciones del subconjunto
+        new_positions = np.cumsum(selected) - 1
+        subset.sequence_order = compact_integers(
+            new_positions[self.sequence_order[selected[self.sequence_order]]]
+        )
+
+        subset_movie_codes = movie_map[movie_codes[positions]]
+        subset.movie_counts = np.bincount(subset_movie_codes, minlength=n_movies)
+        subset.movie_rating_sums = np.bincount(
+            subset_movie_codes, weights=subset.ratings, minlength=n_movies
+        )
+        return subset
+
+    @classmethod
+    def from_chunks(cls, chunks, directory=None):
+        """
+        Construye las calificaciones a partir de bloques de un CSV leído por partes.
+
+        Cada bloque se reduce a columnas compactas (IDs int32, calificaciones float32) en cuanto
+        se lee, por lo que nunca se construye el DataFrame completo con los tipos por defecto.
+
+        Sin directory, las columnas de todos los bloques se unen en memoria. Con directory,
+        cada bloque se escribe en disco en cuanto se lee, las columnas se unen en archivos .npy
+        copiando un bloque cada vez y la matriz usuario-película, el orden de las secuencias y
+        los órdenes de subset se construyen por bloques del mismo tamaño en archivos .npy del
+        directorio. En memoria solo hay un bloque a la vez; el resultado proyecta los archivos
+        en memoria (véase open).
+
+        Parámetros:
+        chunks (iterable): DataFrames con las columnas userId, movieId, rating y timestamp.
+        directory (str, opcional): Directorio donde se escriben las columnas y las
+            estructuras.
+
+        Devuelve:
+        StreamedRatings: Las calificaciones de todos los bloques.
+        """
+        names = ["userId", "movieId", "rating", "timestamp"]
+        if directory is None:
+            columns = {name: [] for name in names}
+            for chunk in chunks:
+                for name, values in _chunk_columns(chunk).items():
+                    columns[name].append(values)
+            return cls(
+                **{
+                    name: np.concatenate(values) if values else np.empty(0)
+                    for name, values in columns.items()
+                }
+            )
+
+        os.makedirs(directory, exist_ok=True)
+        lengths, dtypes = [], {name: [] for name in names}
+        for number, chunk in enumerate(chunks):
+            for name, values in _chunk_columns(chunk).items():
+                np.save(os.path.join(directory, f"chunk{number}.{name}.npy"), values)
+                dtypes[name].append(values.dtype)
+            lengths.append(len(chunk))
+        # Cada columna se une copiando los bloques de uno en uno en un archivo .npy
+        ends = np.cumsum(lengths)
+        for name in names:
+            column = np.lib.format.open_memmap(
+                os.path.join(directory, name + ".npy"),
+                mode="w+",
+                dtype=np.result_type(*dtypes[name]) if lengths else float,
+                shape=(sum(lengths),),
+            )
+            for number, end in enumerate(ends):
+                chunk_path = os.path.join(directory, f"chunk{number}.{name}.npy")
+                column[end - lengths[number] : end] = np.load(chunk_path)
+                os.remove(chunk_path)
+            column.flush()
+            del column
+
+        ratings = cls.__new__(cls)
+        ratings.user_ids = np.load(os.path.join(directory, "userId.npy"), mmap_mode="r")
+        ratings.movie_ids = np.load(
+            os.path.join(directory, "movieId.npy"), mmap_mode="r"
+        )
+        ratings.ratings = np.load(os.path.join(directory, "rating.npy"), mmap_mode="r")
+        ratings.timestamps = np.load(
+            os.path.join(directory, "timestamp.npy"), mmap_mode="r"
+        )
+        ratings._build(max(lengths + [1]), directory)
+        del ratings
+        return cls.open(directory)
+
+    def __len__(self):
+        """
+        Devuelve el número de calificaciones.
+        """
+        return len(self.ratings)
+
+    def columns(self):
+        """
+        Devuelve las columnas de las calificaciones en el orden del archivo.
+
+        Devuelve:
+        dict: Columnas userId, movieId, rating y timestamp.
+        """
+        return {
+            "userId": self.user_ids,
+            "movieId": self.movie_ids,
+            "rating": self.ratings,
+            "timestamp": self.timestamps,
+        }
+
+    def to_frame(self):
+        """
+        Devuelve las calificaciones como DataFrame, sin copiar las columnas.
+
+        Devuelve:
+        DataFrame: Calificaciones con las columnas userId, movieId, rating y timestamp.
+        """
+        return pd.DataFrame(self.columns(), copy=False)
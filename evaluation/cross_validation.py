@@ -0,0 +1,139 @@
+# cross_validation.py
+
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+import tempfile
+import pandas as pd
+from data_loader import StreamedRatings
+from evaluation.evaluation import Evaluator
+from evaluation.splitters import k_fold
+from recommenders.recommender_base import Recommender
+
+# Estado compartido con los procesos que evalúan las particiones
+_worker_state = None
+
+
+def cross_validate(build, ratings, n_folds=5, k=10, seed=None, n_jobs=1):
+    """
+    Evalúa un recomendador con validación cruzada de n_folds particiones.
+
+    Las piezas costosas que no dependen de la partición se construyen una sola vez: la
+    codificación de los IDs y los órdenes de las calificaciones (las particiones se obtienen
+    con StreamedRatings.subset, sin volver a ordenar) y el modelo prototipo, entrenado con la
+    primera partición. Las demás particiones actualizan el prototipo con update_data, que
+    reutiliza lo que no depende de las calificaciones (la matriz TF-IDF y el índice
+    aproximado del recomendador basado en contenido) y parte del estado entrenado cuando
+    puede: la factorización matricial refina los factores de la partición anterior. Cada
+    partición quita calificaciones de la anterior, así que los recomendadores que solo
+    admiten calificaciones añadidas (vecinos, secuencias, K-Means) se vuelven a entrenar.
+
+    Con n_jobs > 1 las particiones se evalúan en paralelo. Con fork, cada proceso hereda el
+    prototipo y las calificaciones sin copiarlos (copy-on-write); sin fork, el prototipo se
+    guarda en disco y cada proceso lo carga una vez con sus matrices mapeadas en memoria.
+
+    Parámetros:
+    build (callable): Función que recibe las calificaciones de entrenamiento y devuelve el
+        recomendador entrenado, por ejemplo lambda r: HybridRecommender(clases, movies, r).
+    ratings (DataFrame o StreamedRatings): Calificaciones.
+    n_folds (int): Número de particiones.
+    k (int): Número de recomendaciones evaluadas por usuario.
+    seed (int, opcional): Semilla del reparto de las calificaciones en particiones.
+    n_jobs (int): Número de procesos (-1: uno por CPU).
+
+    Devuelve:
+    dict: "folds" (DataFrame con las métricas de cada partición), "mean" y "variance" (Series
+        con la media y la varianza muestral de cada métrica entre particiones).
+    """
+    global _worker_state
+    if isinstance(ratings, pd.DataFrame):
+        ratings = StreamedRatings.from_chunks([ratings])
+    folds = k_fold(ratings, n_folds, seed)
+
+    # Prototipo entrenado con la primera partición; al seleccionarla se calculan una sola vez
+    # la codificación de los IDs y los órdenes que reutilizan las demás
+    prototype = build(ratings.subset(folds[0][0]))
+    state = {"recommender": prototype, "ratings": ratings, "folds": folds, "k": k}
+    state["fold"] = 0
+
+    n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+    if n_jobs == 1:
+        results = [_evaluate_fold(state, fold) for fold in range(n_folds)]
+    else:
+        with tempfile.TemporaryDirectory() as model_path:
+            if "fork" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("fork")
+                initargs = None
+                _worker_state = state
+            else:
+                context = multiprocessing.get_context("spawn")
+                if isinstance(prototype, Recommender):
+                    prototype.save(model_path)
+                    state = dict(state, recommender=None)
+                initargs = (model_path, state)
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=min(n_jobs, n_folds),
+                    mp_context=context,
+                    initializer=_load_worker_state if initargs else None,
+                    initargs=initargs or (),
+                ) as executor:
+                    results = list(executor.map(_evaluate_worker_fold, range(n_folds)))
+            finally:
+                _worker_state = None
+
+    folds = pd.DataFrame(results)
+    return {"folds": folds, "mean": folds.mean(), "variance": folds.var()}
+
+
+def _evaluate_fold(state, fold):
+    """
+    Entrena el recomendador compartido con una partición (si no lo está ya) y la evalúa.
+
+    Parámetros:
+    state (dict): Recomendador, calificaciones, particiones, k y partición con la que está
+        entrenado el recomendador.
+    fold (int): Número de la partición.
+
+    Devuelve:
+    dict: Métricas de la partición.
+    """
+    train_index, test_index = state["folds"][fold]
+    if state["fold"] != fold:
+        state["recommender"].update_data(state["ratings"].subset(train_index))
+        state["fold"] = fold
+    evaluator = Evaluator(
+        state["recommender"],
+        state["ratings"],
+        k=state["k"],
+        split=lambda ratings: (train_index, test_index),
+        fit=False,
+    )
+    return evaluator.evaluate()
+
+
+def _load_worker_state(model_path, state):
+    """
+    Inicializa un proceso creado sin fork cargando el prototipo guardado.
+
+    Parámetros:
+    model_path (str): Directorio del prototipo guardado.
+    state (dict): Estado compartido; si su recomendador es None, se carga de model_path.
+    """
+    global _worker_state
+    if state["recommender"] is None:
+        state["recommender"] = Recommender.load(model_path)
+    _worker_state = state
+
+
+def _evaluate_worker_fold(fold):
+    """
+    Evalúa una partición con el estado compartido del proceso.
+
+    Parámetros:
+    fold (int): Número de la partición.
+
+    Devuelve:
+    dict: Métricas de la partición.
+    """
+    return _evaluate_fold(_worker_state, fold)
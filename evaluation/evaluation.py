@@ -2,170 +2,357 @@
 
 import pandas as pd
 import numpy as np
+from recommenders.recommender_base import Recommender
+from evaluation.splitters import (
+    leave_last_n,
+    random_holdout,
+    rating_column,
+    temporal_cutoff,
+)
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+import tempfile
 
 
 class Evaluator:
-    def __init__(self, recommender, ratings, k=10):
+    def __init__(
+        self,
+        recommender,
+        ratings,
+        k=10,
+        n_jobs=1,
+        split="random",
+        seed=None,
+        fit=True,
+        start_method=None,
+    ):
         self.recommender = recommender
         self.ratings = ratings
         self.k = k
+        # Número de procesos que recomiendan a los usuarios en paralelo (-1: uno por CPU).
+        # Crear los procesos tiene un coste fijo (con spawn, varios segundos) que solo
+        # compensa en evaluaciones largas, por eso por defecto se evalúa en serie
+        self.n_jobs = n_jobs
+        # Método de inicio de los procesos: "fork", "spawn" o None (fork si está disponible).
+        # fork no es seguro desde un proceso con otros hilos en marcha, como una interfaz Qt
+        self.start_method = start_method
+        # División de los datos: "random" (fracción al azar de cada usuario), "leave_last"
+        # (última calificación de cada usuario), "temporal" (corte común por timestamp) o
+        # una función que recibe las calificaciones y devuelve (train_index, test_index)
+        self.split = split
+        # Semilla de la división aleatoria, para repetir el mismo experimento
+        self.seed = seed
         # Dividir los datos en conjuntos de entrenamiento y prueba
         self.train_data, self.test_data = self.train_test_split()
-        # Actualizar el recommender con los datos de entrenamiento
+        # Actualizar el recommender con los datos de entrenamiento, salvo que ya se haya
+        # entrenado con ellos
+        if fit:
+            self.fit()
+
+    def fit(self):
+        # Entrena el recommender con los datos de entrenamiento. Las métricas calculadas con
+        # el modelo anterior dejan de valer; si el recommender se vuelve a entrenar fuera del
+        # evaluador, hay que llamar a fit o a train_test_split para descartarlas
         self.recommender.update_data(self.train_data)
+        self._results = None
 
     def train_test_split(self, test_size=0.8):
-        # Dividir los datos por usuario
-        test_data = self.ratings.groupby("userId").apply(
-            lambda x: x.sample(frac=test_size)
-        )
-        test_data.index = test_data.index.droplevel()
-        train_data = self.ratings.drop(test_data.index)
-        return train_data, test_data
+        # Las métricas de la división anterior dejan de valer
+        self._results = None
+
+        # Posiciones de las filas de entrenamiento y prueba
+        if callable(self.split):
+            self.train_index, self.test_index = self.split(self.ratings)
+        elif self.split == "random":
+            self.train_index, self.test_index = random_holdout(
+                self.ratings, test_size, self.seed
+            )
+        elif self.split == "leave_last":
+            self.train_index, self.test_index = leave_last_n(self.ratings)
+        elif self.split == "temporal":
+            self.train_index, self.test_index = temporal_cutoff(self.ratings, test_size)
+        else:
+            raise ValueError(f"División de datos desconocida: {self.split}.")
+
+        # Un StreamedRatings se divide con subset, sin pasar por un DataFrame completo
+        if not isinstance(self.ratings, pd.DataFrame):
+            return (
+                self.ratings.subset(self.train_index),
+                self.ratings.subset(self.test_index),
+            )
+        return self.ratings.iloc[self.train_index], self.ratings.iloc[self.test_index]
 
     def precision_at_k(self):
-        precisions = []
-        for user_id in self.test_data["userId"].unique():
-            actual = self.test_data[self.test_data["userId"] == user_id][
-                "movieId"
-            ].tolist()
-            if not actual:
-                continue
-            recommended = self.recommender.recommend(user_id, top_n=self.k)
-            if not any(recommended):
-                continue
-            recommended_set = set(recommended)
-            actual_set = set(actual)
-            precision = len(recommended_set & actual_set) / len(recommended_set)
-            precisions.append(precision)
-        return np.mean(precisions)
+        return self.evaluate()["Precision@k"]
 
     def recall_at_k(self):
-        recalls = []
-        for user_id in self.test_data["userId"].unique():
-            actual = self.test_data[self.test_data["userId"] == user_id][
-                "movieId"
-            ].tolist()
-            if not actual:
-                continue
-            recommended = self.recommender.recommend(user_id, top_n=self.k)
-            if not any(recommended):
-                continue
-            recommended_set = set(recommended)
-            actual_set = set(actual)
-            recall = len(recommended_set & actual_set) / len(actual_set)
-            recalls.append(recall)
-        return np.mean(recalls)
+        return self.evaluate()["Recall@k"]
 
     def f1_score_at_k(self):
-        precision = self.precision_at_k()
-        recall = self.recall_at_k()
-        if precision + recall == 0:
-            return 0
-        return 2 * (precision * recall) / (precision + recall)
+        return self.evaluate()["F1-Score@k"]
 
     def ndcg_at_k(self):
-        ndcgs = []
-        for user_id in self.test_data["userId"].unique():
-            actual = self.test_data[self.test_data["userId"] == user_id][
-                "movieId"
-            ].tolist()
-            if not actual:
-                continue
-            recommended = self.recommender.recommend(user_id, top_n=self.k)
-            if not any(recommended):
-                continue
-            dcg = 0.0
-            for i, rec in enumerate(recommended):
-                if rec in actual:
-                    dcg += 1 / np.log2(i + 2)  # i+2 porque i empieza en 0
-            idcg = sum([1 / np.log2(i + 2) for i in range(min(len(actual), self.k))])
-            ndcg = dcg / idcg if idcg > 0 else 0
-            ndcgs.append(ndcg)
-        return np.mean(ndcgs)
+        return self.evaluate()["NDCG@k"]
 
     def map_at_k(self):
-        average_precisions = []
-        for user_id in self.test_data["userId"].unique():
-            actual = self.test_data[self.test_data["userId"] == user_id][
-                "movieId"
-            ].tolist()
-            if not actual:
-                continue
-            recommended = self.recommender.recommend(user_id, top_n=self.k)
-            if not any(recommended):
-                continue
-            hits = 0
-            sum_precisions = 0
-            for i, rec in enumerate(recommended):
-                if rec in actual:
-                    hits += 1
-                    precision_i = hits / (i + 1)
-                    sum_precisions += precision_i
-            if hits > 0:
-                average_precision = sum_precisions / len(actual)
-                average_precisions.append(average_precision)
-        return np.mean(average_precisions) if average_precisions else 0
+        return self.evaluate()["MAP@k"]
 
     def mrr_at_k(self):
-        reciprocal_ranks = []
-        for user_id in self.test_data["userId"].unique():
-            actual = self.test_data[self.test_data["userId"] == user_id][
-                "movieId"
-            ].tolist()
-            if not actual:
-                continue
-            recommended = self.recommender.recommend(user_id, top_n=self.k)
-            if not any(recommended):
-                continue
-            rank = next(
-                (i + 1 for i, rec in enumerate(recommended) if rec in actual), None
-            )
-            if rank:
-                reciprocal_ranks.append(1 / rank)
-        return np.mean(reciprocal_ranks) if reciprocal_ranks else 0
+        return self.evaluate()["MRR@k"]
 
     def hit_rate_at_k(self):
-        hits = 0
-        total = 0
-        for user_id in self.test_data["userId"].unique():
-            actual = self.test_data[self.test_data["userId"] == user_id][
-                "movieId"
-            ].tolist()
-            if not actual:
-                continue
-            recommended = self.recommender.recommend(user_id, top_n=self.k)
-            if not any(recommended):
-                continue
-            if set(recommended) & set(actual):
-                hits += 1
-            total += 1
-        return hits / total if total > 0 else 0
+        return self.evaluate()["Hit Rate@k"]
 
     def coverage(self):
-        recommended_items = set()
-        all_items = set(self.train_data["movieId"].unique())
-        for user_id in self.train_data["userId"].unique():
-            recommended = self.recommender.recommend(user_id, top_n=self.k)
-            recommended_items.update(recommended)
-        return len(recommended_items) / len(all_items) if all_items else 0
+        return self.evaluate()["Coverage"]
+
+    def _recommend_all(self, user_ids):
+        # Recomendaciones de todos los usuarios en una matriz (usuarios x k) rellena con -1.
+        # Los recomendadores del paquete puntúan los usuarios por bloques con recommend_many;
+        # para cualquier otro objeto se llama a recommend usuario a usuario
+        if isinstance(self.recommender, Recommender):
+            return np.asarray(self.recommender.recommend_many(user_ids, top_n=self.k))
+        recommended = [
+            list(self.recommender.recommend(u, top_n=self.k)) for u in user_ids
+        ]
+        width = max([self.k] + [len(r) for r in recommended])
+        recommendations = np.full((len(user_ids), width), -1, dtype=np.int64)
+        for i, items in enumerate(recommended):
+            recommendations[i, : len(items)] = items
+        return recommendations
 
     def evaluate(self):
-        precision = self.precision_at_k()
-        recall = self.recall_at_k()
-        f1_score = self.f1_score_at_k()
-        ndcg = self.ndcg_at_k()
-        map_k = self.map_at_k()
-        mrr_k = self.mrr_at_k()
-        hit_rate = self.hit_rate_at_k()
-        coverage = self.coverage()
+        # Las métricas se calculan una sola vez por división, entrenamiento y valor de k;
+        # precision_at_k, recall_at_k y las demás las leen de la misma evaluación
+        if self._results is None or self._results[0] != self.k:
+            self._results = (self.k, self._evaluate())
+        return dict(self._results[1])
+
+    def _evaluate(self):
+        user_ids, test_rows, is_train = self._evaluation_layout()
+        truth = self._ground_truth(user_ids[test_rows >= 0])
+
+        # Los usuarios se reparten en bloques contiguos; cada bloque devuelve sus métricas
+        # por usuario, que se concatenan en orden para obtener los mismos valores en serie
+        # y en paralelo
+        n_jobs = os.cpu_count() if self.n_jobs == -1 else self.n_jobs
+        n_shards = 1 if n_jobs == 1 else n_jobs * 4
+        shards = [
+            (user_ids[rows], test_rows[rows], is_train[rows])
+            for rows in np.array_split(np.arange(len(user_ids)), n_shards)
+            if len(rows)
+        ] or [(user_ids, test_rows, is_train)]
+        if n_jobs == 1:
+            partials = [self._shard_partials(truth, *shard) for shard in shards]
+        else:
+            partials = self._parallel_partials(truth, shards, n_jobs)
+        return self._merge_partials(partials)
+
+    def evaluation_users(self):
+        # IDs de los usuarios evaluados, en el orden de las filas que espera
+        # evaluate_recommendations
+        return self._evaluation_layout()[0]
+
+    def evaluate_recommendations(self, recommendation_sets):
+        # Métricas de matrices de recomendaciones ya generadas (una fila por usuario de
+        # evaluation_users(), rellenas con -1), por ejemplo las de un híbrido con distintos
+        # pesos. La verdad de referencia se agrupa una sola vez para todas
+        user_ids, test_rows, is_train = self._evaluation_layout()
+        truth = self._ground_truth(user_ids[test_rows >= 0])
+        return [
+            self._merge_partials(
+                [self._recommendation_partials(truth, recs, test_rows, is_train)]
+            )
+            for recs in recommendation_sets
+        ]
+
+    def _evaluation_layout(self):
+        # Usuarios evaluados (primero los de prueba, después los de entrenamiento que no
+        # están en prueba), fila de cada uno en el conjunto de prueba (-1 si no está) y si
+        # está en entrenamiento
+        test_users = pd.unique(rating_column(self.test_data, "userId"))
+        train_users = pd.unique(rating_column(self.train_data, "userId"))
+        user_ids = np.concatenate(
+            [test_users, train_users[~np.isin(train_users, test_users)]]
+        )
+        test_rows = np.full(len(user_ids), -1)
+        test_rows[: len(test_users)] = np.arange(len(test_users))
+        is_train = np.isin(user_ids, train_users)
+        return user_ids, test_rows, is_train
+
+    def _parallel_partials(self, truth, shards, n_jobs):
+        # Con fork, los procesos heredan el recomendador y la verdad de referencia a través
+        # de una variable global (copy-on-write), sin serializarlos. Con spawn (Windows,
+        # macOS, o si se pide con start_method), el recomendador se guarda en disco y cada
+        # proceso lo carga una vez con sus matrices mapeadas en memoria
+        global _worker_state
+        with tempfile.TemporaryDirectory() as model_path:
+            start_method = self.start_method or (
+                "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+            )
+            if start_method == "fork":
+                context = multiprocessing.get_context("fork")
+                initargs = None
+                _worker_state = (self, truth)
+            else:
+                context = multiprocessing.get_context("spawn")
+                if isinstance(self.recommender, Recommender):
+                    self.recommender.save(model_path)
+                    initargs = (model_path, None, self.k, truth)
+                else:
+                    initargs = (None, self.recommender, self.k, truth)
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=min(n_jobs, len(shards)),
+                    mp_context=context,
+                    initializer=_load_worker_state if initargs else None,
+                    initargs=initargs or (),
+                ) as executor:
+                    return list(executor.map(_evaluate_shard, shards))
+            finally:
+                _worker_state = None
+
+    def _ground_truth(self, test_users):
+        # Verdad de referencia agrupada una sola vez: posición de cada usuario de prueba y
+        # código de cada película en el conjunto de prueba
+        test_movies = rating_column(self.test_data, "movieId")
+        movie_index = pd.Index(pd.unique(test_movies))
+        user_rows = (
+            pd.Index(test_users)
+            .get_indexer(rating_column(self.test_data, "userId"))
+            .astype(np.int64)
+        )
+        movie_codes = movie_index.get_indexer(test_movies)
+        actual_keys = np.unique(user_rows * len(movie_index) + movie_codes)
+        return {
+            "movie_index": movie_index,
+            "actual_keys": actual_keys,
+            "n_actual": np.bincount(user_rows, minlength=len(test_users)),
+            "n_actual_distinct": np.bincount(
+                actual_keys // len(movie_index), minlength=len(test_users)
+            ),
+        }
+
+    def _shard_partials(self, truth, user_ids, test_rows, is_train):
+        return self._recommendation_partials(
+            truth, self._recommend_all(user_ids), test_rows, is_train
+        )
+
+    def _recommendation_partials(self, truth, recommendations, test_rows, is_train):
+        # Métricas por usuario de un bloque de usuarios y películas que cubren sus
+        # recomendaciones
+        covered = recommendations[is_train]
+        partials = self._ranking_partials(
+            truth, test_rows[test_rows >= 0], recommendations[test_rows >= 0]
+        )
+        partials["covered"] = np.unique(covered[covered != -1])
+        return partials
+
+    def _ranking_partials(self, truth, test_rows, recommendations):
+        movie_index = truth["movie_index"]
+
+        # Matriz de aciertos: cada posición recomendada que está en el conjunto de prueba
+        valid = recommendations != -1
+        codes = movie_index.get_indexer(recommendations.ravel()).reshape(
+            recommendations.shape
+        )
+        keys = test_rows[:, None] * len(movie_index) + codes
+        actual_keys = truth["actual_keys"]
+        found = np.searchsorted(actual_keys, keys)
+        hits = valid & (codes >= 0) & (found < len(actual_keys))
+        hits[hits] = actual_keys[found[hits]] == keys[hits]
+
+        # Primera aparición de cada película en su lista, para contar como conjuntos
+        order = np.argsort(recommendations, axis=1, kind="stable")
+        sorted_items = np.take_along_axis(recommendations, order, axis=1)
+        first_sorted = np.ones(recommendations.shape, dtype=bool)
+        first_sorted[:, 1:] = sorted_items[:, 1:] != sorted_items[:, :-1]
+        distinct = np.empty_like(first_sorted)
+        np.put_along_axis(distinct, order, first_sorted, axis=1)
+        distinct &= valid
+
+        # Usuarios sin ninguna recomendación (equivalente a not any(recommended))
+        kept = (valid & (recommendations != 0)).any(axis=1)
+        hits, distinct, test_rows = hits[kept], distinct[kept], test_rows[kept]
+        n_actual = truth["n_actual"][test_rows]
+
+        distinct_hits = (hits & distinct).sum(axis=1)
+        precisions = distinct_hits / distinct.sum(axis=1)
+        recalls = distinct_hits / truth["n_actual_distinct"][test_rows]
+
+        # Las sumas se acumulan posición a posición, en el mismo orden que un bucle por
+        # lista, para obtener exactamente los mismos valores
+        discounts = 1 / np.log2(np.arange(hits.shape[1]) + 2)
+        ideal = np.cumsum(np.concatenate([[0.0], discounts[: self.k]]))
+        dcg = np.zeros(len(hits))
+        sum_precisions = np.zeros(len(hits))
+        cumulative_hits = np.cumsum(hits, axis=1)
+        for i in range(hits.shape[1]):
+            dcg += np.where(hits[:, i], discounts[i], 0.0)
+            sum_precisions += np.where(hits[:, i], cumulative_hits[:, i] / (i + 1), 0.0)
+        idcg = ideal[np.minimum(n_actual, self.k)]
+
+        any_hit = (
+            cumulative_hits[:, -1] > 0 if hits.shape[1] else np.zeros(len(hits), bool)
+        )
+        return {
+            "precisions": precisions,
+            "recalls": recalls,
+            "ndcgs": np.divide(dcg, idcg, out=np.zeros(len(dcg)), where=idcg > 0),
+            "average_precisions": sum_precisions[any_hit] / n_actual[any_hit],
+            "reciprocal_ranks": 1 / (np.argmax(hits, axis=1)[any_hit] + 1),
+            "any_hit": any_hit,
+        }
+
+    def _merge_partials(self, partials):
+        # Une las métricas por usuario de todos los bloques y calcula las medias
+        values = {
+            name: np.concatenate([partial[name] for partial in partials])
+            for name in partials[0]
+        }
+        precision = np.mean(values["precisions"])
+        recall = np.mean(values["recalls"])
+        if precision + recall == 0:
+            f1_score = 0
+        else:
+            f1_score = 2 * (precision * recall) / (precision + recall)
+        average_precisions = values["average_precisions"]
+        reciprocal_ranks = values["reciprocal_ranks"]
+        any_hit = values["any_hit"]
+
+        # Cobertura: películas recomendadas a los usuarios de entrenamiento sobre las
+        # películas del conjunto de entrenamiento
+        all_items = len(pd.unique(rating_column(self.train_data, "movieId")))
+        covered = len(np.unique(values["covered"]))
         return {
             "Precision@k": precision,
             "Recall@k": recall,
             "F1-Score@k": f1_score,
-            "NDCG@k": ndcg,
-            "MAP@k": map_k,
-            "MRR@k": mrr_k,
-            "Hit Rate@k": hit_rate,
-            "Coverage": coverage,
+            "NDCG@k": np.mean(values["ndcgs"]),
+            "MAP@k": np.mean(average_precisions) if len(average_precisions) else 0,
+            "MRR@k": np.mean(reciprocal_ranks) if len(reciprocal_ranks) else 0,
+            "Hit Rate@k": np.mean(any_hit) if len(any_hit) else 0,
+            "Coverage": covered / all_items if all_items else 0,
         }
+
+
+# Evaluador y verdad de referencia que usan los procesos de evaluación en paralelo
+_worker_state = None
+
+
+def _load_worker_state(model_path, recommender, k, truth):
+    # Inicializa un proceso creado sin fork: carga el recomendador guardado (o recibe el
+    # objeto serializado si no es un Recommender del paquete)
+    global _worker_state
+    evaluator = Evaluator.__new__(Evaluator)
+    evaluator.recommender = (
+        Recommender.load(model_path) if model_path is not None else recommender
+    )
+    evaluator.k = k
+    _worker_state = (evaluator, truth)
+
+
+def _evaluate_shard(shard):
+    evaluator, truth = _worker_state
+    return evaluator._shard_partials(truth, *shard)
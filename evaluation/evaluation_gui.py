@@ -13,13 +13,33 @@ from PyQt5.QtWidgets import (
     QTableWidgetItem,
     QMessageBox,
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+
+
+class EvaluationThread(QThread):
+    # Ejecuta la evaluación fuera del hilo de la interfaz para que la ventana no se bloquee
+    results_ready = pyqtSignal(dict)
+    error = pyqtSignal(str)
+
+    def __init__(self, evaluator):
+        super().__init__()
+        self.evaluator = evaluator
+
+    def run(self):
+        try:
+            self.results_ready.emit(self.evaluator.evaluate())
+        except Exception as e:
+            self.error.emit(str(e))
 
 
 class EvaluationGUI(QWidget):
     def __init__(self, evaluator):
         super().__init__()
         self.evaluator = evaluator
+        # La evaluación se lanza desde un QThread: si usa varios procesos, se crean con spawn,
+        # porque hacer fork de un proceso Qt con varios hilos no es seguro
+        if self.evaluator.n_jobs != 1:
+            self.evaluator.start_method = "spawn"
         self.init_ui()
 
     def init_ui(self):
@@ -125,15 +145,25 @@ class EvaluationGUI(QWidget):
         # Actualizar N en el evaluador
         self.evaluator.k = k
 
-        # Ejecutar evaluación
-        try:
-            results = self.evaluator.evaluate()
-        except Exception as e:
-            QMessageBox.critical(
-                self, "Error", f"Ocurrió un error durante la evaluación:\n{str(e)}"
-            )
-            return
+        # Ejecutar evaluación en segundo plano
+        self.evaluate_button.setEnabled(False)
+        self.results_label.setText("Evaluando...")
+        self.evaluation_thread = EvaluationThread(self.evaluator)
+        self.evaluation_thread.results_ready.connect(self.show_results)
+        self.evaluation_thread.error.connect(self.show_error)
+        self.evaluation_thread.finished.connect(self.evaluation_finished)
+        self.evaluation_thread.start()
+
+    def evaluation_finished(self):
+        self.evaluate_button.setEnabled(True)
+        self.results_label.setText("Resultados:")
+
+    def show_error(self, message):
+        QMessageBox.critical(
+            self, "Error", f"Ocurrió un error durante la evaluación:\n{message}"
+        )
 
+    def show_results(self, results):
         # Mostrar resultados en la tabla
         self.results_table.setRowCount(
             len(self.metrics)
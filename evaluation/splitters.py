@@ -0,0 +1,152 @@
+# splitters.py
+
+import numpy as np
+import pandas as pd
+
+
+def rating_column(ratings, name):
+    """
+    Obtiene una columna de las calificaciones como arreglo de NumPy.
+
+    Parámetros:
+    ratings (DataFrame o StreamedRatings): Calificaciones.
+    name (str): Nombre de la columna.
+
+    Devuelve:
+    numpy.ndarray: Valores de la columna; los timestamps son float con NaN para los ausentes.
+    """
+    if isinstance(ratings, pd.DataFrame):
+        if name == "timestamp":
+            return ratings[name].to_numpy(dtype=float)
+        return ratings[name].to_numpy()
+    return ratings.columns()[name]
+
+
+def _user_ranks(user_ids, sort_key):
+    """
+    Calcula la posición de cada calificación dentro de las de su usuario.
+
+    Parámetros:
+    user_ids (numpy.ndarray): ID del usuario de cada calificación.
+    sort_key (numpy.ndarray): Valor por el que se ordenan las calificaciones de cada usuario;
+        los empates se resuelven por el orden original.
+
+    Devuelve:
+    tuple: (ranks, user_codes, counts) con la posición de cada calificación dentro de su
+        usuario (desde 0), el código de su usuario y el número de calificaciones de cada
+        usuario.
+    """
+    _, user_codes, counts = np.unique(user_ids, return_inverse=True, return_counts=True)
+    order = np.lexsort((sort_key, user_codes))
+    starts = np.cumsum(counts) - counts
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(len(order)) - np.repeat(starts, counts)
+    return ranks, user_codes, counts
+
+
+def _split(test):
+    """
+    Convierte una máscara de calificaciones de prueba en índices de entrenamiento y prueba.
+
+    Parámetros:
+    test (numpy.ndarray): Máscara booleana de las calificaciones de prueba.
+
+    Devuelve:
+    tuple: (train_index, test_index) con las posiciones de las filas, en orden ascendente.
+    """
+    return np.flatnonzero(~test), np.flatnonzero(test)
+
+
+def random_holdout(ratings, test_size=0.8, seed=None):
+    """
+    Separa al azar una fracción de las calificaciones de cada usuario.
+
+    Cada usuario aporta round(test_size * n) de sus n calificaciones al conjunto de prueba,
+    como groupby("userId").sample(frac=test_size), pero con un único orden aleatorio para
+    todos los usuarios en lugar de una llamada por usuario.
+
+    Parámetros:
+    ratings (DataFrame o StreamedRatings): Calificaciones con la columna userId.
+    test_size (float): Fracción de las calificaciones de cada usuario que va a prueba.
+    seed (int, opcional): Semilla del generador aleatorio; con la misma semilla la división
+        es siempre la misma.
+
+    Devuelve:
+    tuple: (train_index, test_index) con las posiciones de las filas.
+    """
+    user_ids = rating_column(ratings, "userId")
+    rng = np.random.default_rng(seed)
+    ranks, user_codes, counts = _user_ranks(user_ids, rng.random(len(user_ids)))
+    return _split(ranks < np.round(test_size * counts)[user_codes])
+
+
+def leave_last_n(ratings, n=1):
+    """
+    Separa las n calificaciones más recientes de cada usuario.
+
+    Es la división adecuada para el recomendador secuencial: el conjunto de prueba contiene
+    lo que cada usuario vio después de su historial de entrenamiento. Las calificaciones sin
+    timestamp se consideran las más recientes, como en sort_values.
+
+    Parámetros:
+    ratings (DataFrame o StreamedRatings): Calificaciones con las columnas userId y
+        timestamp.
+    n (int): Número de calificaciones de cada usuario que van a prueba.
+
+    Devuelve:
+    tuple: (train_index, test_index) con las posiciones de las filas.
+    """
+    user_ids = rating_column(ratings, "userId")
+    ranks, user_codes, counts = _user_ranks(
+        user_ids, rating_column(ratings, "timestamp")
+    )
+    return _split(ranks >= (counts - n)[user_codes])
+
+
+def temporal_cutoff(ratings, test_size=0.2, cutoff=None):
+    """
+    Separa las calificaciones posteriores a un instante común para todos los usuarios.
+
+    Parámetros:
+    ratings (DataFrame o StreamedRatings): Calificaciones con la columna timestamp.
+    test_size (float): Fracción aproximada de las calificaciones que va a prueba; define el
+        instante de corte como un cuantil de los timestamps si no se indica cutoff.
+    cutoff (float, opcional): Timestamp a partir del cual (inclusive) las calificaciones van
+        a prueba.
+
+    Devuelve:
+    tuple: (train_index, test_index) con las posiciones de las filas. Las calificaciones sin
+        timestamp quedan en entrenamiento.
+    """
+    timestamps = rating_column(ratings, "timestamp")
+    if cutoff is None:
+        known = timestamps[~np.isnan(timestamps)]
+        if len(known) == 0:
+            return _split(np.zeros(len(timestamps), dtype=bool))
+        cutoff = np.quantile(known, 1 - test_size)
+    return _split(timestamps >= cutoff)
+
+
+def k_fold(ratings, n_folds=5, seed=None):
+    """
+    Reparte al azar las calificaciones de cada usuario en n_folds particiones.
+
+    Cada usuario reparte sus calificaciones por igual entre las particiones, empezando por
+    una partición aleatoria para que los usuarios con pocas calificaciones no caigan siempre
+    en las primeras.
+
+    Parámetros:
+    ratings (DataFrame o StreamedRatings): Calificaciones con la columna userId.
+    n_folds (int): Número de particiones.
+    seed (int, opcional): Semilla del generador aleatorio.
+
+    Devuelve:
+    list: n_folds tuplas (train_index, test_index); cada calificación está en el conjunto de
+        prueba de exactamente una partición.
+    """
+    user_ids = rating_column(ratings, "userId")
+    rng = np.random.default_rng(seed)
+    ranks, user_codes, counts = _user_ranks(user_ids, rng.random(len(user_ids)))
+    offsets = rng.integers(n_folds, size=len(counts))
+    folds = (ranks + offsets[user_codes]) % n_folds
+    return [_split(folds == fold) for fold in range(n_folds)]
@@ -0,0 +1,434 @@
+# sweep.py
+
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import multiprocessing
+import os
+import numpy as np
+import pandas as pd
+from data_loader import StreamedRatings
+from evaluation.evaluation import Evaluator
+from evaluation.splitters import k_fold
+from recommenders.hybrid_recommender import HybridRecommender
+from recommenders.recommender_base import top_n_positions
+
+# Estado compartido con los procesos que entrenan los recomendadores base
+_worker_state = None
+
+
+def weight_grid(n_models, step=0.1):
+    """
+    Genera todas las combinaciones de pesos no negativos, múltiplos de step, que suman 1.
+
+    Parámetros:
+    n_models (int): Número de recomendadores base.
+    step (float): Separación entre los valores de cada peso.
+
+    Devuelve:
+    numpy.ndarray: Matriz (combinaciones x n_models) de pesos.
+    """
+    n_steps = round(1 / step)
+    combinations = [
+        combination
+        for combination in itertools.product(range(n_steps + 1), repeat=n_models)
+        if sum(combination) == n_steps
+    ]
+    return np.array(combinations) / n_steps
+
+
+def parameter_configurations(param_grid, n_iter=None, seed=None):
+    """
+    Genera las configuraciones de parámetros de los recomendadores base.
+
+    Parámetros:
+    param_grid (list): Un diccionario por recomendador base con los valores a probar de cada
+        parámetro, por ejemplo [{}, {"n_neighbors": [20, 50]}, {"order": [1, 2]}].
+    n_iter (int, opcional): Si es None, se generan todas las combinaciones (búsqueda en
+        rejilla); si no, n_iter combinaciones elegidas al azar (búsqueda aleatoria).
+    seed (int, opcional): Semilla de la búsqueda aleatoria.
+
+    Devuelve:
+    list: Configuraciones; cada una es una tupla con los parámetros de cada recomendador base.
+    """
+    names = [
+        (model, name) for model, grid in enumerate(param_grid) for name in sorted(grid)
+    ]
+    values = [param_grid[model][name] for model, name in names]
+    if n_iter is None:
+        choices = list(itertools.product(*values))
+    else:
+        rng = np.random.default_rng(seed)
+        choices = [
+            tuple(options[rng.integers(len(options))] for options in values)
+            for _ in range(n_iter)
+        ]
+
+    configurations = []
+    for choice in choices:
+        params = [{} for _ in param_grid]
+        for (model, name), value in zip(names, choice):
+            params[model][name] = value
+        configurations.append(tuple(params))
+    return configurations
+
+
+def sweep(
+    recommenders,
+    movies,
+    ratings,
+    weights=None,
+    param_grid=None,
+    n_iter=None,
+    n_folds=3,
+    k=10,
+    seed=None,
+    n_jobs=1,
+    depth=None,
+    hybrid_params=None,
+):
+    """
+    Busca los pesos y parámetros del recomendador híbrido con validación cruzada.
+
+    En cada partición, cada recomendador base distinto (clase y parámetros) se entrena una
+    sola vez y sus puntuaciones normalizadas para todos los usuarios evaluados se guardan.
+    Cada combinación de pesos se evalúa después solo con operaciones vectorizadas sobre esas
+    puntuaciones, sin volver a entrenar ni a llamar a los recomendadores; las
+    recomendaciones son las mismas que daría HybridRecommender con esos pesos.
+
+    Parámetros:
+    recommenders (list): Clases de los recomendadores base.
+    movies (DataFrame): Datos de las películas.
+    ratings (DataFrame o StreamedRatings): Calificaciones.
+    weights (array-like, opcional): Matriz (combinaciones x recomendadores) de pesos no
+        negativos; por defecto, weight_grid(len(recommenders)).
+    param_grid (list, opcional): Valores a probar de los parámetros de cada recomendador
+        base (ver parameter_configurations); por defecto, sus parámetros por defecto.
+    n_iter (int, opcional): Número de configuraciones de la búsqueda aleatoria; si es None,
+        se prueban todas las de param_grid.
+    n_folds (int): Número de particiones de la validación cruzada.
+    k (int): Número de recomendaciones evaluadas por usuario.
+    seed (int, opcional): Semilla de las particiones y de la búsqueda aleatoria.
+    n_jobs (int): Número de procesos que entrenan los recomendadores base (-1: uno por
+        CPU).
+    depth (int, opcional): Número de películas mejor puntuadas por cada recomendador base
+        que se combinan para cada usuario antes de recurrir a la fila completa; por defecto,
+        5 * k.
+    hybrid_params (dict, opcional): Parámetros de popularidad de HybridRecommender
+        (popularity_window, popularity_smoothing).
+
+    Devuelve:
+    DataFrame: Una fila por configuración y combinación de pesos, con las columnas params
+        (parámetros de cada recomendador base), weights y la media de cada métrica entre
+        particiones.
+    """
+    global _worker_state
+    if isinstance(ratings, pd.DataFrame):
+        ratings = StreamedRatings.from_chunks([ratings])
+    weights = np.atleast_2d(
+        weight_grid(len(recommenders)) if weights is None else weights
+    )
+    configurations = parameter_configurations(
+        param_grid or [{} for _ in recommenders], n_iter, seed
+    )
+    folds = k_fold(ratings, n_folds, seed)
+    depth = depth or 5 * k
+    n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+
+    # Recomendadores base distintos entre todas las configuraciones
+    base_models = sorted(
+        {
+            (model, tuple(sorted(params[model].items())))
+            for params in configurations
+            for model in range(len(recommenders))
+        }
+    )
+
+    results = []
+    for train_index, test_index in folds:
+        train = ratings.subset(train_index)
+        # Híbrido sin recomendadores base: usuarios conocidos, películas calificadas y
+        # ranking de popularidad de la partición
+        context = HybridRecommender(
+            [], movies, train, weights=[], **(hybrid_params or {})
+        )
+        evaluator = Evaluator(
+            context,
+            ratings,
+            k=k,
+            split=lambda ratings, split=(train_index, test_index): split,
+            fit=False,
+        )
+        user_ids = evaluator.evaluation_users()
+
+        # Puntuaciones normalizadas de cada recomendador base, calculadas una sola vez
+        state = {
+            "recommenders": recommenders,
+            "movies": movies,
+            "train": train,
+            "user_ids": user_ids[context._user_index.get_indexer(user_ids) >= 0],
+        }
+        if n_jobs == 1 or len(base_models) == 1:
+            _worker_state = state
+            scores = [_score_base_model(model) for model in base_models]
+        else:
+            if "fork" in multiprocessing.get_all_start_methods():
+                context_name, initargs = "fork", None
+                _worker_state = state
+            else:
+                context_name, initargs = "spawn", (state,)
+            with ProcessPoolExecutor(
+                max_workers=min(n_jobs, len(base_models)),
+                mp_context=multiprocessing.get_context(context_name),
+                initializer=_load_worker_state if initargs else None,
+                initargs=initargs or (),
+            ) as executor:
+                scores = list(executor.map(_score_base_model, base_models))
+        _worker_state = None
+        scores = dict(zip(base_models, scores))
+
+        results.append(
+            [
+                evaluator.evaluate_recommendations(
+                    _weighted_recommendations(
+                        context,
+                        user_ids,
+                        [
+                            scores[(model, tuple(sorted(params[model].items())))]
+                            for model in range(len(recommenders))
+                        ],
+                        weights,
+                        k,
+                        depth,
+                    )
+                )
+                for params in configurations
+            ]
+        )
+
+    # Media de cada métrica entre particiones
+    rows = []
+    for c, params in enumerate(configurations):
+        for w, weight in enumerate(weights):
+            metrics = pd.DataFrame([fold[c][w] for fold in results]).mean()
+            rows.append({"params": params, "weights": tuple(weight), **metrics})
+    return pd.DataFrame(rows)
+
+
+def _load_worker_state(state):
+    """
+    Inicializa un proceso creado sin fork con el estado compartido.
+
+    Parámetros:
+    state (dict): Clases de los recomendadores, películas, calificaciones de entrenamiento
+        y usuarios a puntuar.
+    """
+    global _worker_state
+    _worker_state = state
+
+
+def _score_base_model(base_model):
+    """
+    Entrena un recomendador base con la partición compartida y puntúa a sus usuarios.
+
+    Parámetros:
+    base_model (tuple): Posición del recomendador en la lista de clases y sus parámetros.
+
+    Devuelve:
+    numpy.ndarray: Matriz (usuarios x películas del catálogo) de puntuaciones escaladas a
+        [0, 1] como en HybridRecommender; NaN para las películas no puntuadas.
+    """
+    model, params = base_model
+    recommender = _worker_state["recommenders"][model](
+        _worker_state["movies"], _worker_state["train"], **dict(params)
+    )
+    return HybridRecommender._normalize(
+        recommender.score_many(_worker_state["user_ids"])
+    )
+
+
+def _weighted_recommendations(context, user_ids, scores, weights, top_n, depth):
+    """
+    Genera las recomendaciones del híbrido para cada combinación de pesos.
+
+    Parámetros:
+    context (HybridRecommender): Híbrido sin recomendadores base de la partición.
+    user_ids (numpy.ndarray): IDs de los usuarios evaluados.
+    scores (list): Puntuaciones normalizadas de cada recomendador base para los usuarios
+        conocidos de user_ids.
+    weights (numpy.ndarray): Matriz (combinaciones x recomendadores) de pesos.
+    top_n (int): Número de recomendaciones por usuario.
+    depth (int): Número de películas mejor puntuadas por recomendador que se combinan.
+
+    Devuelve:
+    generator: Matriz (usuarios x top_n) de IDs recomendados por combinación de pesos.
+    """
+    movie_ids = context.catalog_index.to_numpy()
+    user_rows = context._user_index.get_indexer(user_ids)
+    known = user_rows >= 0
+
+    # Películas ya calificadas por cada usuario conocido
+    rated_matrix = context._user_item[user_rows[known]]
+    rated = np.zeros((known.sum(), len(movie_ids)), dtype=bool)
+    rated[
+        np.repeat(np.arange(rated_matrix.shape[0]), np.diff(rated_matrix.indptr)),
+        rated_matrix.indices,
+    ] = True
+
+    # Como en HybridRecommender, las películas que no puntúa ningún recomendador base quedan
+    # fuera del ranking y completan las recomendaciones por popularidad
+    unscored = np.logical_and.reduce([np.isnan(score) for score in scores])
+    scores = [np.nan_to_num(score) for score in scores]
+    ranking = _WeightedRanking(scores, rated | unscored, top_n, depth)
+    candidates = unscored & ~rated
+
+    # Los usuarios nuevos reciben las películas más populares, sean cuales sean los pesos
+    popular = np.asarray(context.recommend_popular(top_n), dtype=np.int64)
+    recommendations = np.full((len(user_ids), top_n), -1, dtype=np.int64)
+    recommendations[np.ix_(~known, np.arange(len(popular)))] = popular
+    for weight in weights:
+        positions = ranking.top_positions(weight)
+        incomplete = np.flatnonzero((positions < 0).any(axis=1))
+        if len(incomplete):
+            positions[incomplete] = context._fill_popular(
+                positions[incomplete], candidates[incomplete]
+            )
+        recommendations[known] = np.where(
+            positions >= 0, movie_ids[np.maximum(positions, 0)], -1
+        )
+        yield recommendations.copy()
+
+
+class _WeightedRanking:
+    def __init__(self, scores, rated, top_n, depth):
+        """
+        Precalcula, para cada usuario, las películas mejor puntuadas por cada recomendador
+        base, que bastan para obtener el ranking de casi cualquier combinación de pesos.
+
+        Para unos pesos w, una película que no está entre las depth mejores de ningún
+        recomendador puntúa como mucho sum(w_b * t_b), donde t_b es la puntuación de la
+        película en la posición depth del recomendador b. Si la película en la posición top_n
+        de la combinación supera estrictamente esa cota, el ranking calculado solo con las
+        mejores películas es exacto. Los usuarios en los que no ocurre se resuelven con una
+        cabecera 8 veces más profunda y, si tampoco basta, con la fila completa.
+
+        Parámetros:
+        scores (list): Matrices (usuarios x películas) de puntuaciones normalizadas.
+        rated (numpy.ndarray): Matriz booleana de las películas excluidas del ranking (ya
+            calificadas o sin puntuación de ningún recomendador).
+        top_n (int): Número de recomendaciones por usuario.
+        depth (int): Número de películas mejor puntuadas por recomendador en la primera
+            cabecera.
+        """
+        self.scores = scores
+        self.rated = rated
+        self.top_n = top_n
+
+        # Las top_n primeras películas no calificadas por posición resuelven los empates a 0
+        # de los recomendadores con peso 0
+        unrated = ~rated
+        self.first = top_n_positions(
+            np.where(unrated, -np.cumsum(unrated, axis=1), -np.inf), top_n
+        )
+        self.levels = [self._head(depth), self._head(8 * depth)]
+
+    def _head(self, depth):
+        """
+        Construye una cabecera: la unión de las depth mejores películas de cada recomendador
+        y de las primeras por posición, con sus puntuaciones y las cotas del resto.
+
+        Parámetros:
+        depth (int): Número de películas mejor puntuadas por recomendador.
+
+        Devuelve:
+        dict: positions, padding, scores y thresholds de la cabecera, y complete (usuarios
+            cuya cabecera incluye todas las películas no calificadas).
+        """
+        n_users, n_movies = self.rated.shape
+        depth = max(min(depth, n_movies), self.top_n)
+        rows = np.arange(n_users)[:, None]
+
+        heads, thresholds = [self.first], []
+        for score in self.scores:
+            head = top_n_positions(np.where(self.rated, -np.inf, score), depth)
+            heads.append(head)
+            thresholds.append(score[rows[:, 0], np.maximum(head[:, -1], 0)])
+
+        # Unión ordenada por posición, para resolver los empates como HybridRecommender
+        union = np.sort(np.concatenate(heads, axis=1), axis=1)
+        padding = union < 0
+        padding[:, 1:] |= union[:, 1:] == union[:, :-1]
+        positions = np.maximum(union, 0)
+        return {
+            "positions": positions,
+            "padding": padding,
+            "scores": [score[rows, positions] for score in self.scores],
+            "thresholds": thresholds,
+            "complete": (~self.rated).sum(axis=1) <= depth,
+        }
+
+    def top_positions(self, weights):
+        """
+        Calcula las top_n películas de cada usuario para una combinación de pesos.
+
+        Parámetros:
+        weights (numpy.ndarray): Peso de cada recomendador base.
+
+        Devuelve:
+        numpy.ndarray: Matriz (usuarios x top_n) de posiciones en el catálogo; -1 donde no hay
+            recomendación.
+        """
+        positions = np.full((len(self.rated), self.top_n), -1, dtype=np.int64)
+        pending = np.arange(len(self.rated))
+        for level in self.levels:
+            if len(pending) == 0:
+                return positions
+            top, exact = self._rank_head(level, weights, pending)
+            positions[pending[exact]] = top[exact]
+            pending = pending[~exact]
+
+        # Fila completa para los usuarios que ninguna cabecera resuelve
+        if len(pending):
+            full = np.zeros((len(pending), self.rated.shape[1]))
+            for weight, score in zip(weights, self.scores):
+                full += weight * score[pending]
+            full[self.rated[pending]] = -np.inf
+            positions[pending] = top_n_positions(full, self.top_n)
+        return positions
+
+    def _rank_head(self, level, weights, rows):
+        """
+        Calcula las top_n películas de algunos usuarios dentro de una cabecera.
+
+        Parámetros:
+        level (dict): Cabecera construida por _head.
+        weights (numpy.ndarray): Peso de cada recomendador base.
+        rows (numpy.ndarray): Usuarios a resolver.
+
+        Devuelve:
+        tuple: Posiciones en el catálogo (usuarios x top_n) y máscara de los usuarios cuyo
+            resultado es exacto.
+        """
+        # Las sumas se acumulan en el mismo orden que HybridRecommender, para obtener
+        # exactamente las mismas puntuaciones
+        combined = np.zeros((len(rows), level["positions"].shape[1]))
+        bound = np.zeros(len(rows))
+        for weight, head_scores, threshold in zip(
+            weights, level["scores"], level["thresholds"]
+        ):
+            combined += weight * head_scores[rows]
+            bound += weight * threshold[rows]
+        combined[level["padding"][rows]] = -np.inf
+
+        top = top_n_positions(combined, self.top_n)
+        positions = np.full((len(rows), self.top_n), -1, dtype=np.int64)
+        positions[:, : top.shape[1]] = np.where(
+            top >= 0,
+            np.take_along_axis(level["positions"][rows], np.maximum(top, 0), axis=1),
+            -1,
+        )
+
+        # Exacto si la película en la posición top_n supera la cota del resto, o si la cota
+        # es 0: el resto puntúa 0 y las primeras películas por posición ya están en la unión
+        kth = np.take_along_axis(combined, np.maximum(top[:, -1:], 0), axis=1)[:, 0]
+        exact = level["complete"][rows] | (kth > bound) | (bound == 0)
+        return positions, exact
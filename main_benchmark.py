@@ -0,0 +1,113 @@
+# main_benchmark.py
+
+import argparse
+import json
+import sys
+from benchmarks.benchmark import RECOMMENDERS, run_benchmarks, compare_results
+
+
+def main():
+    """
+    Función principal que mide el rendimiento de los recomendadores sin interfaz gráfica.
+
+    Con el subcomando run se miden los recomendadores y los resultados se guardan en JSON;
+    con compare se comparan dos archivos de resultados y el proceso termina con código 1 si
+    alguna métrica empeora más que el umbral, para detectar regresiones en scripts.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark de construcción, latencia y rendimiento de los recomendadores."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Mide los recomendadores.")
+    run_parser.add_argument(
+        "--output", default="benchmark_results.json", help="Archivo JSON de resultados."
+    )
+    run_parser.add_argument(
+        "--recommenders",
+        nargs="+",
+        choices=list(RECOMMENDERS),
+        help="Recomendadores medidos (por defecto, todos).",
+    )
+    run_parser.add_argument("--data-dir", default="data")
+    run_parser.add_argument(
+        "--scales",
+        nargs="*",
+        type=float,
+        default=[10, 100],
+        help="Escalas de los conjuntos sintéticos respecto a los datos incluidos.",
+    )
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--queries", type=int, default=200)
+    run_parser.add_argument("--batch-users", type=int, default=1000)
+    run_parser.add_argument("--top-n", type=int, default=10)
+    run_parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Rondas de latencia y rendimiento; se conserva la mejor.",
+    )
+    run_parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="No mide la memoria (evita la segunda construcción con tracemalloc).",
+    )
+    run_parser.add_argument(
+        "--streamed",
+        action="store_true",
+        help="Construye los recomendadores con StreamedRatings.",
+    )
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="Compara dos archivos de resultados."
+    )
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Empeoramiento relativo tolerado (0.2 = 20 %%).",
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        # Medir los recomendadores con los datos incluidos y los sintéticos
+        results = run_benchmarks(
+            recommenders=args.recommenders,
+            data_dir=args.data_dir,
+            scales=args.scales,
+            seed=args.seed,
+            streamed=args.streamed,
+            n_queries=args.queries,
+            n_batch=args.batch_users,
+            top_n=args.top_n,
+            repeat=args.repeat,
+            memory=not args.no_memory,
+        )
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Resultados guardados en {args.output}")
+        return 0
+
+    # Comparar los resultados y señalar las métricas que empeoran
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+    comparison = compare_results(baseline, current, args.threshold)
+    if comparison.empty:
+        print("No hay resultados comparables entre los dos archivos.")
+        return 0
+    print(comparison.to_string(index=False, float_format=lambda value: f"{value:.3g}"))
+    regressions = comparison[comparison["regression"]]
+    if regressions.empty:
+        print("Sin regresiones.")
+        return 0
+    print(f"{len(regressions)} métricas empeoran más de un {args.threshold:.0%}.")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
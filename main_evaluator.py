@@ -5,6 +5,7 @@ from recommenders.content_based_recommender import ContentBasedRecommender
 from recommenders.collaborative_filtering import CollaborativeFilteringRecommender
 from recommenders.sequential_recommender import SequentialRecommender
 from recommenders.hybrid_recommender import HybridRecommender
+from recommenders.recommender_base import load_or_build
 from evaluation.evaluation import Evaluator
 from evaluation.evaluation_gui import EvaluationGUI
 import sys
@@ -16,7 +17,13 @@ def main():
     Función principal que carga los datos, inicializa los recomendadores y la interfaz gráfica para evaluar las recomendaciones.
     """
     # Cargar y preparar los datos
-    data_loader = DataLoader("data/ratings.csv", "data/movies.csv", "data/tags.csv")
+    data_loader = DataLoader(
+        "data/ratings.csv",
+        "data/movies.csv",
+        "data/tags.csv",
+        aggregate_tags=True,
+        cache_dir="cache",
+    )
     ratings, movies = data_loader.load_data()
 
     # Inicializar los recomendadores
@@ -26,10 +33,19 @@ def main():
         SequentialRecommender,
     ]
 
-    # Crear el recomendador híbrido utilizando los recomendadores base
-    hybrid_recommender = HybridRecommender(recommenders, movies, ratings)
-
-    # Inicializar el evaluador con el recomendador híbrido
+    # Crear el recomendador híbrido utilizando los recomendadores base, o cargarlo de
+    # models/ si ya se entrenó con los mismos recomendadores y archivos de datos
+    hybrid_recommender = load_or_build(
+        "models/hybrid",
+        HybridRecommender,
+        recommenders,
+        movies,
+        ratings,
+        sources=["data/ratings.csv", "data/movies.csv", "data/tags.csv"],
+    )
+
+    # Inicializar el evaluador con el recomendador híbrido. Se evalúa en serie: la evaluación
+    # tarda alrededor de un segundo, menos de lo que cuesta crear los procesos con spawn
     evaluator = Evaluator(hybrid_recommender, ratings, k=10)
 
     # Inicializar la aplicación Qt para la interfaz de evaluación
@@ -5,6 +5,7 @@ from recommenders.content_based_recommender import ContentBasedRecommender
 from recommenders.collaborative_filtering import CollaborativeFilteringRecommender
 from recommenders.sequential_recommender import SequentialRecommender
 from recommenders.hybrid_recommender import HybridRecommender
+from recommenders.recommender_base import load_or_build
 from gui import RecommenderGUI
 import sys
 from PyQt5.QtWidgets import QApplication
@@ -15,7 +16,13 @@ def main():
     Función principal que carga los datos, inicializa los recomendadores y la interfaz gráfica para las recomendaciones.
     """
     # Cargar y preparar los datos
-    data_loader = DataLoader("data/ratings.csv", "data/movies.csv", "data/tags.csv")
+    data_loader = DataLoader(
+        "data/ratings.csv",
+        "data/movies.csv",
+        "data/tags.csv",
+        aggregate_tags=True,
+        cache_dir="cache",
+    )
     ratings, movies = data_loader.load_data()
 
     # Inicializar los recomendadores
@@ -25,8 +32,16 @@ def main():
         SequentialRecommender,
     ]
 
-    # Crear el recomendador híbrido utilizando los recomendadores base
-    hybrid_recommender = HybridRecommender(recommenders, movies, ratings)
+    # Crear el recomendador híbrido utilizando los recomendadores base, o cargarlo de
+    # models/ si ya se entrenó con los mismos recomendadores y archivos de datos
+    hybrid_recommender = load_or_build(
+        "models/hybrid",
+        HybridRecommender,
+        recommenders,
+        movies,
+        ratings,
+        sources=["data/ratings.csv", "data/movies.csv", "data/tags.csv"],
+    )
 
     # Inicializar la aplicación Qt para la interfaz de recomendaciones
     app = QApplication(sys.argv)
@@ -0,0 +1,197 @@
+from recommenders.recommender_base import top_n_positions
+from sklearn.cluster import MiniBatchKMeans
+from scipy import sparse
+import numpy as np
+
+
+def _dense_dot(a, b):
+    """
+    Calcula a @ b.T como matriz densa, tanto para matrices densas como dispersas.
+
+    Parámetros:
+    a (numpy.ndarray o scipy.sparse matrix): Matriz (filas x dimensiones).
+    b (numpy.ndarray o scipy.sparse matrix): Matriz (columnas x dimensiones).
+
+    Devuelve:
+    numpy.ndarray: Matriz densa (filas x columnas) de productos escalares.
+    """
+    product = a @ b.T
+    if sparse.issparse(product):
+        return product.toarray()
+    return np.asarray(product)
+
+
+class IVFIndex:
+    def __init__(self, n_lists=None, n_probe=8, exact=False, random_state=42):
+        """
+        Índice aproximado de vecinos más cercanos por producto escalar (IVF).
+
+        Los vectores se reparten con k-means en n_lists particiones; una consulta solo puntúa
+        los vectores de las n_probe particiones cuyos centroides tienen mayor producto escalar
+        con ella, por lo que el coste crece con n_probe / n_lists del catálogo.
+
+        Parámetros:
+        n_lists (int, opcional): Número de particiones. Si es None, se usa la raíz cuadrada del
+            número de vectores.
+        n_probe (int): Número de particiones visitadas por consulta. Más particiones dan más
+            recall a cambio de más latencia; con n_probe >= n_lists la búsqueda es exacta.
+        exact (bool): Si es True, la búsqueda recorre todos los vectores (útil para validar
+            el recall del índice).
+        random_state (int): Semilla de k-means.
+        """
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.exact = exact
+        self.random_state = random_state
+
+    def fit(self, vectors, block_size=1024):
+        """
+        Particiona los vectores con k-means y construye las listas invertidas.
+
+        Parámetros:
+        vectors (numpy.ndarray o scipy.sparse matrix): Vectores indexados, uno por fila.
+        block_size (int): Número de consultas puntuadas por bloque en la búsqueda exacta.
+
+        Devuelve:
+        IVFIndex: El propio índice.
+        """
+        self.vectors = vectors.tocsr() if sparse.issparse(vectors) else vectors
+        self.block_size = block_size
+        n_vectors = vectors.shape[0]
+        n_lists = self.n_lists or max(int(np.sqrt(n_vectors)), 1)
+        n_lists = min(n_lists, n_vectors)
+
+        kmeans = MiniBatchKMeans(
+            n_clusters=n_lists, random_state=self.random_state, n_init=3
+        )
+        labels = kmeans.fit_predict(self.vectors)
+        self.centroids = kmeans.cluster_centers_
+
+        # Listas invertidas: posiciones de los vectores ordenadas por partición
+        self.list_items = np.argsort(labels, kind="stable")
+        self.list_offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(labels, minlength=n_lists))]
+        )
+
+        # Copia de los vectores en el orden de las listas, para leer cada partición como un
+        # bloque contiguo de filas
+        self.list_vectors = self.vectors[self.list_items]
+        return self
+
+    def search(self, queries, k, n_probe=None):
+        """
+        Busca los k vectores con mayor producto escalar con cada consulta.
+
+        Parámetros:
+        queries (numpy.ndarray o scipy.sparse matrix): Consultas, una por fila.
+        k (int): Número de vecinos por consulta.
+        n_probe (int, opcional): Particiones visitadas por consulta; por defecto, self.n_probe.
+
+        Devuelve:
+        tuple: Matrices (consultas x k) con las posiciones de los vectores, ordenadas de mayor
+            a menor producto escalar (-1 si no hay vecino), y con sus productos escalares
+            (-inf si no hay vecino).
+        """
+        if self.exact:
+            return self._search_exact(queries, k)
+
+        n_queries = queries.shape[0]
+        n_lists = len(self.centroids)
+        n_probe = min(n_probe or self.n_probe, n_lists)
+
+        # Particiones visitadas por cada consulta
+        probes = top_n_positions(_dense_dot(queries, self.centroids), n_probe)
+        if n_queries * n_probe < n_lists:
+            return self._search_probes(queries, probes, k)
+
+        query_rows = np.repeat(np.arange(n_queries), n_probe)
+        probed_lists = probes.ravel()
+        order = np.argsort(probed_lists, kind="stable")
+        query_rows, probed_lists = query_rows[order], probed_lists[order]
+        bounds = np.searchsorted(probed_lists, np.arange(n_lists + 1))
+
+        # Puntúa cada partición contra todas las consultas que la visitan a la vez
+        candidate_rows, candidate_items, candidate_scores = [], [], []
+        for list_id in range(n_lists):
+            rows = query_rows[bounds[list_id] : bounds[list_id + 1]]
+            start, end = self.list_offsets[list_id], self.list_offsets[list_id + 1]
+            if len(rows) == 0 or start == end:
+                continue
+            members = self.list_items[start:end]
+            scores = _dense_dot(queries[rows], self.list_vectors[start:end])
+            top = top_n_positions(scores, k)
+            candidate_rows.append(np.repeat(rows, top.shape[1]))
+            candidate_items.append(members[top].ravel())
+            candidate_scores.append(np.take_along_axis(scores, top, axis=1).ravel())
+
+        positions = np.full((n_queries, k), -1, dtype=np.int64)
+        distances = np.full((n_queries, k), -np.inf)
+        if not candidate_rows:
+            return positions, distances
+
+        # Une los candidatos de todas las particiones y conserva los k mejores por consulta
+        rows = np.concatenate(candidate_rows)
+        items = np.concatenate(candidate_items)
+        scores = np.concatenate(candidate_scores)
+        order = np.lexsort((items, -scores, rows))
+        rows, items, scores = rows[order], items[order], scores[order]
+        ranks = np.arange(len(rows)) - np.searchsorted(rows, rows)
+        kept = ranks < k
+        positions[rows[kept], ranks[kept]] = items[kept]
+        distances[rows[kept], ranks[kept]] = scores[kept]
+        return positions, distances
+
+    def _search_probes(self, queries, probes, k):
+        """
+        Busca los vecinos consulta a consulta, puntuando de una vez todas sus particiones.
+
+        Es más rápido que recorrer las particiones cuando hay pocas consultas.
+
+        Parámetros:
+        queries (numpy.ndarray o scipy.sparse matrix): Consultas, una por fila.
+        probes (numpy.ndarray): Particiones visitadas por cada consulta.
+        k (int): Número de vecinos por consulta.
+
+        Devuelve:
+        tuple: Posiciones y productos escalares, con el mismo formato que search.
+        """
+        n_queries = queries.shape[0]
+        positions = np.full((n_queries, k), -1, dtype=np.int64)
+        distances = np.full((n_queries, k), -np.inf)
+        for row in range(n_queries):
+            # Filas contiguas de las particiones visitadas, en orden de lista
+            lists = np.sort(probes[row])
+            starts = self.list_offsets[lists]
+            lengths = self.list_offsets[lists + 1] - starts
+            members = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + (
+                np.arange(lengths.sum())
+            )
+            scores = _dense_dot(queries[row : row + 1], self.list_vectors[members])[0]
+            top = top_n_positions(scores, k)
+            positions[row, : len(top)] = self.list_items[members[top]]
+            distances[row, : len(top)] = scores[top]
+        return positions, distances
+
+    def _search_exact(self, queries, k):
+        """
+        Busca los k vecinos de cada consulta recorriendo todos los vectores por bloques.
+
+        Parámetros:
+        queries (numpy.ndarray o scipy.sparse matrix): Consultas, una por fila.
+        k (int): Número de vecinos por consulta.
+
+        Devuelve:
+        tuple: Posiciones y productos escalares, con el mismo formato que search.
+        """
+        n_queries = queries.shape[0]
+        positions = np.full((n_queries, k), -1, dtype=np.int64)
+        distances = np.full((n_queries, k), -np.inf)
+        for start in range(0, n_queries, self.block_size):
+            end = min(start + self.block_size, n_queries)
+            scores = _dense_dot(queries[start:end], self.vectors)
+            top = top_n_positions(scores, k)
+            positions[start:end, : top.shape[1]] = top
+            distances[start:end, : top.shape[1]] = np.take_along_axis(
+                scores, top, axis=1
+            )
+        return positions, distances
@@ -1,34 +1,94 @@
-from recommenders.recommender_base import Recommender
-from sklearn.metrics.pairwise import cosine_similarity
+from recommenders.recommender_base import (
+    Recommender,
+    build_user_item_matrix,
+    ratings_delta,
+    top_n_positions,
+)
+from scipy import sparse
+import numpy as np
 import pandas as pd
 
 
 class CollaborativeFilteringRecommender(Recommender):
-    def __init__(self, movies, ratings):
+    def __init__(
+        self, movies, ratings, n_neighbors=50, block_size=1024, drift_threshold=0.1
+    ):
         """
         Inicializa el recomendador de filtrado colaborativo con los datos de películas y calificaciones.
 
         Parámetros:
         movies (DataFrame): Datos de las películas.
         ratings (DataFrame): Datos de las calificaciones de los usuarios para las películas.
+        n_neighbors (int): Número de usuarios más similares que se conservan por usuario.
+        block_size (int): Número de usuarios procesados por bloque al calcular las similitudes.
+        drift_threshold (float): Fracción de calificaciones modificadas de forma incremental,
+            respecto a las del último cálculo completo, a partir de la cual se recalcula todo.
         """
         # Inicializa la clase base con los datos de películas y calificaciones
         super().__init__(movies, ratings)
+        self.n_neighbors = n_neighbors
+        self.block_size = block_size
+        self.drift_threshold = drift_threshold
 
-        # Crea una matriz usuario-item donde las filas son usuarios, las columnas son películas y los valores son calificaciones
-        self.user_item_matrix = ratings.pivot_table(
-            index="userId", columns="movieId", values="rating"
+        # Crea la matriz dispersa usuario-item y las listas de vecinos de cada usuario
+        self._fit()
+
+    def _fit(self):
+        """
+        Construye la matriz dispersa usuario-item y las listas de vecinos más similares.
+        """
+        # Matriz CSR donde las filas son usuarios, las columnas son películas y los valores son calificaciones
+        self.user_index, self.movie_index, self.user_item_matrix = (
+            build_user_item_matrix(self.ratings)
         )
 
-        # Calcula la matriz de similitud entre usuarios utilizando similitud coseno, rellenando los valores faltantes con 0
-        self.user_sim_matrix = cosine_similarity(self.user_item_matrix.fillna(0))
+        self._movie_ids = self.movie_index.to_numpy()
+        self._norms = sparse.linalg.norm(self.user_item_matrix, axis=1)
 
-        # Convierte la matriz de similitud en un DataFrame para un acceso fácil
-        self.user_sim_df = pd.DataFrame(
-            self.user_sim_matrix,
-            index=self.user_item_matrix.index,
-            columns=self.user_item_matrix.index,
-        )
+        # Calcula los vecinos más similares de cada usuario utilizando similitud coseno
+        self.neighbors, self.neighbor_sims = self._compute_neighbors()
+
+        # Calificaciones actualizadas de forma incremental desde este cálculo completo
+        self._fitted_ratings = self.user_item_matrix.nnz
+        self._drift = 0
+
+    def _compute_neighbors(self):
+        """
+        Calcula por bloques los n_neighbors usuarios más similares a cada usuario.
+
+        La similitud coseno se calcula para block_size usuarios a la vez, por lo que la memoria
+        crece con el número de calificaciones y no con el cuadrado del número de usuarios.
+
+        Devuelve:
+        tuple: Matrices (usuarios x n_neighbors) con las posiciones de los vecinos, ordenados por
+            similitud descendente (-1 si no hay vecino), y con sus similitudes.
+        """
+        n_users = self.user_item_matrix.shape[0]
+        k = min(self.n_neighbors, max(n_users - 1, 0))
+
+        # Normaliza las filas para que el producto escalar sea la similitud coseno
+        norms = np.where(self._norms > 0, self._norms, 1)
+        normalized = sparse.diags(1 / norms) @ self.user_item_matrix
+        normalized_t = normalized.T.tocsc()
+
+        neighbors = np.full((n_users, k), -1, dtype=np.int32)
+        neighbor_sims = np.zeros((n_users, k), dtype=np.float32)
+        for start in range(0, n_users, self.block_size):
+            end = min(start + self.block_size, n_users)
+            block_sims = (normalized[start:end] @ normalized_t).toarray()
+
+            # Excluye al propio usuario y a los usuarios sin similitud
+            block_sims[np.arange(end - start), np.arange(start, end)] = -np.inf
+            block_sims[block_sims <= 0] = -np.inf
+
+            block_neighbors = top_n_positions(block_sims, k)
+            neighbors[start:end] = block_neighbors
+            neighbor_sims[start:end] = np.where(
+                block_neighbors >= 0,
+                np.take_along_axis(block_sims, block_neighbors, axis=1),
+                0,
+            )
+        return neighbors, neighbor_sims
 
     def recommend(self, user_id, top_n=10):
         """
@@ -36,70 +96,298 @@ class CollaborativeFilteringRecommender(Recommender):
 
         Parámetros:
         user_id (int): ID del usuario para el que se harán las recomendaciones.
-        top_n (int): Número de películas a recomendar.
+        top_n (int): Número de películas a recomendar. También es el número de vecinos
+            utilizados, limitado por n_neighbors.
 
         Devuelve:
         numpy.ndarray: IDs de las películas recomendadas.
         """
-        # Si el ID del usuario no está en el DataFrame de similitud, devuelve una lista vacía
-        if user_id not in self.user_sim_df.index:
+        # Si el ID del usuario no está en la matriz usuario-item, devuelve una lista vacía
+        user_row = self.user_index.get_indexer([user_id])[0]
+        if user_row < 0:
             return []
 
-        # Obtén los usuarios similares al usuario dado, ordenados por similitud en orden descendente
-        # Omite la primera entrada ya que será el propio usuario (similitud de 1)
-        sim_users = self.user_sim_df[user_id].sort_values(ascending=False)[1:]
-
-        # Obtén los N usuarios más similares
-        top_users = sim_users.index[:top_n]
-
-        # Obtén las calificaciones de los usuarios más similares para todas las películas
-        top_users_ratings = self.user_item_matrix.loc[top_users]
-
-        # Calcula la calificación ponderada para cada película entre los usuarios más similares
-        # Multiplica las calificaciones de cada usuario por su similitud con el usuario objetivo
-        weighted_ratings = top_users_ratings.mul(sim_users[top_users], axis=0)
-        # Calcula la media ponderada dividiendo la suma de las calificaciones ponderadas por la suma de las similitudes
-        mean_ratings = weighted_ratings.sum(axis=0) / sim_users[top_users].sum()
-
-        # Obtén la lista de películas que el usuario ya ha calificado
-        user_rated_movies = self.user_item_matrix.loc[user_id].dropna().index
-
-        # Filtra las películas que el usuario ya ha calificado y ordena las películas restantes por calificación media
-        recommendations = (
-            mean_ratings.drop(
-                user_rated_movies
-            )  # Elimina las películas ya calificadas por el usuario
-            .sort_values(
-                ascending=False
-            )  # Ordena las películas por calificación media en orden descendente
-            .head(top_n)  # Selecciona las top_n películas con mayor calificación
+        # Obtén los N usuarios más similares; las listas de vecinos ya están ordenadas por similitud,
+        # por lo que la selección es un corte y no requiere ordenar a todos los usuarios
+        top_users = self.neighbors[user_row, :top_n]
+        top_sims = self.neighbor_sims[user_row, :top_n][top_users >= 0]
+        top_users = top_users[top_users >= 0]
+
+        # Obtén directamente de la matriz CSR las calificaciones de los usuarios más similares
+        indptr = self.user_item_matrix.indptr
+        starts = indptr[top_users]
+        lengths = indptr[top_users + 1] - starts
+        positions = np.repeat(
+            starts - np.cumsum(lengths) + lengths, lengths
+        ) + np.arange(lengths.sum())
+
+        # Calcula la media ponderada de las calificaciones por la similitud con el usuario objetivo
+        n_movies = self.user_item_matrix.shape[1]
+        movie_columns = self.user_item_matrix.indices[positions]
+        # Sin vecinos, bincount devuelve enteros; las puntuaciones tienen que admitir -inf
+        mean_ratings = np.asarray(
+            np.bincount(
+                movie_columns,
+                weights=np.repeat(top_sims, lengths)
+                * self.user_item_matrix.data[positions],
+                minlength=n_movies,
+            ),
+            dtype=float,
+        )
+        if top_sims.sum() > 0:
+            mean_ratings /= top_sims.sum()
+
+        # Las películas que ningún vecino con similitud no nula ha calificado no tienen puntuación
+        support = np.bincount(
+            movie_columns, weights=np.repeat(top_sims != 0, lengths), minlength=n_movies
+        )
+        mean_ratings[(support == 0) | (top_sims.sum() == 0)] = -np.inf
+
+        # Excluye las películas que el usuario ya ha calificado
+        user_rated_movies = self.user_item_matrix.indices[
+            indptr[user_row] : indptr[user_row + 1]
+        ]
+        mean_ratings[user_rated_movies] = -np.inf
+
+        # Selecciona las top_n películas con mayor calificación media sin ordenar todo el catálogo
+        movie_indices = top_n_positions(mean_ratings, top_n)
+        return self._movie_ids[movie_indices[movie_indices >= 0]]
+
+    def recommend_many(self, user_ids, top_n=10, batch_size=256):
+        """
+        Recomienda películas a varios usuarios agregando las calificaciones de sus vecinos de forma matricial.
+
+        Parámetros:
+        user_ids (array-like): IDs de los usuarios para los que se harán las recomendaciones.
+        top_n (int): Número de películas a recomendar por usuario.
+        batch_size (int): Número de usuarios puntuados en cada bloque.
+
+        Devuelve:
+        numpy.ndarray: Matriz (usuarios x top_n) con los IDs recomendados; -1 donde no hay recomendación.
+        """
+        recommendations = np.full((len(user_ids), top_n), -1, dtype=np.int64)
+        user_rows = self.user_index.get_indexer(user_ids)
+        known_users = np.flatnonzero(user_rows >= 0)
+
+        for start in range(0, len(known_users), batch_size):
+            block = known_users[start : start + batch_size]
+            mean_ratings = self._neighbor_scores(user_rows[block], top_n)
+            movie_indices = top_n_positions(mean_ratings, top_n)
+            recommendations[block, : movie_indices.shape[1]] = np.where(
+                movie_indices >= 0, self._movie_ids[movie_indices], -1
+            )
+        return recommendations
+
+    def score_many(self, user_ids, batch_size=256):
+        """
+        Puntúa todas las películas del catálogo para varios usuarios con la media ponderada de
+        las calificaciones de sus n_neighbors vecinos.
+
+        Parámetros:
+        user_ids (array-like): IDs de los usuarios.
+        batch_size (int): Número de usuarios puntuados en cada bloque.
+
+        Devuelve:
+        numpy.ndarray: Matriz (usuarios x películas del catálogo); NaN para las películas ya
+            calificadas, las que ningún vecino ha calificado, las que no están en las
+            calificaciones y los usuarios desconocidos.
+        """
+        scores = np.full((len(user_ids), len(self.catalog_index)), np.nan)
+        user_rows = self.user_index.get_indexer(user_ids)
+        known_users = np.flatnonzero(user_rows >= 0)
+
+        # Posiciones en el catálogo de las columnas de la matriz usuario-item
+        catalog_positions = self.catalog_index.get_indexer(self._movie_ids)
+        in_catalog = catalog_positions >= 0
+
+        for start in range(0, len(known_users), batch_size):
+            block = known_users[start : start + batch_size]
+            mean_ratings = self._neighbor_scores(user_rows[block], self.n_neighbors)
+            mean_ratings[np.isneginf(mean_ratings)] = np.nan
+            scores[np.ix_(block, catalog_positions[in_catalog])] = mean_ratings[
+                :, in_catalog
+            ]
+        return scores
+
+    def _neighbor_scores(self, rows, n_neighbors):
+        """
+        Calcula la media de las calificaciones de los vecinos ponderada por su similitud.
+
+        Parámetros:
+        rows (numpy.ndarray): Posiciones de los usuarios en la matriz usuario-item.
+        n_neighbors (int): Número de vecinos utilizados por usuario.
+
+        Devuelve:
+        numpy.ndarray: Matriz (usuarios x películas) con las medias; -inf para las películas
+            ya calificadas por cada usuario y para las que no tienen puntuación, porque ningún
+            vecino con similitud no nula las ha calificado o las similitudes suman 0.
+        """
+        # Matriz dispersa de pesos con las similitudes de los vecinos de cada usuario
+        neighbors = self.neighbors[rows, :n_neighbors]
+        valid = neighbors >= 0
+        weights = sparse.csr_matrix(
+            (
+                self.neighbor_sims[rows, :n_neighbors][valid],
+                (np.nonzero(valid)[0], neighbors[valid]),
+            ),
+            shape=(len(rows), self.user_item_matrix.shape[0]),
+        )
+
+        # Media ponderada de las calificaciones de los vecinos
+        mean_ratings = (weights @ self.user_item_matrix).toarray()
+        weight_sums = np.asarray(weights.sum(axis=1))
+        mean_ratings /= np.where(weight_sums > 0, weight_sums, 1)
+
+        # Número de vecinos con similitud no nula que han calificado cada película
+        rated_by = sparse.csr_matrix(
+            (
+                np.ones_like(self.user_item_matrix.data),
+                self.user_item_matrix.indices,
+                self.user_item_matrix.indptr,
+            ),
+            shape=self.user_item_matrix.shape,
         )
+        support = (abs(weights) @ rated_by).toarray()
+        mean_ratings[(support == 0) | (weight_sums == 0)] = -np.inf
 
-        # Devuelve los IDs de las películas recomendadas
-        return recommendations.index.values
+        # Excluir las películas ya calificadas por cada usuario
+        rated = self.user_item_matrix[rows]
+        rated_users = np.repeat(np.arange(len(rows)), np.diff(rated.indptr))
+        mean_ratings[rated_users, rated.indices] = -np.inf
+        return mean_ratings
 
     def update_data(self, ratings):
         """
-        Actualiza los datos de calificaciones y recalcula la matriz de similitud entre usuarios.
+        Actualiza los datos de calificaciones y recalcula los vecinos de cada usuario.
+
+        Si los nuevos datos solo añaden o modifican calificaciones, se actualizan únicamente los
+        usuarios afectados; si se eliminan calificaciones o se supera drift_threshold, se
+        recalcula todo.
 
         Parámetros:
         ratings (DataFrame): Datos de las calificaciones de los usuarios para las películas.
         """
+        delta = ratings_delta(self.ratings, ratings)
+
         # Actualiza las calificaciones almacenadas con los nuevos datos
         self.ratings = ratings
+        self._apply_delta(delta)
+
+    def update_ratings(self, new_ratings):
+        """
+        Añade calificaciones nuevas o modificadas y actualiza solo los usuarios afectados.
+
+        Parámetros:
+        new_ratings (DataFrame): Calificaciones nuevas o modificadas (userId, movieId, rating).
+        """
+        previous = self.ratings
+        if not isinstance(previous, pd.DataFrame):
+            previous = previous.to_frame()
+        self.ratings = pd.concat([previous, new_ratings], ignore_index=True)
+        self._apply_delta(new_ratings)
+
+    def _apply_delta(self, delta):
+        """
+        Aplica un conjunto de calificaciones nuevas o modificadas a la matriz usuario-item y a
+        las listas de vecinos, o recalcula todo si el cambio acumulado es demasiado grande.
+
+        Parámetros:
+        delta (DataFrame): Calificaciones nuevas o modificadas, o None para recalcular todo.
+        """
+        if delta is not None:
+            delta = delta.drop_duplicates(subset=["userId", "movieId"], keep="last")
+        if delta is None or (
+            self._drift + len(delta) > self.drift_threshold * self._fitted_ratings
+        ):
+            self._fit()
+            return
+        if delta.empty:
+            return
+        self._drift += len(delta)
+
+        # Añade al final de los índices los usuarios y películas nuevos
+        self.user_index = self.user_index.append(
+            pd.Index(delta["userId"].unique()).difference(self.user_index)
+        )
+        self.movie_index = self.movie_index.append(
+            pd.Index(delta["movieId"].unique()).difference(self.movie_index)
+        )
+        self._movie_ids = self.movie_index.to_numpy()
+        n_users, n_movies = len(self.user_index), len(self.movie_index)
+        user_codes = self.user_index.get_indexer(delta["userId"].to_numpy())
+        movie_codes = self.movie_index.get_indexer(delta["movieId"].to_numpy())
 
-        # Recrea la matriz usuario-item con las calificaciones actualizadas
-        self.user_item_matrix = ratings.pivot_table(
-            index="userId", columns="movieId", values="rating"
+        # Sustituye en la matriz usuario-item las entradas modificadas por las nuevas
+        previous = self.user_item_matrix.tocoo()
+        replaced = np.isin(
+            previous.row.astype(np.int64) * n_movies + previous.col,
+            user_codes.astype(np.int64) * n_movies + movie_codes,
+        )
+        self.user_item_matrix = sparse.csr_matrix(
+            (
+                np.concatenate(
+                    [previous.data[~replaced], delta["rating"].to_numpy(dtype=float)]
+                ),
+                (
+                    np.concatenate([previous.row[~replaced], user_codes]),
+                    np.concatenate([previous.col[~replaced], movie_codes]),
+                ),
+            ),
+            shape=(n_users, n_movies),
         )
 
-        # Recalcula la matriz de similitud entre usuarios con la matriz usuario-item actualizada
-        # Rellena los valores faltantes con 0 antes de calcular la similitud
-        self.user_sim_matrix = cosine_similarity(self.user_item_matrix.fillna(0))
+        # Recalcula la norma de los usuarios afectados
+        affected = np.unique(user_codes)
+        affected_ratings = self.user_item_matrix[affected]
+        norms = np.zeros(n_users)
+        norms[: len(self._norms)] = self._norms
+        norms[affected] = sparse.linalg.norm(affected_ratings, axis=1)
+        self._norms = norms
+
+        # Similitud coseno de los usuarios afectados con todos los usuarios
+        safe_norms = np.where(norms > 0, norms, 1)
+        affected_sims = (affected_ratings @ self.user_item_matrix.T).toarray()
+        affected_sims /= safe_norms[affected, None] * safe_norms[None, :]
+        affected_sims[np.arange(len(affected)), affected] = -np.inf
+        affected_sims[affected_sims <= 0] = -np.inf
+
+        # Amplía las listas de vecinos con filas vacías para los usuarios nuevos
+        k = self.neighbors.shape[1]
+        neighbors = np.full((n_users, k), -1, dtype=np.int32)
+        neighbors[: len(self.neighbors)] = self.neighbors
+        neighbor_sims = np.full((n_users, k), -np.inf)
+        neighbor_sims[: len(self.neighbor_sims)] = np.where(
+            self.neighbors >= 0, self.neighbor_sims, -np.inf
+        )
 
-        # Convierte la matriz de similitud actualizada en un DataFrame para un acceso fácil
-        self.user_sim_df = pd.DataFrame(
-            self.user_sim_matrix,
-            index=self.user_item_matrix.index,
-            columns=self.user_item_matrix.index,
+        # Los vecinos afectados se sustituyen por su nueva similitud como candidatos
+        stale = np.isin(neighbors, affected)
+        neighbors[stale] = -1
+        neighbor_sims[stale] = -np.inf
+        candidates = np.hstack(
+            [
+                neighbors,
+                np.broadcast_to(affected.astype(np.int32), (n_users, len(affected))),
+            ]
+        )
+        candidate_sims = np.hstack([neighbor_sims, affected_sims.T])
+
+        # Para los usuarios afectados, sus vecinos se recalculan contra todos los usuarios
+        candidates[affected] = -1
+        candidate_sims[affected] = -np.inf
+        affected_neighbors = top_n_positions(affected_sims, k)
+
+        best = top_n_positions(candidate_sims, k)
+        valid = best >= 0
+        best_neighbors = np.where(
+            valid, np.take_along_axis(candidates, best, axis=1), -1
+        )
+        best_sims = np.where(valid, np.take_along_axis(candidate_sims, best, axis=1), 0)
+        best_neighbors[affected] = affected_neighbors
+        best_sims[affected] = np.where(
+            affected_neighbors >= 0,
+            np.take_along_axis(affected_sims, affected_neighbors, axis=1),
+            0,
         )
+        self.neighbors = best_neighbors.astype(np.int32)
+        self.neighbor_sims = best_sims.astype(np.float32)
@@ -1,29 +1,119 @@
 # content_based.py
-from recommenders.recommender_base import Recommender
-from sklearn.metrics.pairwise import linear_kernel
+from recommenders.recommender_base import (
+    Recommender,
+    build_user_item_matrix,
+    top_n_positions,
+)
+from recommenders.ann_index import IVFIndex
 from sklearn.feature_extraction.text import TfidfVectorizer
 import numpy as np
 
 
 class ContentBasedRecommender(Recommender):
-    def __init__(self, movies, ratings):
+    def __init__(
+        self,
+        movies,
+        ratings,
+        n_lists=None,
+        n_probe=8,
+    ):
         """
         Inicializa el recomendador basado en contenido con los datos de películas y calificaciones.
 
         Parámetros:
         movies (DataFrame): Datos de las películas, incluyendo la información de metadatos.
         ratings (DataFrame): Datos de las calificaciones de los usuarios para las películas.
+        n_lists (int, opcional): Número de particiones del índice aproximado (IVF) sobre las filas
+            TF-IDF. Si se indica, las recomendaciones se buscan solo en las n_probe particiones
+            más prometedoras para el perfil del usuario; si es None, se puntúa todo el catálogo
+            con la similitud exacta.
+        n_probe (int): Número de particiones del índice aproximado visitadas por consulta.
         """
         # Inicializa la clase base con los datos de películas y calificaciones
         super().__init__(movies, ratings)
+        self.n_lists = n_lists
+        self.n_probe = n_probe
 
         # Calcula la matriz TF-IDF basada en la columna 'metadata' de las películas
         # Utiliza palabras en inglés como stopwords
         tfidf = TfidfVectorizer(stop_words="english")
-        tfidf_matrix = tfidf.fit_transform(movies["metadata"])
+        self.tfidf_matrix = tfidf.fit_transform(movies["metadata"]).tocsr()
+        # Los términos de cada fila se ordenan como en la matriz que guarda save, para que el
+        # modelo cargado sume los productos en el mismo orden y puntúe exactamente igual
+        self.tfidf_matrix.sort_indices()
 
-        # Calcula la similitud del coseno entre todas las películas
-        self.cosine_sim = linear_kernel(tfidf_matrix, tfidf_matrix)
+        # Índice aproximado de vecinos sobre las filas TF-IDF
+        self.ann_index = None
+        if n_lists is not None:
+            self.ann_index = IVFIndex(n_lists, n_probe).fit(self.tfidf_matrix)
+
+        # Precalcula los índices de películas y la matriz dispersa de calificaciones por usuario
+        self._build_movie_index()
+        self._build_user_matrix()
+
+    def _build_movie_index(self):
+        """
+        Precalcula la correspondencia entre IDs de películas y filas del DataFrame de películas.
+
+        Si una película aparece en varias filas, sus calificaciones se asignan a la primera fila,
+        pero todas sus filas se excluyen de las recomendaciones.
+        """
+        # Posición en el catálogo de la película de cada fila
+        self._row_movie_ids = self.movies["movieId"].to_numpy()
+        self._row_codes = self.catalog_index.get_indexer(self._row_movie_ids)
+
+        # Primera fila de cada película
+        _, first_rows = np.unique(self._row_codes, return_index=True)
+        self._first_rows = first_rows
+        self._deduplicated = len(first_rows) == len(self._row_codes)
+
+        # Características de la primera fila de cada película
+        if self._deduplicated:
+            self._item_features = self.tfidf_matrix
+        else:
+            self._item_features = self.tfidf_matrix[first_rows]
+
+    def _build_user_matrix(self):
+        """
+        Construye la matriz dispersa usuario-película con las calificaciones de cada usuario.
+        """
+        self._user_index, _, self._user_item = build_user_item_matrix(
+            self.ratings, self.catalog_index
+        )
+
+        # Filas del DataFrame de películas ya valoradas por cada usuario
+        if self._deduplicated:
+            self._rated_rows = self._user_item
+        else:
+            self._rated_rows = self._user_item[:, self._row_codes].tocsr()
+
+    def _score_users(self, user_rows):
+        """
+        Calcula las puntuaciones de todo el catálogo para un bloque de usuarios.
+
+        Parámetros:
+        user_rows (numpy.ndarray): Posiciones de los usuarios en la matriz usuario-película.
+
+        Devuelve:
+        numpy.ndarray: Matriz (usuarios x filas de películas) con la similitud ponderada
+            por las calificaciones; las películas ya valoradas y las que no comparten ningún
+            término con las valoradas (similitud nula) tienen puntuación -inf.
+        """
+        user_ratings = self._user_item[user_rows]
+
+        # Suma de las similitudes de cada película valorada ponderadas por su calificación:
+        # el perfil del usuario en el espacio TF-IDF, proyectado sobre todas las películas
+        profiles = user_ratings @ self._item_features
+        scores = (profiles @ self.tfidf_matrix.T).toarray()
+
+        # Sin ningún término en común la similitud es nula y la película no tiene puntuación
+        scores[scores == 0] = -np.inf
+
+        # Excluir películas ya valoradas por el usuario
+        rated = self._rated_rows[user_rows]
+        rated_users = np.repeat(np.arange(len(user_rows)), np.diff(rated.indptr))
+        scores[rated_users, rated.indices] = -np.inf
+        return scores
 
     def recommend(self, user_id, top_n=10):
         """
@@ -36,40 +126,115 @@ class ContentBasedRecommender(Recommender):
         Devuelve:
         numpy.ndarray: IDs de las películas recomendadas.
         """
-        # Obtener las películas valoradas por el usuario
-        user_ratings = self.ratings[self.ratings["userId"] == user_id]
-        if user_ratings.empty:
+        # Obtener la fila del usuario en la matriz usuario-película
+        user_row = self._user_index.get_indexer([user_id])
+        if user_row[0] < 0:
             return []
 
-        # Obtener los índices de las películas valoradas por el usuario
-        rated_movie_indices = self.movies.index[
-            self.movies["movieId"].isin(user_ratings["movieId"])
-        ].tolist()
+        # Con el índice aproximado solo se puntúan las películas de las particiones visitadas
+        if self.ann_index is not None:
+            recommended = self._recommend_approximate(user_row, top_n)[0]
+            return recommended[recommended >= 0]
 
         # Calcular las similitudes ponderadas por la calificación del usuario
-        # Inicializa un vector de puntajes de similitud ponderados con ceros
-        weighted_sim_scores = np.zeros(self.cosine_sim.shape[0])
-        for row in user_ratings.itertuples():
-            movie_id = row.movieId
-            rating = row.rating
-            # Encuentra el índice de la película en el DataFrame de películas
-            idx = self.movies.index[self.movies["movieId"] == movie_id].tolist()
-            if idx:
-                # Suma la similitud ponderada por la calificación del usuario
-                weighted_sim_scores += self.cosine_sim[idx[0]] * rating
-
-        # Excluir películas ya valoradas por el usuario, estableciendo sus puntajes a 0
-        for idx in rated_movie_indices:
-            weighted_sim_scores[idx] = 0
-
-        # Ordenar por puntaje de similitud ponderado en orden descendente
-        sim_scores = list(enumerate(weighted_sim_scores))
-        sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-
-        # Obtener los índices de las películas recomendadas
-        sim_scores = sim_scores[:top_n]
-        movie_indices = [i[0] for i in sim_scores]
-        return self.movies.iloc[movie_indices]["movieId"].values
+        weighted_sim_scores = self._score_users(user_row)[0]
+
+        # Seleccionar las películas con mayor puntaje sin ordenar todo el catálogo
+        movie_indices = top_n_positions(weighted_sim_scores, top_n)
+        return self._row_movie_ids[movie_indices[movie_indices >= 0]]
+
+    def _recommend_approximate(self, user_rows, top_n):
+        """
+        Recomienda películas a un bloque de usuarios buscando su perfil TF-IDF en el índice IVF.
+
+        La puntuación de una película es el producto escalar entre su fila TF-IDF y el perfil
+        del usuario, por lo que basta buscar los vecinos del perfil y descartar las películas
+        ya valoradas.
+
+        Parámetros:
+        user_rows (numpy.ndarray): Posiciones de los usuarios en la matriz usuario-película.
+        top_n (int): Número de películas a recomendar por usuario.
+
+        Devuelve:
+        numpy.ndarray: Matriz (usuarios x top_n) con los IDs recomendados; -1 donde no hay recomendación.
+        """
+        profiles = self._user_item[user_rows] @ self._item_features
+        rated = self._rated_rows[user_rows]
+        n_rated = np.diff(rated.indptr)
+
+        # Pide tantos candidatos adicionales como películas valoradas, que se descartan después
+        candidates, scores = self.ann_index.search(profiles, top_n + n_rated.max())
+        rated_keys = (
+            np.repeat(np.arange(len(user_rows)), n_rated) * len(self._row_movie_ids)
+            + rated.indices
+        )
+        candidate_keys = (
+            np.arange(len(user_rows))[:, None] * len(self._row_movie_ids) + candidates
+        )
+        scores[
+            np.isin(candidate_keys, rated_keys) | (candidates < 0) | (scores == 0)
+        ] = -np.inf
+
+        top = top_n_positions(scores, top_n)
+        recommendations = np.full((len(user_rows), top_n), -1, dtype=np.int64)
+        movie_rows = np.take_along_axis(candidates, np.maximum(top, 0), axis=1)
+        recommendations[:, : top.shape[1]] = np.where(
+            top >= 0, self._row_movie_ids[movie_rows], -1
+        )
+        return recommendations
+
+    def recommend_many(self, user_ids, top_n=10, batch_size=256):
+        """
+        Recomienda películas a varios usuarios puntuando bloques de usuarios con productos dispersos.
+
+        Parámetros:
+        user_ids (array-like): IDs de los usuarios para los que se harán las recomendaciones.
+        top_n (int): Número de películas a recomendar por usuario.
+        batch_size (int): Número de usuarios puntuados en cada bloque.
+
+        Devuelve:
+        numpy.ndarray: Matriz (usuarios x top_n) con los IDs recomendados; -1 donde no hay recomendación.
+        """
+        recommendations = np.full((len(user_ids), top_n), -1, dtype=np.int64)
+        user_rows = self._user_index.get_indexer(user_ids)
+        known_users = np.flatnonzero(user_rows >= 0)
+
+        for start in range(0, len(known_users), batch_size):
+            block = known_users[start : start + batch_size]
+            if self.ann_index is not None:
+                recommendations[block] = self._recommend_approximate(
+                    user_rows[block], top_n
+                )
+                continue
+            movie_indices = top_n_positions(self._score_users(user_rows[block]), top_n)
+            recommendations[block, : movie_indices.shape[1]] = np.where(
+                movie_indices >= 0, self._row_movie_ids[movie_indices], -1
+            )
+        return recommendations
+
+    def score_many(self, user_ids, batch_size=256):
+        """
+        Puntúa todas las películas del catálogo para varios usuarios.
+
+        Parámetros:
+        user_ids (array-like): IDs de los usuarios.
+        batch_size (int): Número de usuarios puntuados en cada bloque.
+
+        Devuelve:
+        numpy.ndarray: Matriz (usuarios x películas del catálogo) con la similitud ponderada;
+            NaN para las películas ya valoradas, las de similitud nula con todas las valoradas
+            y para los usuarios desconocidos.
+        """
+        scores = np.full((len(user_ids), len(self.catalog_index)), np.nan)
+        user_rows = self._user_index.get_indexer(user_ids)
+        known_users = np.flatnonzero(user_rows >= 0)
+
+        for start in range(0, len(known_users), batch_size):
+            block = known_users[start : start + batch_size]
+            block_scores = self._score_users(user_rows[block])[:, self._first_rows]
+            block_scores[np.isneginf(block_scores)] = np.nan
+            scores[block] = block_scores
+        return scores
 
     def update_data(self, ratings):
         """
@@ -80,3 +245,6 @@ class ContentBasedRecommender(Recommender):
         """
         # Actualiza las calificaciones almacenadas con los nuevos datos
         self.ratings = ratings
+
+        # Recrea la matriz usuario-película con las calificaciones actualizadas
+        self._build_user_matrix()
@@ -1,10 +1,30 @@
 # hybrid_recommender.py
-from recommenders.recommender_base import Recommender
+from recommenders.recommender_base import (
+    Recommender,
+    build_user_item_matrix,
+    top_n_positions,
+)
+from concurrent.futures import Executor, ThreadPoolExecutor, wait
+import os
 import numpy as np
+import pandas as pd
 
 
 class HybridRecommender(Recommender):
-    def __init__(self, recommenders, movies, ratings, weights=None):
+    # El pool de hilos y las llamadas en curso se vuelven a crear al cargar el modelo
+    _unsaved_attributes = ("_executor", "_executor_pid", "_in_flight", "_in_flight_pid")
+
+    def __init__(
+        self,
+        recommenders,
+        movies,
+        ratings,
+        weights=None,
+        executor=None,
+        timeout=None,
+        popularity_window=None,
+        popularity_smoothing=None,
+    ):
         """
         Inicializa el recomendador híbrido con una lista de recomendadores, datos de películas y calificaciones.
 
@@ -13,14 +33,37 @@ class HybridRecommender(Recommender):
         movies (DataFrame): Datos de las películas.
         ratings (DataFrame): Datos de las calificaciones de los usuarios para las películas.
         weights (list, opcional): Lista de pesos para cada recomendador. Si no se proporcionan, se asignan pesos iguales.
+        executor (str o Executor, opcional): Si es "thread", los recomendadores base se ejecutan
+            en paralelo en un pool de hilos; también se puede pasar un Executor ya creado.
+            Si es None, se ejecutan uno tras otro.
+        timeout (float, opcional): Segundos que se espera a los recomendadores base cuando se
+            ejecutan en paralelo. Los que no responden a tiempo o fallan se omiten.
+        popularity_window (float, opcional): Si se indica, la popularidad solo cuenta las
+            calificaciones de los últimos popularity_window segundos (según el timestamp más
+            reciente). Las calificaciones sin timestamp se consideran recientes.
+        popularity_smoothing (float, opcional): Si se indica, las películas se ordenan por su
+            calificación media suavizada hacia la media global con este número de calificaciones
+            ficticias, en lugar de por la cantidad de calificaciones.
         """
         # Inicializa la clase base con los datos de películas y calificaciones
         super().__init__(movies, ratings)
 
+        self.executor = executor
+        self.timeout = timeout
+        self.popularity_window = popularity_window
+        self.popularity_smoothing = popularity_smoothing
+        self._executor = None
+        self._executor_pid = None
+        self._in_flight = None
+        self._in_flight_pid = None
+
         # Inicializa los recomendadores con los datos de películas y calificaciones
-        self.recommenders = [
-            recommender(movies, ratings) for recommender in recommenders
-        ]
+        self.recommenders = self._map(
+            lambda recommender: recommender(movies, ratings), recommenders
+        )
+
+        # Usuarios conocidos, películas ya calificadas y ranking de popularidad
+        self._fit_ratings(ratings)
 
         # Si no se proporcionan pesos, se asignan pesos iguales a todos los recomendadores
         if weights is None:
@@ -28,9 +71,184 @@ class HybridRecommender(Recommender):
         else:
             self.weights = weights
 
+    def _fit_ratings(self, ratings):
+        """
+        Precalcula los datos del híbrido que dependen de las calificaciones: los usuarios
+        conocidos, la matriz de películas ya calificadas y el ranking de popularidad.
+
+        Parámetros:
+        ratings (DataFrame): Datos de las calificaciones de los usuarios para las películas.
+        """
+        self.ratings = ratings
+
+        # Matriz usuario-película del catálogo, para excluir las películas ya calificadas.
+        # Su índice de usuarios permite saber en O(1) si un usuario es nuevo
+        self._user_index, _, self._user_item = build_user_item_matrix(
+            ratings, self.catalog_index
+        )
+
+        # Ranking completo de popularidad; recommend_popular solo toma un corte. Las
+        # posiciones en el catálogo completan las recomendaciones sin puntuación suficiente
+        self._popular = self._popularity_ranking(ratings)
+        positions = self.catalog_index.get_indexer(self._popular)
+        self._popular_positions = positions[positions >= 0]
+
+    def _popularity_ranking(self, ratings):
+        """
+        Ordena las películas por popularidad.
+
+        Parámetros:
+        ratings (DataFrame o StreamedRatings): Datos de las calificaciones de los usuarios para las películas.
+
+        Devuelve:
+        numpy.ndarray: IDs de las películas calificadas, de la más a la menos popular.
+        """
+        if not isinstance(ratings, pd.DataFrame):
+            # Sin ventana temporal se usan los conteos ya calculados al leer las calificaciones
+            if self.popularity_window is None:
+                return self._rank_popularity(
+                    ratings.movie_index.to_numpy(),
+                    ratings.movie_counts,
+                    ratings.movie_rating_sums,
+                )
+            ratings = ratings.to_frame()
+
+        if self.popularity_window is not None:
+            timestamps = ratings["timestamp"].to_numpy(dtype=float)
+            cutoff = np.nanmax(timestamps) - self.popularity_window
+            ratings = ratings[~(timestamps < cutoff)]
+
+        movie_ids, movie_codes = np.unique(
+            ratings["movieId"].to_numpy(), return_inverse=True
+        )
+        counts = np.bincount(movie_codes, minlength=len(movie_ids))
+        sums = np.bincount(
+            movie_codes,
+            weights=ratings["rating"].to_numpy(dtype=float),
+            minlength=len(movie_ids),
+        )
+        return self._rank_popularity(movie_ids, counts, sums)
+
+    def _rank_popularity(self, movie_ids, counts, sums):
+        """
+        Ordena las películas por número de calificaciones o por su media suavizada.
+
+        Parámetros:
+        movie_ids (numpy.ndarray): IDs de las películas, en orden ascendente.
+        counts (numpy.ndarray): Número de calificaciones de cada película.
+        sums (numpy.ndarray): Suma de las calificaciones de cada película.
+
+        Devuelve:
+        numpy.ndarray: IDs de las películas, de la más a la menos popular.
+        """
+        popularity = counts.astype(float)
+
+        # Media bayesiana: la media de cada película se acerca a la global si tiene pocas calificaciones
+        if self.popularity_smoothing is not None:
+            global_mean = sums.sum() / counts.sum()
+            popularity = (sums + self.popularity_smoothing * global_mean) / (
+                counts + self.popularity_smoothing
+            )
+
+        # Orden estable: en caso de empate, por ID ascendente
+        return movie_ids[np.argsort(-popularity, kind="stable")]
+
+    def _saved_state(self):
+        """
+        Devuelve los atributos que guarda save. Los recomendadores base se guardan junto al
+        híbrido, compartiendo los DataFrames de películas y calificaciones, y un Executor
+        recibido como parámetro no se guarda.
+
+        Devuelve:
+        dict: Atributos del recomendador híbrido.
+        """
+        state = super()._saved_state()
+        if isinstance(self.executor, Executor):
+            state["executor"] = None
+        return state
+
+    def _get_executor(self):
+        """
+        Devuelve el Executor utilizado para ejecutar los recomendadores base en paralelo.
+
+        Devuelve:
+        Executor: El Executor configurado, o None si los recomendadores se ejecutan en serie.
+        """
+        if isinstance(self.executor, Executor):
+            return self.executor
+        # Un proceso creado con fork hereda el pool sin sus hilos, así que crea uno propio
+        if self.executor == "thread" and self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor()
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def _map(self, function, items):
+        """
+        Aplica una función a cada elemento, en paralelo si hay un Executor configurado.
+
+        Parámetros:
+        function (callable): Función a aplicar.
+        items (list): Elementos sobre los que se aplica la función.
+
+        Devuelve:
+        list: Resultados en el mismo orden que los elementos.
+        """
+        executor = self._get_executor()
+        if executor is None:
+            return [function(item) for item in items]
+        return list(executor.map(function, items))
+
+    def _fan_out(self, method, *args):
+        """
+        Llama al mismo método en todos los recomendadores base.
+
+        Con un Executor, las llamadas se ejecutan en paralelo y se espera como máximo timeout
+        segundos; los recomendadores que no terminan a tiempo o fallan se omiten. Una llamada
+        que ya empezó no se puede cancelar, así que mientras la anterior de un recomendador
+        siga en ejecución, ese recomendador se omite sin volver a llamarlo: un recomendador
+        lento ocupa como mucho un hilo del Executor y no impide responder a los demás.
+
+        Parámetros:
+        method (str): Nombre del método a llamar.
+        *args: Argumentos del método.
+
+        Devuelve:
+        list: Resultados en el orden de self.recommenders, con None para los que no respondieron.
+        """
+        executor = self._get_executor()
+        if executor is None:
+            return [
+                getattr(recommender, method)(*args) for recommender in self.recommenders
+            ]
+
+        # Última llamada de cada recomendador base; un proceso creado con fork no hereda los
+        # hilos que las ejecutan, así que empieza sin llamadas en curso
+        if self._in_flight is None or self._in_flight_pid != os.getpid():
+            self._in_flight = {}
+            self._in_flight_pid = os.getpid()
+
+        futures = {}
+        for i, recommender in enumerate(self.recommenders):
+            previous = self._in_flight.get(i)
+            if previous is not None and not previous.done():
+                continue
+            futures[i] = self._in_flight[i] = executor.submit(
+                getattr(recommender, method), *args
+            )
+        wait(futures.values(), timeout=self.timeout)
+
+        results = [None] * len(self.recommenders)
+        for i, future in futures.items():
+            # Los que siguen en ejecución se abandonan; sus resultados se descartan al terminar
+            if not future.done():
+                future.cancel()
+            elif future.exception() is None:
+                results[i] = future.result()
+        return results
+
     def recommend(self, user_id, top_n=10):
         """
-        Recomienda películas a un usuario combinando las recomendaciones de los recomendadores base.
+        Recomienda películas a un usuario combinando las puntuaciones de los recomendadores base.
 
         Parámetros:
         user_id (int): ID del usuario para el que se harán las recomendaciones.
@@ -39,32 +257,174 @@ class HybridRecommender(Recommender):
         Devuelve:
         list: IDs de las películas recomendadas.
         """
-        # Si el usuario es nuevo, recomendar películas basadas en popularidad
-        if user_id not in self.recommenders[1].user_item_matrix.index:
-            return self.recommend_popular(top_n)
+        recommendations = self.recommend_many([user_id], top_n)[0]
+        return recommendations[recommendations >= 0].tolist()
+
+    def recommend_many(self, user_ids, top_n=10, batch_size=256):
+        """
+        Recomienda películas a varios usuarios combinando las puntuaciones de los recomendadores base.
 
-        # Lista para almacenar las recomendaciones de cada recomendador
-        scores_list = []
-        for recommender in self.recommenders:
-            # Obtiene más recomendaciones de las necesarias para combinar mejor
-            scores = recommender.recommend(user_id, top_n * 2)
-            scores_list.append(scores)
+        Parámetros:
+        user_ids (array-like): IDs de los usuarios para los que se harán las recomendaciones.
+        top_n (int): Número de películas a recomendar por usuario.
+        batch_size (int): Número de usuarios puntuados en cada bloque por los recomendadores base.
+
+        Devuelve:
+        numpy.ndarray: Matriz (usuarios x top_n) con los IDs recomendados; -1 donde no hay recomendación.
+        """
+        user_ids = np.asarray(user_ids)
+        recommendations = np.full((len(user_ids), top_n), -1, dtype=np.int64)
+        movie_ids = self.catalog_index.to_numpy()
 
-        # Unir todas las recomendaciones de los recomendadores base y calcular puntuaciones
-        all_rec = np.concatenate(scores_list)
+        # Los usuarios nuevos reciben las películas más populares
+        known = self._user_index.get_indexer(user_ids) >= 0
+        popular = np.asarray(self.recommend_popular(top_n), dtype=np.int64)
+        recommendations[np.ix_(~known, np.arange(len(popular)))] = popular
 
-        # Obtener las películas únicas recomendadas y contar cuántas veces se recomienda cada una
-        unique_rec, counts = np.unique(all_rec, return_counts=True)
-        rec_scores = dict(zip(unique_rec, counts))
+        known_users = np.flatnonzero(known)
+        for start in range(0, len(known_users), batch_size):
+            block = known_users[start : start + batch_size]
+            scores = self._combine_scores(user_ids[block], batch_size)
 
-        # Ordenar las recomendaciones por puntuación en orden descendente
-        sorted_rec = sorted(rec_scores.items(), key=lambda x: x[1], reverse=True)
-        recommendations = [rec[0] for rec in sorted_rec[:top_n]]
+            # Si ningún recomendador base respondió, se recurre a la popularidad
+            if scores is None:
+                recommendations[np.ix_(block, np.arange(len(popular)))] = popular
+                continue
+
+            movie_indices = top_n_positions(np.nan_to_num(scores, nan=-np.inf), top_n)
+
+            # Los usuarios con menos de top_n películas puntuadas se completan con las más
+            # populares que no han calificado
+            incomplete = np.flatnonzero((movie_indices < 0).any(axis=1))
+            if len(incomplete):
+                rated = self._rated_mask(user_ids[block[incomplete]])
+                movie_indices[incomplete] = self._fill_popular(
+                    movie_indices[incomplete],
+                    np.isnan(scores[incomplete]) & ~rated,
+                )
+            recommendations[block, : movie_indices.shape[1]] = np.where(
+                movie_indices >= 0, movie_ids[movie_indices], -1
+            )
         return recommendations
 
+    def score_many(self, user_ids, batch_size=256):
+        """
+        Puntúa todas las películas del catálogo con la suma ponderada de las puntuaciones
+        normalizadas de los recomendadores base.
+
+        Parámetros:
+        user_ids (array-like): IDs de los usuarios.
+        batch_size (int): Número de usuarios puntuados en cada bloque.
+
+        Devuelve:
+        numpy.ndarray: Matriz (usuarios x películas del catálogo); NaN para las películas ya
+            calificadas por cada usuario y para las que no puntuó ningún recomendador base.
+        """
+        scores = self._combine_scores(user_ids, batch_size)
+        if scores is None:
+            return np.full((len(user_ids), len(self.catalog_index)), np.nan)
+        return scores
+
+    def _combine_scores(self, user_ids, batch_size):
+        """
+        Combina las puntuaciones de los recomendadores base que respondieron a tiempo.
+
+        Parámetros:
+        user_ids (array-like): IDs de los usuarios.
+        batch_size (int): Número de usuarios puntuados en cada bloque por los recomendadores base.
+
+        Devuelve:
+        numpy.ndarray: Matriz (usuarios x películas del catálogo) con la suma ponderada, o None
+            si ningún recomendador base respondió. Las películas que no puntuó ningún
+            recomendador base y las ya calificadas valen NaN.
+        """
+        base_scores = self._fan_out("score_many", user_ids, batch_size)
+        if all(scores is None for scores in base_scores):
+            return None
+
+        # Suma ponderada de las puntuaciones de cada recomendador, escaladas a [0, 1]. Un
+        # recomendador que no puntúa una película no suma nada; si no la puntúa ninguno, la
+        # película queda sin puntuación en lugar de empatar con las peor puntuadas
+        combined = np.zeros((len(user_ids), len(self.catalog_index)))
+        scored = np.zeros(combined.shape, dtype=bool)
+        for weight, scores in zip(self.weights, base_scores):
+            if scores is not None:
+                normalized = self._normalize(scores)
+                scored |= ~np.isnan(normalized)
+                combined += weight * np.nan_to_num(normalized)
+        combined[~scored] = np.nan
+
+        # Excluir las películas ya calificadas por cada usuario
+        combined[self._rated_mask(user_ids)] = np.nan
+        return combined
+
+    def _rated_mask(self, user_ids):
+        """
+        Marca las películas del catálogo ya calificadas por cada usuario.
+
+        Parámetros:
+        user_ids (array-like): IDs de los usuarios.
+
+        Devuelve:
+        numpy.ndarray: Matriz booleana (usuarios x películas del catálogo); los usuarios
+            desconocidos no tienen ninguna película calificada.
+        """
+        user_rows = self._user_index.get_indexer(user_ids)
+        known = np.flatnonzero(user_rows >= 0)
+        rated = self._user_item[user_rows[known]]
+        mask = np.zeros((len(user_rows), len(self.catalog_index)), dtype=bool)
+        mask[np.repeat(known, np.diff(rated.indptr)), rated.indices] = True
+        return mask
+
+    def _fill_popular(self, positions, candidates):
+        """
+        Completa las posiciones vacías de las recomendaciones con las películas más populares.
+
+        Parámetros:
+        positions (numpy.ndarray): Matriz (usuarios x top_n) de posiciones en el catálogo, con
+            las vacías (-1) al final de cada fila.
+        candidates (numpy.ndarray): Matriz booleana (usuarios x películas del catálogo) de las
+            películas que pueden completar cada fila (ni recomendadas ni calificadas).
+
+        Devuelve:
+        numpy.ndarray: Posiciones completadas en el orden del ranking de popularidad; -1 si no
+            quedan películas populares.
+        """
+        ranks = np.full(len(self.catalog_index), -np.inf)
+        ranks[self._popular_positions] = -np.arange(len(self._popular_positions))
+        top = top_n_positions(np.where(candidates, ranks, -np.inf), positions.shape[1])
+        fill = np.full(positions.shape, -1, dtype=positions.dtype)
+        fill[:, : top.shape[1]] = top
+
+        # La posición j de cada fila toma la película (j - recomendadas) del relleno
+        offsets = np.arange(positions.shape[1]) - (positions >= 0).sum(
+            axis=1, keepdims=True
+        )
+        from_fill = np.take_along_axis(fill, np.maximum(offsets, 0), axis=1)
+        return np.where(offsets < 0, positions, from_fill)
+
+    @staticmethod
+    def _normalize(scores):
+        """
+        Escala las puntuaciones de cada usuario al rango [0, 1] para que sean comparables entre
+        recomendadores.
+
+        Parámetros:
+        scores (numpy.ndarray): Matriz (usuarios x películas) de puntuaciones; NaN si no se puntúa.
+
+        Devuelve:
+        numpy.ndarray: Puntuaciones escaladas; las no puntuadas siguen valiendo NaN.
+        """
+        scored = ~np.isnan(scores)
+        low = np.min(np.where(scored, scores, np.inf), axis=1, keepdims=True)
+        high = np.max(np.where(scored, scores, -np.inf), axis=1, keepdims=True)
+        span = np.where(high > low, high - low, 1)
+        return np.where(scored, (scores - low) / span, np.nan)
+
     def recommend_popular(self, top_n=10):
         """
-        Recomienda las películas más populares en base a la cantidad de calificaciones.
+        Recomienda las películas más populares en base a la cantidad de calificaciones
+        (o a su calificación media suavizada, si se configuró popularity_smoothing).
 
         Parámetros:
         top_n (int): Número de películas a recomendar.
@@ -72,17 +432,8 @@ class HybridRecommender(Recommender):
         Devuelve:
         list: IDs de las películas más populares.
         """
-        # Calcular la popularidad de cada película según la cantidad de calificaciones
-        movie_popularity = (
-            self.recommenders[1]
-            .ratings["movieId"]
-            .value_counts()
-            .sort_values(ascending=False)
-        )
-
-        # Seleccionar las top_n películas más populares
-        popular_movies = movie_popularity.head(top_n).index.tolist()
-        return popular_movies
+        # Seleccionar las top_n películas del ranking precalculado
+        return self._popular[:top_n].tolist()
 
     def update_data(self, ratings):
         """
@@ -91,6 +442,10 @@ class HybridRecommender(Recommender):
         Parámetros:
         ratings (DataFrame): Datos de las calificaciones de los usuarios para las películas.
         """
+        # Actualizar los usuarios conocidos y el ranking de popularidad
+        self._fit_ratings(ratings)
+
         # Actualizar los datos en cada uno de los recomendadores base
-        for recommender in self.recommenders:
-            recommender.update_data(ratings)
+        self._map(
+            lambda recommender: recommender.update_data(ratings), self.recommenders
+        )
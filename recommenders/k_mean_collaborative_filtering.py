@@ -1,15 +1,27 @@
 # k_mean_collaborative_filtering.py
 
-from recommenders.recommender_base import Recommender
+from recommenders.recommender_base import (
+    Recommender,
+    build_user_item_matrix,
+    ratings_delta,
+    top_n_positions,
+)
 import pandas as pd
-from sklearn.cluster import KMeans
-from sklearn.metrics.pairwise import cosine_similarity
+from scipy import sparse
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
 import numpy as np
 
 
 class KMeansCollaborativeFilteringRecommender(Recommender):
     def __init__(
-        self, movies: pd.DataFrame, ratings: pd.DataFrame, num_clusters: int = 10
+        self,
+        movies: pd.DataFrame,
+        ratings: pd.DataFrame,
+        num_clusters: int = 10,
+        n_components: int = 50,
+        drift_threshold: float = 0.1,
+        block_size: int = 1024,
     ):
         """
         Inicializa el recomendador de filtrado colaborativo con clusterización K-Means.
@@ -18,68 +30,278 @@ class KMeansCollaborativeFilteringRecommender(Recommender):
             movies (pd.DataFrame): DataFrame con información de las películas.
             ratings (pd.DataFrame): DataFrame con calificaciones de los usuarios.
             num_clusters (int, optional): Número de clusters para K-Means. Por defecto es 10.
+            n_components (int, optional): Dimensiones de la reducción TruncatedSVD aplicada antes
+                de clusterizar. Por defecto es 50.
+            drift_threshold (float, optional): Fracción de calificaciones modificadas de forma
+                incremental, respecto a las del último entrenamiento completo, a partir de la
+                cual se vuelve a clusterizar. Por defecto es 0.1.
+            block_size (int, optional): Número de usuarios cuyas similitudes se calculan a la
+                vez al buscar los vecinos. Por defecto es 1024.
         """
         super().__init__(movies, ratings)
         self.num_clusters = num_clusters
+        self.n_components = n_components
+        self.drift_threshold = drift_threshold
+        self.block_size = block_size
+        self._fit()
+
+    def _fit(self):
+        """
+        Construye la matriz usuario-item, los clusters y las listas de vecinos.
+        """
         self.user_item_matrix = self._create_user_item_matrix()
-        self.user_sim_df = self._compute_pearson_similarity()
+        self.centered_matrix = self._center_ratings()
         self.cluster_labels = self._cluster_users()
+        self._build_cluster_index(np.arange(self.num_clusters))
+
+        # Calificaciones actualizadas de forma incremental desde este entrenamiento completo
+        self._fitted_ratings = self.user_item_matrix.nnz
+        self._drift = 0
 
-    def _create_user_item_matrix(self) -> pd.DataFrame:
+    def _create_user_item_matrix(self) -> sparse.csr_matrix:
         """
-        Crea la matriz usuario-item a partir de las calificaciones.
+        Crea la matriz dispersa usuario-item a partir de las calificaciones.
 
         Returns:
-            pd.DataFrame: Matriz pivotada usuario-item.
+            sparse.csr_matrix: Matriz usuario-item; user_index y movie_index guardan los IDs
+                de filas y columnas.
         """
-        user_item = self.ratings.pivot_table(
-            index="userId", columns="movieId", values="rating"
+        self.user_index, self.movie_index, user_item = build_user_item_matrix(
+            self.ratings
         )
         return user_item
 
-    def _compute_pearson_similarity(self) -> pd.DataFrame:
+    def _center_ratings(self) -> sparse.csr_matrix:
+        """
+        Resta a cada calificación la media del usuario, conservando la dispersión.
+
+        Rellenar los valores faltantes con la media del usuario y centrar la fila equivale a
+        dejar ceros en las películas no calificadas, por lo que no hace falta la matriz densa.
+
+        Returns:
+            sparse.csr_matrix: Matriz usuario-item centrada por la media de cada usuario.
+        """
+        counts = np.diff(self.user_item_matrix.indptr)
+        sums = np.asarray(self.user_item_matrix.sum(axis=1)).ravel()
+        means = sums / np.maximum(counts, 1)
+        centered = self.user_item_matrix.copy()
+        centered.data = centered.data - np.repeat(means, counts)
+        return centered
+
+    def _normalized_rows(self) -> sparse.csr_matrix:
         """
-        Calcula la matriz de similitud de Pearson entre usuarios.
+        Normaliza las filas centradas para que su producto escalar sea la correlación de Pearson.
 
         Returns:
-            pd.DataFrame: Matriz de similitud usuario-usuario.
+            sparse.csr_matrix: Filas centradas con norma 1 (o nulas si no tienen varianza).
         """
-        # Rellenar los valores faltantes con la media de cada usuario
-        user_item_filled = self.user_item_matrix.apply(
-            lambda row: row.fillna(row.mean()), axis=1
+        norms = np.sqrt(
+            np.asarray(
+                self.centered_matrix.multiply(self.centered_matrix).sum(axis=1)
+            ).ravel()
+        )
+        return (
+            sparse.diags(np.divide(1, norms, out=np.zeros_like(norms), where=norms > 0))
+            @ self.centered_matrix
         )
-        # Calcular la matriz de correlación de Pearson
-        similarity = user_item_filled.T.corr(method="pearson", min_periods=5)
-        similarity = similarity.fillna(0)  # Reemplazar NaNs con 0
-        return similarity
 
     def _cluster_users(self) -> pd.Series:
         """
         Aplica K-Means para clusterizar a los usuarios.
 
+        Las filas centradas se reducen con TruncatedSVD, que acepta matrices dispersas, y se
+        agrupan con MiniBatchKMeans. Ambos modelos se conservan para asignar usuarios nuevos.
+
         Returns:
             pd.Series: Series con las etiquetas de cluster para cada usuario.
         """
-        # Rellenar los valores faltantes con la media de cada usuario
-        user_item_filled = self.user_item_matrix.apply(
-            lambda row: row.fillna(row.mean()), axis=1
-        )
-        # Normalizar los datos
-        user_item_normalized = (
-            user_item_filled - user_item_filled.mean()
-        ) / user_item_filled.std()
-        user_item_normalized = user_item_normalized.fillna(
-            0
-        )  # Reemplazar NaNs resultantes
+        n_components = min(self.n_components, min(self.centered_matrix.shape) - 1)
+        if n_components > 0:
+            self._svd = TruncatedSVD(n_components=n_components, random_state=42)
+            user_features = self._svd.fit_transform(self.centered_matrix)
+        else:
+            self._svd = None
+            user_features = self.centered_matrix.toarray()
 
         # Aplicar K-Means
-        kmeans = KMeans(n_clusters=self.num_clusters, random_state=42)
-        kmeans.fit(user_item_normalized)
-        labels = pd.Series(
-            kmeans.labels_, index=self.user_item_matrix.index, name="Cluster"
+        self._kmeans = MiniBatchKMeans(
+            n_clusters=self.num_clusters, random_state=42, n_init=3
         )
+        self._kmeans.fit(user_features)
+        labels = pd.Series(self._kmeans.labels_, index=self.user_index, name="Cluster")
         return labels
 
+    def _build_cluster_index(self, clusters):
+        """
+        Precalcula los miembros de cada cluster y los num_clusters vecinos de sus usuarios.
+
+        Los vecinos se eligen entre los miembros del mismo cluster; si el cluster solo contiene
+        al usuario, entre todos los usuarios. Solo se recalculan los clusters indicados.
+
+        Args:
+            clusters (np.ndarray): Clusters cuyas listas de vecinos deben recalcularse.
+        """
+        labels = self.cluster_labels.to_numpy()
+        n_users = len(labels)
+        k = self.num_clusters
+        self.cluster_members = [
+            np.flatnonzero(labels == cluster) for cluster in range(self.num_clusters)
+        ]
+
+        # Listas de vecinos y sus similitudes (-inf en las posiciones vacías); los usuarios
+        # nuevos empiezan sin vecinos
+        previous = getattr(self, "neighbors", np.empty((0, k), dtype=np.int32))
+        neighbors = np.full((n_users, k), -1, dtype=np.int32)
+        neighbors[: len(previous)] = previous[:n_users]
+        self.neighbors = neighbors
+        previous = getattr(self, "neighbor_sims", np.empty((0, k)))
+        neighbor_sims = np.full((n_users, k), -np.inf)
+        neighbor_sims[: len(previous)] = previous[:n_users]
+        self.neighbor_sims = neighbor_sims
+
+        normalized = self._normalized_rows()
+        for cluster in clusters:
+            members = self.cluster_members[cluster]
+            if len(members) > 0:
+                self._update_neighbors(normalized, members)
+
+    def _candidates(self, cluster) -> np.ndarray:
+        """
+        Devuelve los usuarios entre los que se eligen los vecinos de los miembros de un cluster.
+
+        Args:
+            cluster (int): Cluster.
+
+        Returns:
+            np.ndarray: Posiciones ordenadas de los miembros del cluster, o de todos los
+                usuarios si el cluster solo contiene a un usuario.
+        """
+        members = self.cluster_members[cluster]
+        if len(members) < 2:
+            # Si el cluster tiene solo al usuario, expandir a todos los usuarios
+            return np.arange(len(self.cluster_labels))
+        return members
+
+    def _update_neighbors(self, normalized, user_rows):
+        """
+        Recalcula por bloques las listas de vecinos de varios usuarios de un mismo cluster.
+
+        La similitud de Pearson es el producto escalar de las filas centradas y normalizadas, y
+        se calcula para block_size usuarios a la vez frente a los candidatos de su cluster, así
+        que la memoria crece con el tamaño de los clusters y no con el cuadrado del número de
+        usuarios.
+
+        Args:
+            normalized (sparse.csr_matrix): Filas centradas con norma 1.
+            user_rows (np.ndarray): Posiciones de los usuarios, todos del mismo cluster.
+        """
+        k = self.num_clusters
+        candidates = self._candidates(self.cluster_labels.iat[user_rows[0]])
+        candidate_rows = normalized[candidates].T.tocsc()
+        for start in range(0, len(user_rows), self.block_size):
+            block = user_rows[start : start + self.block_size]
+            sims = (normalized[block] @ candidate_rows).toarray()
+
+            # Excluye a cada usuario de su propia lista
+            positions = np.minimum(
+                np.searchsorted(candidates, block), len(candidates) - 1
+            )
+            own = np.flatnonzero(candidates[positions] == block)
+            sims[own, positions[own]] = -np.inf
+
+            top_positions = top_n_positions(sims, k)
+            found = top_positions >= 0
+            self.neighbors[block] = -1
+            self.neighbors[block, : top_positions.shape[1]] = np.where(
+                found, candidates[top_positions], -1
+            )
+            self.neighbor_sims[block] = -np.inf
+            self.neighbor_sims[block, : top_positions.shape[1]] = np.where(
+                found,
+                np.take_along_axis(sims, np.maximum(top_positions, 0), axis=1),
+                -np.inf,
+            )
+
+    def _refresh_neighbors(self, affected, previous_sizes):
+        """
+        Recalcula, tras una actualización incremental, solo las listas de vecinos que pueden
+        haber cambiado.
+
+        Solo cambian las filas centradas de los usuarios afectados. La lista de otro miembro de
+        su cluster solo puede cambiar si contenía a un usuario afectado o si su nueva similitud
+        con uno de ellos alcanza la de su último vecino. Las demás listas se conservan, así que
+        el resultado es el mismo que recalcular todos los clusters, con un coste proporcional
+        a los usuarios afectados por el tamaño de su cluster. Los clusters de un solo usuario
+        (antes o después de la actualización) eligen sus vecinos entre todos los usuarios y se
+        recalculan enteros.
+
+        Args:
+            affected (np.ndarray): Posiciones de los usuarios con calificaciones nuevas o
+                modificadas.
+            previous_sizes (np.ndarray): Número de miembros de cada cluster antes de la
+                actualización.
+        """
+        self._build_cluster_index([])
+        labels = self.cluster_labels.to_numpy()
+        sizes = np.array([len(members) for members in self.cluster_members])
+        normalized = self._normalized_rows()
+
+        whole = np.flatnonzero((sizes < 2) | (previous_sizes < 2))
+        for cluster in whole:
+            if sizes[cluster] > 0:
+                self._update_neighbors(normalized, self.cluster_members[cluster])
+
+        for cluster in np.setdiff1d(np.unique(labels[affected]), whole):
+            members = self.cluster_members[cluster]
+            changed = affected[labels[affected] == cluster]
+            refresh = np.isin(members, changed) | (
+                np.isin(self.neighbors[members], changed).any(axis=1)
+            )
+
+            # Miembros cuya similitud con algún usuario afectado alcanza la de su último
+            # vecino (con margen para el redondeo del producto en el otro sentido)
+            threshold = self.neighbor_sims[members, -1] - 1e-12
+            member_rows = normalized[members].T.tocsc()
+            for start in range(0, len(changed), self.block_size):
+                block = changed[start : start + self.block_size]
+                sims = (normalized[block] @ member_rows).toarray()
+                refresh |= (sims >= threshold).any(axis=0)
+            self._update_neighbors(normalized, members[refresh])
+
+    def _neighbor_means(self, user_rows) -> np.ndarray:
+        """
+        Calcula la media de las calificaciones de los vecinos de varios usuarios.
+
+        Args:
+            user_rows (np.ndarray): Posiciones de los usuarios en user_index.
+
+        Returns:
+            np.ndarray: Matriz (usuarios x películas de movie_index) con la media de las
+                calificaciones de los vecinos (NaN si ningún vecino calificó la película o si
+                el usuario ya la calificó).
+        """
+        # Extrae solo las filas de los vecinos implicados en el bloque
+        neighbors = self.neighbors[user_rows]
+        rows, slots = np.nonzero(neighbors >= 0)
+        neighbor_rows, columns = np.unique(neighbors[rows, slots], return_inverse=True)
+        neighbor_ratings = self.user_item_matrix[neighbor_rows]
+        selection = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, columns)),
+            shape=(len(user_rows), len(neighbor_rows)),
+        )
+        sums = (selection @ neighbor_ratings).toarray()
+        neighbor_ratings.data = np.ones_like(neighbor_ratings.data)
+        counts = (selection @ neighbor_ratings).toarray()
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_ratings = sums / counts
+        mean_ratings[counts == 0] = np.nan
+
+        # Excluir películas ya calificadas por el usuario
+        user_rated = self.user_item_matrix[user_rows].tocoo()
+        mean_ratings[user_rated.row, user_rated.col] = np.nan
+        return mean_ratings
+
     def evaluate(self, user_id: int) -> pd.Series:
         """
         Evalúa todas las películas para un usuario específico y devuelve una serie de puntuaciones.
@@ -90,45 +312,192 @@ class KMeansCollaborativeFilteringRecommender(Recommender):
         Returns:
             pd.Series: Serie de puntuaciones con movieId como índice.
         """
-        if user_id not in self.user_sim_df.index:
+        user_row = self.user_index.get_indexer([user_id])[0]
+        if user_row < 0:
             # Usuario nuevo, devolver puntuaciones neutras
-            scores = pd.Series(0, index=self.user_item_matrix.columns)
+            scores = pd.Series(0, index=self.movie_index)
             return scores
 
-        # Obtener el cluster del usuario
-        user_cluster = self.cluster_labels.loc[user_id]
+        mean_ratings = self._neighbor_means(np.array([user_row]))[0]
+        not_rated = np.ones(len(mean_ratings), dtype=bool)
+        not_rated[self.user_item_matrix[user_row].indices] = False
+        recommendations = pd.Series(
+            mean_ratings[not_rated], index=self.movie_index[not_rated]
+        ).sort_values(ascending=False)
+
+        # Retornar una serie con las puntuaciones
+        return recommendations
 
-        # Filtrar usuarios que pertenecen al mismo cluster
-        users_in_cluster = self.cluster_labels[
-            self.cluster_labels == user_cluster
-        ].index
-        if len(users_in_cluster) < 2:
-            # Si el cluster tiene solo al usuario, expandir a todos los usuarios
-            similar_users = (
-                self.user_sim_df[user_id]
-                .sort_values(ascending=False)[1 : self.num_clusters + 1]
-                .index
-            )
-        else:
-            # Obtener la similitud con otros usuarios en el mismo cluster
-            sim_scores = self.user_sim_df.loc[users_in_cluster, user_id]
-            sim_scores = sim_scores.drop(
-                labels=[user_id], errors="ignore"
-            )  # Eliminar al usuario mismo
-            top_similar_users = (
-                sim_scores.sort_values(ascending=False).head(self.num_clusters).index
-            )
-            similar_users = top_similar_users
+    def recommend(self, user_id: int, top_n: int = 10) -> list:
+        """
+        Recomienda las películas con mayor calificación media entre los vecinos del usuario.
+
+        Args:
+            user_id (int): ID del usuario para el cual generar recomendaciones.
+            top_n (int, optional): Número de películas a recomendar. Por defecto es 10.
+
+        Returns:
+            list: IDs de las películas recomendadas.
+        """
+        user_row = self.user_index.get_indexer([user_id])[0]
+        if user_row < 0:
+            return []
+
+        # Obtén directamente de la matriz CSR las calificaciones de los vecinos
+        neighbors = self.neighbors[user_row]
+        neighbors = neighbors[neighbors >= 0]
+        indptr = self.user_item_matrix.indptr
+        starts = indptr[neighbors]
+        lengths = indptr[neighbors + 1] - starts
+        positions = np.repeat(
+            starts - np.cumsum(lengths) + lengths, lengths
+        ) + np.arange(lengths.sum())
+        movies = self.user_item_matrix.indices[positions]
 
-        # Obtener las calificaciones de los usuarios similares
-        top_users_ratings = self.user_item_matrix.loc[similar_users]
-        mean_ratings = top_users_ratings.mean(axis=0)
+        # Media de las calificaciones de los vecinos que calificaron cada película
+        n_movies = self.user_item_matrix.shape[1]
+        sums = np.bincount(
+            movies, weights=self.user_item_matrix.data[positions], minlength=n_movies
+        )
+        counts = np.bincount(movies, minlength=n_movies)
+        mean_ratings = np.full(n_movies, -np.inf)
+        np.divide(sums, counts, out=mean_ratings, where=counts > 0)
 
         # Excluir películas ya calificadas por el usuario
-        user_rated_movies = self.user_item_matrix.loc[user_id].dropna().index
-        recommendations = mean_ratings.drop(
-            user_rated_movies, errors="ignore"
-        ).sort_values(ascending=False)
+        mean_ratings[
+            self.user_item_matrix.indices[indptr[user_row] : indptr[user_row + 1]]
+        ] = -np.inf
+        top_positions = top_n_positions(mean_ratings, top_n)
+        return self.movie_index[top_positions[top_positions >= 0]].tolist()
 
-        # Retornar una serie con las puntuaciones
+    def recommend_many(self, user_ids, top_n=10, batch_size=256) -> np.ndarray:
+        """
+        Recomienda películas a varios usuarios, puntuando bloques de usuarios a la vez.
+
+        Args:
+            user_ids (array-like): IDs de los usuarios.
+            top_n (int, optional): Número de películas a recomendar por usuario.
+            batch_size (int, optional): Número de usuarios puntuados en cada bloque.
+
+        Returns:
+            np.ndarray: Matriz (usuarios x top_n) con los IDs de las películas recomendadas;
+                -1 en las posiciones sin recomendación y para los usuarios desconocidos.
+        """
+        user_rows = self.user_index.get_indexer(np.asarray(user_ids))
+        known = np.flatnonzero(user_rows >= 0)
+        movie_ids = self.movie_index.to_numpy()
+        recommendations = np.full((len(user_rows), top_n), -1, dtype=np.int64)
+        for start in range(0, len(known), batch_size):
+            block = known[start : start + batch_size]
+            mean_ratings = self._neighbor_means(user_rows[block])
+            mean_ratings[np.isnan(mean_ratings)] = -np.inf
+            positions = top_n_positions(mean_ratings, top_n)
+            recommendations[block, : positions.shape[1]] = np.where(
+                positions >= 0, movie_ids[positions], -1
+            )
         return recommendations
+
+    def score_many(self, user_ids, batch_size=256) -> np.ndarray:
+        """
+        Puntúa todas las películas del catálogo para varios usuarios.
+
+        Args:
+            user_ids (array-like): IDs de los usuarios.
+            batch_size (int, optional): Número de usuarios puntuados en cada bloque.
+
+        Returns:
+            np.ndarray: Matriz (usuarios x películas del catálogo) alineada con catalog_index;
+                NaN para las películas sin puntuación. Los usuarios desconocidos reciben 0.
+        """
+        user_rows = self.user_index.get_indexer(np.asarray(user_ids))
+        catalog_positions = self.catalog_index.get_indexer(self.movie_index)
+        in_catalog = catalog_positions >= 0
+        scores = np.full((len(user_rows), len(self.catalog_index)), np.nan)
+        scores[np.ix_(user_rows < 0, catalog_positions[in_catalog])] = 0
+        known = np.flatnonzero(user_rows >= 0)
+        for start in range(0, len(known), batch_size):
+            block = known[start : start + batch_size]
+            mean_ratings = self._neighbor_means(user_rows[block])
+            scores[np.ix_(block, catalog_positions[in_catalog])] = mean_ratings[
+                :, in_catalog
+            ]
+        return scores
+
+    def update_data(self, ratings: pd.DataFrame):
+        """
+        Actualiza los datos de calificaciones sin volver a entrenar todo el modelo.
+
+        Los clusters, la reducción TruncatedSVD y los centroides se conservan: los usuarios
+        nuevos se asignan al centroide más cercano y solo se recalculan las listas de vecinos
+        que pueden cambiar (ver _refresh_neighbors), sin construir ninguna matriz usuarios x
+        usuarios. Por eso el resultado coincide con recalcular todos los vecinos con los mismos
+        clusters, pero no con un entrenamiento completo, que vuelve a clusterizar a todos los
+        usuarios. Si se eliminan calificaciones o se supera drift_threshold, se vuelve a
+        entrenar todo.
+
+        Args:
+            ratings (pd.DataFrame): DataFrame con calificaciones de los usuarios.
+        """
+        delta = ratings_delta(self.ratings, ratings)
+        self.ratings = ratings
+        if delta is not None:
+            delta = delta.drop_duplicates(subset=["userId", "movieId"], keep="last")
+        if (
+            delta is None
+            or self._svd is None
+            or self._drift + len(delta) > self.drift_threshold * self._fitted_ratings
+        ):
+            self._fit()
+            return
+        if delta.empty:
+            return
+        self._drift += len(delta)
+
+        # Añade al final de los índices los usuarios y películas nuevos
+        n_previous_users = len(self.user_index)
+        self.user_index = self.user_index.append(
+            pd.Index(delta["userId"].unique()).difference(self.user_index)
+        )
+        self.movie_index = self.movie_index.append(
+            pd.Index(delta["movieId"].unique()).difference(self.movie_index)
+        )
+        n_users, n_movies = len(self.user_index), len(self.movie_index)
+        user_codes = self.user_index.get_indexer(delta["userId"].to_numpy())
+        movie_codes = self.movie_index.get_indexer(delta["movieId"].to_numpy())
+
+        # Sustituye en la matriz usuario-item las entradas modificadas por las nuevas
+        previous = self.user_item_matrix.tocoo()
+        replaced = np.isin(
+            previous.row.astype(np.int64) * n_movies + previous.col,
+            user_codes.astype(np.int64) * n_movies + movie_codes,
+        )
+        self.user_item_matrix = sparse.csr_matrix(
+            (
+                np.concatenate(
+                    [previous.data[~replaced], delta["rating"].to_numpy(dtype=float)]
+                ),
+                (
+                    np.concatenate([previous.row[~replaced], user_codes]),
+                    np.concatenate([previous.col[~replaced], movie_codes]),
+                ),
+            ),
+            shape=(n_users, n_movies),
+        )
+        self.centered_matrix = self._center_ratings()
+
+        affected = np.unique(user_codes)
+
+        # Los usuarios nuevos se asignan al centroide más cercano; los demás conservan su
+        # cluster hasta el próximo entrenamiento completo
+        previous_sizes = np.array([len(members) for members in self.cluster_members])
+        labels = np.empty(n_users, dtype=self.cluster_labels.dtype)
+        labels[:n_previous_users] = self.cluster_labels.to_numpy()
+        if n_users > n_previous_users:
+            new_features = self._svd.transform(
+                self.centered_matrix[n_previous_users:, : self._svd.n_features_in_]
+            )
+            labels[n_previous_users:] = self._kmeans.predict(new_features)
+        self.cluster_labels = pd.Series(labels, index=self.user_index, name="Cluster")
+
+        # Recalcula solo las listas de vecinos que pueden haber cambiado
+        self._refresh_neighbors(affected, previous_sizes)
@@ -0,0 +1,389 @@
+from recommenders.recommender_base import (
+    Recommender,
+    build_user_item_matrix,
+    top_n_positions,
+)
+from recommenders.ann_index import IVFIndex
+import numpy as np
+import pandas as pd
+
+
+class MatrixFactorizationRecommender(Recommender):
+    def __init__(
+        self,
+        movies,
+        ratings,
+        n_factors=32,
+        regularization=0.1,
+        iterations=10,
+        warm_iterations=3,
+        block_nnz=8192,
+        random_state=42,
+        n_lists=None,
+        n_probe=8,
+        fit=True,
+    ):
+        """
+        Inicializa el recomendador de factorización matricial entrenado con mínimos cuadrados alternos (ALS).
+
+        Parámetros:
+        movies (DataFrame): Datos de las películas.
+        ratings (DataFrame): Datos de las calificaciones de los usuarios para las películas.
+        n_factors (int): Dimensión de los factores latentes de usuarios y películas.
+        regularization (float): Regularización L2, escalada por el número de calificaciones de
+            cada usuario o película.
+        iterations (int): Número de iteraciones ALS del entrenamiento completo.
+        warm_iterations (int): Número de iteraciones ALS al actualizar los datos partiendo de
+            los factores ya entrenados.
+        block_nnz (int): Número aproximado de calificaciones procesadas por bloque al construir
+            los sistemas lineales; limita la memoria a unos 2 x block_nnz x n_factors valores.
+        random_state (int): Semilla de la inicialización de los factores.
+        n_lists (int, opcional): Número de particiones del índice aproximado (IVF) sobre los
+            factores de las películas. Si se indica, recommend solo puntúa las películas de las
+            n_probe particiones más prometedoras; si es None, puntúa todo el catálogo.
+        n_probe (int): Número de particiones del índice aproximado visitadas por consulta.
+        fit (bool): Si es False, no se entrenan los factores: el recomendador no se puede usar
+            hasta cargar unos factores con load_factors, que construye los índices de usuarios
+            y películas sin ejecutar el entrenamiento completo.
+        """
+        # Inicializa la clase base con los datos de películas y calificaciones
+        super().__init__(movies, ratings)
+        self.n_factors = n_factors
+        self.regularization = regularization
+        self.iterations = iterations
+        self.warm_iterations = warm_iterations
+        self.block_nnz = block_nnz
+        self.random_state = random_state
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+
+        if fit:
+            self._fit(self.iterations)
+
+    def _fit(self, iterations, previous=None, global_mean=None):
+        """
+        Construye la matriz usuario-item y entrena los factores con ALS.
+
+        Parámetros:
+        iterations (int): Número de iteraciones ALS.
+        previous (tuple): Índices y factores (user_index, movie_index, user_factors,
+            item_factors) de un entrenamiento anterior desde los que continuar, o None para
+            inicializar los factores al azar.
+        global_mean (float, opcional): Media global con la que se entrenaron los factores
+            anteriores; si es None, se calcula a partir de las calificaciones.
+        """
+        self.user_index, self.movie_index, self.user_item_matrix = (
+            build_user_item_matrix(self.ratings)
+        )
+        self._movie_ids = self.movie_index.to_numpy()
+
+        # Las calificaciones se centran en la media global; los factores modelan la desviación
+        if global_mean is None:
+            global_mean = (
+                self.user_item_matrix.data.mean() if self.user_item_matrix.nnz else 0.0
+            )
+        self.global_mean = global_mean
+        centered = self.user_item_matrix.copy()
+        centered.data = centered.data - self.global_mean
+        centered_t = centered.T.tocsr()
+
+        rng = np.random.default_rng(self.random_state)
+        n_users, n_movies = self.user_item_matrix.shape
+        self.user_factors = rng.normal(0, 0.1, (n_users, self.n_factors))
+        self.item_factors = rng.normal(0, 0.1, (n_movies, self.n_factors))
+        if previous is not None:
+            self._reuse_factors(*previous, centered, centered_t)
+
+        for _ in range(iterations):
+            self.user_factors = self._solve(centered, self.item_factors)
+            self.item_factors = self._solve(centered_t, self.user_factors)
+
+        # Índice aproximado de vecinos sobre los factores de las películas
+        self.ann_index = None
+        if self.n_lists is not None:
+            self.ann_index = IVFIndex(self.n_lists, self.n_probe).fit(self.item_factors)
+
+    def _reuse_factors(
+        self, user_index, movie_index, user_factors, item_factors, centered, centered_t
+    ):
+        """
+        Copia los factores de un entrenamiento anterior a los usuarios y películas que siguen existiendo.
+
+        Los usuarios y películas nuevos no se dejan con factores aleatorios: sus factores se
+        resuelven con una media iteración ALS frente a los factores copiados (primero los
+        usuarios, con las películas nuevas a cero, y después las películas), de modo que sus
+        predicciones tienen sentido aunque no se ejecute ninguna iteración más.
+
+        Parámetros:
+        user_index (Index): IDs de los usuarios de los factores anteriores.
+        movie_index (Index): IDs de las películas de los factores anteriores.
+        user_factors (numpy.ndarray): Factores anteriores de los usuarios.
+        item_factors (numpy.ndarray): Factores anteriores de las películas.
+        centered (scipy.sparse.csr_matrix): Calificaciones centradas, una fila por usuario.
+        centered_t (scipy.sparse.csr_matrix): Calificaciones centradas, una fila por película.
+        """
+        if user_factors.shape[1] != self.n_factors:
+            return
+        user_positions = user_index.get_indexer(self.user_index)
+        known_users = user_positions >= 0
+        self.user_factors[known_users] = user_factors[user_positions[known_users]]
+        movie_positions = movie_index.get_indexer(self.movie_index)
+        known_movies = movie_positions >= 0
+        self.item_factors[known_movies] = item_factors[movie_positions[known_movies]]
+
+        new_users = np.flatnonzero(~known_users)
+        new_movies = np.flatnonzero(~known_movies)
+        if len(new_users):
+            fixed = np.where(known_movies[:, None], self.item_factors, 0.0)
+            self.user_factors[new_users] = self._solve(centered[new_users], fixed)
+        if len(new_movies):
+            self.item_factors[new_movies] = self._solve(
+                centered_t[new_movies], self.user_factors
+            )
+
+    def _solve(self, matrix, fixed):
+        """
+        Resuelve la regresión ridge de cada fila de la matriz frente a los factores fijos.
+
+        Para cada fila u se resuelve (Σ_j f_j f_jᵀ + λ n_u I) x_u = Σ_j r_uj f_j, donde j recorre
+        las columnas calificadas. Las filas de un bloque se rellenan hasta la misma longitud para
+        obtener todas sus matrices de Gram con un único producto por lotes, y los sistemas se
+        resuelven juntos con np.linalg.solve (LAPACK).
+
+        Parámetros:
+        matrix (scipy.sparse.csr_matrix): Calificaciones centradas, una fila por incógnita.
+        fixed (numpy.ndarray): Factores fijos de las columnas.
+
+        Devuelve:
+        numpy.ndarray: Factores de las filas (0 para las filas sin calificaciones).
+        """
+        n_rows = matrix.shape[0]
+        k = fixed.shape[1]
+        indptr = matrix.indptr
+        counts = np.diff(indptr)
+        factors = np.zeros((n_rows, k))
+        identity = np.eye(k)
+
+        # Fila de ceros al final de los factores fijos para rellenar las filas más cortas
+        padded_fixed = np.vstack([fixed, np.zeros((1, k))])
+        padded_indices = np.append(matrix.indices, len(fixed))
+        padded_data = np.append(matrix.data, 0.0)
+        padding = matrix.nnz
+
+        # Agrupa las filas por potencias de 2 de su número de calificaciones, de modo que el
+        # relleno hasta la fila más larga de cada bloque como mucho duplica el trabajo
+        rows = np.flatnonzero(counts > 0)
+        buckets = np.floor(np.log2(counts[rows])).astype(int)
+        for bucket in np.unique(buckets):
+            bucket_rows = rows[buckets == bucket]
+            length = counts[bucket_rows].max()
+            slots = np.arange(length)
+            step = max(self.block_nnz // length, 1)
+            for start in range(0, len(bucket_rows), step):
+                block = bucket_rows[start : start + step]
+
+                # Posiciones de las entradas de cada fila, rellenadas con la entrada nula
+                positions = np.where(
+                    slots < counts[block, None], indptr[block, None] + slots, padding
+                )
+                columns = padded_fixed[padded_indices[positions]]
+                values = padded_data[positions]
+
+                # Σ_j f_j f_jᵀ y Σ_j r_uj f_j con productos de matrices por lotes (BLAS)
+                columns_t = columns.transpose(0, 2, 1)
+                gram = columns_t @ columns
+                rhs = columns_t @ values[:, :, None]
+                gram += self.regularization * counts[block, None, None] * identity
+                factors[block] = np.linalg.solve(gram, rhs)[:, :, 0]
+        return factors
+
+    def _predict(self, user_rows):
+        """
+        Calcula la calificación estimada de todas las películas para varios usuarios.
+
+        Parámetros:
+        user_rows (numpy.ndarray): Posiciones de los usuarios en user_index.
+
+        Devuelve:
+        numpy.ndarray: Matriz (usuarios x películas de movie_index) con las estimaciones; -inf
+            en las películas ya calificadas por cada usuario.
+        """
+        scores = self.global_mean + self.user_factors[user_rows] @ self.item_factors.T
+        rated = self.user_item_matrix[user_rows].tocoo()
+        scores[rated.row, rated.col] = -np.inf
+        return scores
+
+    def recommend(self, user_id, top_n=10):
+        """
+        Recomienda las películas con mayor calificación estimada por el producto de factores.
+
+        Parámetros:
+        user_id (int): ID del usuario para el que se harán las recomendaciones.
+        top_n (int): Número de películas a recomendar.
+
+        Devuelve:
+        numpy.ndarray: IDs de las películas recomendadas.
+        """
+        # Si el ID del usuario no está en la matriz usuario-item, devuelve una lista vacía
+        user_row = self.user_index.get_indexer([user_id])[0]
+        if user_row < 0:
+            return []
+
+        if self.ann_index is not None:
+            recommended = self._recommend_approximate(np.array([user_row]), top_n)[0]
+            return recommended[recommended >= 0]
+
+        scores = self.global_mean + self.item_factors @ self.user_factors[user_row]
+        indptr = self.user_item_matrix.indptr
+        scores[
+            self.user_item_matrix.indices[indptr[user_row] : indptr[user_row + 1]]
+        ] = -np.inf
+        positions = top_n_positions(scores, top_n)
+        return self._movie_ids[positions[positions >= 0]]
+
+    def _recommend_approximate(self, user_rows, top_n):
+        """
+        Recomienda películas a un bloque de usuarios buscando sus factores en el índice IVF.
+
+        Parámetros:
+        user_rows (numpy.ndarray): Posiciones de los usuarios en user_index.
+        top_n (int): Número de películas a recomendar por usuario.
+
+        Devuelve:
+        numpy.ndarray: Matriz (usuarios x top_n) con los IDs recomendados; -1 donde no hay recomendación.
+        """
+        rated = self.user_item_matrix[user_rows]
+        n_rated = np.diff(rated.indptr)
+        n_movies = len(self._movie_ids)
+
+        # Pide tantos candidatos adicionales como películas calificadas, que se descartan después
+        candidates, scores = self.ann_index.search(
+            self.user_factors[user_rows], top_n + n_rated.max()
+        )
+        rated_keys = np.repeat(np.arange(len(user_rows)), n_rated) * n_movies + (
+            rated.indices
+        )
+        candidate_keys = np.arange(len(user_rows))[:, None] * n_movies + candidates
+        scores[np.isin(candidate_keys, rated_keys) | (candidates < 0)] = -np.inf
+
+        top = top_n_positions(scores, top_n)
+        recommendations = np.full((len(user_rows), top_n), -1, dtype=np.int64)
+        movie_positions = np.take_along_axis(candidates, np.maximum(top, 0), axis=1)
+        recommendations[:, : top.shape[1]] = np.where(
+            top >= 0, self._movie_ids[movie_positions], -1
+        )
+        return recommendations
+
+    def recommend_many(self, user_ids, top_n=10, batch_size=256):
+        """
+        Recomienda películas a varios usuarios con un producto de matrices por bloque.
+
+        Parámetros:
+        user_ids (array-like): IDs de los usuarios para los que se harán las recomendaciones.
+        top_n (int): Número de películas a recomendar por usuario.
+        batch_size (int): Número de usuarios puntuados en cada bloque.
+
+        Devuelve:
+        numpy.ndarray: Matriz (usuarios x top_n) con los IDs recomendados; -1 donde no hay recomendación.
+        """
+        recommendations = np.full((len(user_ids), top_n), -1, dtype=np.int64)
+        user_rows = self.user_index.get_indexer(user_ids)
+        known_users = np.flatnonzero(user_rows >= 0)
+
+        for start in range(0, len(known_users), batch_size):
+            block = known_users[start : start + batch_size]
+            if self.ann_index is not None:
+                recommendations[block] = self._recommend_approximate(
+                    user_rows[block], top_n
+                )
+                continue
+            positions = top_n_positions(self._predict(user_rows[block]), top_n)
+            recommendations[block, : positions.shape[1]] = np.where(
+                positions >= 0, self._movie_ids[positions], -1
+            )
+        return recommendations
+
+    def score_many(self, user_ids, batch_size=256):
+        """
+        Puntúa todas las películas del catálogo con la calificación estimada para varios usuarios.
+
+        Parámetros:
+        user_ids (array-like): IDs de los usuarios.
+        batch_size (int): Número de usuarios puntuados en cada bloque.
+
+        Devuelve:
+        numpy.ndarray: Matriz (usuarios x películas del catálogo); NaN para las películas ya
+            calificadas, las que no tienen calificaciones y los usuarios desconocidos.
+        """
+        scores = np.full((len(user_ids), len(self.catalog_index)), np.nan)
+        user_rows = self.user_index.get_indexer(user_ids)
+        known_users = np.flatnonzero(user_rows >= 0)
+
+        # Posiciones en el catálogo de las películas con factores
+        catalog_positions = self.catalog_index.get_indexer(self.movie_index)
+        in_catalog = catalog_positions >= 0
+
+        for start in range(0, len(known_users), batch_size):
+            block = known_users[start : start + batch_size]
+            block_scores = self._predict(user_rows[block])[:, in_catalog]
+            block_scores[np.isinf(block_scores)] = np.nan
+            scores[np.ix_(block, catalog_positions[in_catalog])] = block_scores
+        return scores
+
+    def update_data(self, ratings):
+        """
+        Actualiza los datos de calificaciones y reentrena los factores partiendo de los actuales.
+
+        Los usuarios y películas existentes conservan sus factores como punto de partida, por lo
+        que bastan warm_iterations iteraciones en lugar de un entrenamiento completo.
+
+        Parámetros:
+        ratings (DataFrame): Datos de las calificaciones de los usuarios para las películas.
+        """
+        previous = (
+            self.user_index,
+            self.movie_index,
+            self.user_factors,
+            self.item_factors,
+        )
+        self.ratings = ratings
+        self._fit(self.warm_iterations, previous)
+
+    def save_factors(self, path):
+        """
+        Guarda los factores entrenados y sus índices en un archivo .npz.
+
+        Parámetros:
+        path (str): Ruta del archivo.
+        """
+        np.savez(
+            path,
+            user_ids=self.user_index.to_numpy(),
+            movie_ids=self.movie_index.to_numpy(),
+            user_factors=self.user_factors,
+            item_factors=self.item_factors,
+            global_mean=self.global_mean,
+        )
+
+    def load_factors(self, path, iterations=0):
+        """
+        Carga factores guardados con save_factors y los alinea con las calificaciones actuales.
+
+        Se restaura la media global con la que se entrenaron los factores. Los usuarios y
+        películas que no aparecen en el archivo se resuelven a partir de los factores cargados
+        (véase _reuse_factors); con iterations > 0 todos los factores se refinan después. Para
+        no entrenar los factores antes de sustituirlos, el recomendador se crea con fit=False.
+
+        Parámetros:
+        path (str): Ruta del archivo.
+        iterations (int): Número de iteraciones ALS a ejecutar después de cargar.
+        """
+        with np.load(path) as saved:
+            previous = (
+                pd.Index(saved["user_ids"]),
+                pd.Index(saved["movie_ids"]),
+                saved["user_factors"],
+                saved["item_factors"],
+            )
+            global_mean = float(saved["global_mean"])
+        self._fit(iterations, previous, global_mean)
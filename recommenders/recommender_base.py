@@ -1,7 +1,18 @@
 # recommender_base.py
 
+import json
+import os
+import pickle
+import shutil
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
 
 class Recommender:
+    # Atributos que save no guarda (por ejemplo, pools de hilos); load los deja a None
+    _unsaved_attributes = ()
+
     def __init__(self, movies, ratings):
         """
         Clase base para los recomendadores.
@@ -13,6 +24,10 @@ class Recommender:
         self.movies = movies
         self.ratings = ratings
 
+        # Índice de películas compartido por todos los recomendadores construidos con el mismo
+        # catálogo; las puntuaciones de score_many se alinean con él
+        self.catalog_index = pd.Index(movies["movieId"].unique())
+
     def evaluate(self, user_id):
         """
         Evalúa todas las películas para un usuario dado y devuelve una serie de puntuaciones.
@@ -23,6 +38,857 @@ class Recommender:
         Returns:
             pd.Series: Serie con IDs de películas como índice y puntuaciones como valores.
         """
-        raise NotImplementedError(
-            "El método evaluate debe ser implementado por las subclases."
+        if type(self).score_many is Recommender.score_many:
+            raise NotImplementedError(
+                "El método evaluate debe ser implementado por las subclases."
+            )
+        scores = pd.Series(self.score(user_id), index=self.catalog_index)
+        return scores.dropna().sort_values(ascending=False)
+
+    def score(self, user_id):
+        """
+        Puntúa todas las películas del catálogo para un usuario.
+
+        Args:
+            user_id (int): ID del usuario.
+
+        Returns:
+            np.ndarray: Puntuaciones alineadas con catalog_index; NaN para las películas que
+                no se puntúan (por ejemplo, las ya calificadas por el usuario).
+        """
+        return self.score_many([user_id])[0]
+
+    def score_many(self, user_ids, batch_size=256):
+        """
+        Puntúa todas las películas del catálogo para varios usuarios.
+
+        La implementación base se apoya en evaluate; las subclases la sobrescriben para
+        puntuar bloques de usuarios con operaciones matriciales.
+
+        Args:
+            user_ids (array-like): IDs de los usuarios.
+            batch_size (int): Número de usuarios puntuados en cada bloque.
+
+        Returns:
+            np.ndarray: Matriz (usuarios x películas del catálogo) alineada con catalog_index;
+                NaN para las películas que no se puntúan.
+        """
+        scores = np.full((len(user_ids), len(self.catalog_index)), np.nan)
+        for i, user_id in enumerate(user_ids):
+            scores[i] = self.evaluate(user_id).reindex(self.catalog_index).to_numpy()
+        return scores
+
+    def save(self, path, key=None):
+        """
+        Guarda el recomendador entrenado en un directorio.
+
+        Los arrays de NumPy, las matrices CSR, los índices numéricos y las columnas de los
+        DataFrames se guardan como archivos .npy para que load pueda abrirlos con mmap_mode; el
+        resto del estado se guarda con pickle en state.pkl. Un mismo objeto (por ejemplo, el
+        DataFrame de calificaciones que comparten el híbrido y sus recomendadores base) se
+        guarda una sola vez.
+
+        Cada llamada escribe una versión nueva en un subdirectorio (v1, v2, ...) y la versión
+        pasa a ser la actual cuando se escribe su state.pkl. Los archivos de versiones
+        anteriores no se sustituyen, por lo que los procesos que los tienen proyectados en
+        memoria no se ven afectados; se conservan las dos últimas versiones completas y las
+        anteriores se borran si ningún proceso las tiene abiertas.
+
+        Cada versión tiene un manifest.json con la versión del formato de los archivos y la
+        clave del modelo, que load_or_build compara para decidir si el modelo guardado sirve.
+
+        Args:
+            path (str): Directorio donde se guarda el modelo. Se crea si no existe.
+            key (dict, optional): Descripción de cómo se construyó el modelo (véase
+                load_or_build).
+        """
+        version = _new_version(path)
+        state = _save_state(self._saved_state(), version, shared={})
+        _write_file(
+            os.path.join(version, "manifest.json"),
+            lambda file: file.write(
+                json.dumps({"format": _FORMAT_VERSION, "key": key}).encode()
+            ),
+        )
+        _write_file(
+            os.path.join(version, "state.pkl"),
+            lambda file: pickle.dump({"class": type(self), "state": state}, file),
+        )
+        _remove_old_versions(path)
+
+    def _saved_state(self):
+        """
+        Devuelve los atributos que guarda save.
+
+        Returns:
+            dict: Atributos del recomendador, sin los de _unsaved_attributes.
+        """
+        return {
+            name: value
+            for name, value in vars(self).items()
+            if name not in self._unsaved_attributes
+        }
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        """
+        Carga un recomendador guardado con save.
+
+        Con mmap_mode, los arrays se proyectan en memoria en lugar de leerse: la carga es casi
+        inmediata y varios procesos comparten las mismas páginas. Los métodos de actualización
+        crean arrays nuevos en lugar de modificar los cargados, por lo que funcionan también
+        con mmap_mode="r".
+
+        Args:
+            path (str): Directorio donde se guardó el modelo.
+            mmap_mode (str, optional): Modo de np.load para los arrays ("r", "c" o None para
+                cargarlos en memoria). Por defecto es "r".
+
+        Returns:
+            Recommender: El recomendador guardado, de la clase con la que se guardó.
+        """
+        version = _current_version(path)
+        if version is None:
+            raise FileNotFoundError(f"No hay ningún modelo guardado en {path}.")
+        with open(os.path.join(version, "state.pkl"), "rb") as file:
+            saved = pickle.load(file)
+        recommender_class = saved["class"]
+        if not issubclass(recommender_class, cls):
+            raise TypeError(
+                f"El modelo guardado en {path} es un {recommender_class.__name__}, "
+                f"no un {cls.__name__}."
+            )
+        return _restore(recommender_class, saved["state"], version, mmap_mode, {})
+
+    def recommend_many(self, user_ids, top_n=10, batch_size=256):
+        """
+        Recomienda películas a varios usuarios a la vez.
+
+        La implementación base llama a recommend para cada usuario; las subclases la
+        sobrescriben para puntuar bloques de usuarios con operaciones matriciales.
+
+        Args:
+            user_ids (array-like): IDs de los usuarios.
+            top_n (int): Número de películas a recomendar por usuario.
+            batch_size (int): Número de usuarios puntuados en cada bloque.
+
+        Returns:
+            np.ndarray: Matriz (usuarios x top_n) con los IDs de las películas recomendadas.
+                Las posiciones sin recomendación contienen -1.
+        """
+        recommendations = np.full((len(user_ids), top_n), -1, dtype=np.int64)
+        for i, user_id in enumerate(user_ids):
+            recommended = np.asarray(self.recommend(user_id, top_n), dtype=np.int64)
+            recommendations[i, : len(recommended)] = recommended[:top_n]
+        return recommendations
+
+
+def build_user_item_matrix(ratings, movie_index=None):
+    """
+    Construye la matriz dispersa usuario-película a partir de las calificaciones.
+
+    Args:
+        ratings (pd.DataFrame o StreamedRatings): Calificaciones con las columnas userId,
+            movieId y rating. Con StreamedRatings se reutiliza su matriz ya construida.
+        movie_index (pd.Index, optional): IDs de película que definen las columnas. Si no se
+            proporciona, se usan los IDs calificados ordenados; las calificaciones de películas
+            que no están en el índice se descartan.
+
+    Returns:
+        tuple: (user_index, movie_index, matrix), donde user_index y movie_index son pd.Index
+            con los IDs de cada fila y columna, y matrix es una scipy.sparse.csr_matrix.
+    """
+    if not isinstance(ratings, pd.DataFrame):
+        return _streamed_user_item_matrix(ratings, movie_index)
+
+    # Si un usuario calificó varias veces la misma película, se conserva la última calificación
+    ratings = ratings.drop_duplicates(subset=["userId", "movieId"], keep="last")
+
+    user_ids, user_codes = np.unique(ratings["userId"].to_numpy(), return_inverse=True)
+    if movie_index is None:
+        movie_ids, movie_codes = np.unique(
+            ratings["movieId"].to_numpy(), return_inverse=True
+        )
+        movie_index = pd.Index(movie_ids)
+    else:
+        movie_codes = movie_index.get_indexer(ratings["movieId"].to_numpy())
+
+    known = movie_codes >= 0
+    matrix = sparse.csr_matrix(
+        (
+            ratings["rating"].to_numpy(dtype=float)[known],
+            (user_codes[known], movie_codes[known]),
+        ),
+        shape=(len(user_ids), len(movie_index)),
+    )
+    return pd.Index(user_ids), movie_index, matrix
+
+
+def _streamed_user_item_matrix(ratings, movie_index):
+    """
+    Obtiene la matriz usuario-película de un StreamedRatings, con las columnas de movie_index.
+
+    Args:
+        ratings (StreamedRatings): Calificaciones leídas por bloques.
+        movie_index (pd.Index): IDs de película que definen las columnas, o None para usar
+            los de las calificaciones.
+
+    Returns:
+        tuple: (user_index, movie_index, matrix), como build_user_item_matrix.
+    """
+    if movie_index is None:
+        return ratings.user_index, ratings.movie_index, ratings.user_item
+
+    # Cambia las columnas al índice pedido, descartando las películas que no están en él
+    columns = movie_index.get_indexer(ratings.movie_index)
+    entries = ratings.user_item.tocoo()
+    entry_columns = columns[entries.col]
+    known = entry_columns >= 0
+    matrix = sparse.csr_matrix(
+        (entries.data[known], (entries.row[known], entry_columns[known])),
+        shape=(len(ratings.user_index), len(movie_index)),
+    )
+    return ratings.user_index, movie_index, matrix
+
+
+def sorted_rating_columns(ratings):
+    """
+    Obtiene las columnas de las calificaciones ordenadas por usuario y timestamp.
+
+    Los timestamps ausentes se ordenan al final de la secuencia de su usuario, como en
+    sort_values.
+
+    Args:
+        ratings (pd.DataFrame o StreamedRatings): Calificaciones con las columnas userId,
+            movieId y timestamp.
+
+    Returns:
+        tuple: (user_ids, movie_ids, timestamps) como np.ndarray; los timestamps son float
+            con NaN para los ausentes.
+    """
+    if isinstance(ratings, pd.DataFrame):
+        ratings = ratings.sort_values(by=["userId", "timestamp"])
+        return (
+            ratings["userId"].to_numpy(),
+            ratings["movieId"].to_numpy(),
+            ratings["timestamp"].to_numpy(dtype=float),
+        )
+    order = ratings.sequence_order
+    return (
+        ratings.user_ids[order],
+        ratings.movie_ids[order],
+        ratings.timestamps[order],
+    )
+
+
+def _last_ratings(ratings):
+    """
+    Obtiene la última calificación de cada par (userId, movieId), en el orden original.
+
+    Args:
+        ratings (pd.DataFrame o StreamedRatings): Calificaciones.
+
+    Returns:
+        pd.DataFrame: Filas con las columnas de las calificaciones; con StreamedRatings, el
+            índice son las posiciones de las filas.
+    """
+    if isinstance(ratings, pd.DataFrame):
+        return ratings.drop_duplicates(subset=["userId", "movieId"], keep="last")
+    last = ratings.last_positions()
+    return pd.DataFrame(
+        {name: values[last] for name, values in ratings.columns().items()},
+        index=last,
+    )
+
+
+def ratings_delta(previous, current):
+    """
+    Obtiene las calificaciones nuevas o modificadas entre dos versiones de los datos.
+
+    Args:
+        previous (pd.DataFrame o StreamedRatings): Calificaciones anteriores.
+        current (pd.DataFrame o StreamedRatings): Calificaciones actualizadas.
+
+    Returns:
+        pd.DataFrame: Filas de current cuyo par (userId, movieId) es nuevo o cuya calificación
+            cambió, o None si alguna calificación anterior ya no está en current.
+    """
+    keys = ["userId", "movieId"]
+    previous = _last_ratings(previous)[keys + ["rating"]]
+    current = _last_ratings(current)
+    merged = current[keys + ["rating"]].merge(
+        previous, on=keys, how="left", suffixes=("", "_previous")
+    )
+    previous_ratings = merged["rating_previous"].to_numpy(dtype=float)
+
+    # Alguna calificación anterior fue eliminada
+    if np.count_nonzero(~np.isnan(previous_ratings)) < len(previous):
+        return None
+
+    changed = np.isnan(previous_ratings) | (
+        merged["rating"].to_numpy(dtype=float) != previous_ratings
+    )
+    return current[changed]
+
+
+def top_n_positions(scores, top_n):
+    """
+    Selecciona las posiciones con las puntuaciones más altas de cada fila sin ordenar toda la fila.
+
+    Los empates se resuelven a favor de la posición más baja, igual que una ordenación estable
+    descendente. Las puntuaciones -inf se consideran excluidas.
+
+    Args:
+        scores (np.ndarray): Vector o matriz (filas x elementos) de puntuaciones.
+        top_n (int): Número de posiciones a seleccionar por fila.
+
+    Returns:
+        np.ndarray: Posiciones ordenadas de mayor a menor puntuación, con la misma dimensión
+            que scores. Las posiciones con puntuación -inf se marcan con -1.
+    """
+    scores = np.asarray(scores, dtype=float)
+    single = scores.ndim == 1
+    scores = np.atleast_2d(scores)
+    n_rows, n_items = scores.shape
+    top_n = min(top_n, n_items)
+    if top_n <= 0:
+        positions = np.empty((n_rows, 0), dtype=np.int64)
+        return positions[0] if single else positions
+
+    # Valor de la posición top_n de cada fila
+    kth = -np.partition(-scores, top_n - 1, axis=1)[:, top_n - 1 : top_n]
+
+    # Todas las puntuaciones mayores entran; los empates con kth se completan por posición
+    greater = scores > kth
+    ties = scores == kth
+    free_slots = top_n - greater.sum(axis=1, keepdims=True)
+    selected = greater | (ties & (np.cumsum(ties, axis=1) <= free_slots))
+
+    # np.nonzero devuelve las posiciones en orden ascendente dentro de cada fila
+    positions = np.nonzero(selected)[1].reshape(n_rows, top_n)
+    selected_scores = np.take_along_axis(scores, positions, axis=1)
+    order = np.argsort(-selected_scores, axis=1, kind="stable")
+    positions = np.take_along_axis(positions, order, axis=1)
+    positions[np.take_along_axis(selected_scores, order, axis=1) == -np.inf] = -1
+    return positions[0] if single else positions
+
+
+# Versión del formato de los archivos que escribe save. Si cambia, load_or_build vuelve a
+# construir los modelos guardados con un formato anterior
+_FORMAT_VERSION = 2
+
+
+class _Stored:
+    def __init__(self, kind, name, **details):
+        """
+        Referencia, dentro de state.pkl, a un valor guardado en archivos aparte.
+
+        Args:
+            kind (str): Tipo de valor ("array", "csr", "index", "frame", "object" o
+                "recommenders").
+            name (str): Nombre base de los archivos del valor.
+            **details: Datos necesarios para reconstruir el valor (forma, clase, estado, ...).
+        """
+        self.kind = kind
+        self.name = name
+        self.details = details
+
+
+# Arrays de pandas con nulos (Int64, Float64, boolean): se guardan como valores y máscara
+_MASKED_ARRAYS = (
+    pd.arrays.IntegerArray,
+    pd.arrays.FloatingArray,
+    pd.arrays.BooleanArray,
+)
+
+
+def _versions(path):
+    """
+    Enumera las versiones guardadas de un modelo.
+
+    Args:
+        path (str): Directorio del modelo.
+
+    Returns:
+        list: Pares (número, directorio) ordenados por número de versión.
+    """
+    if not os.path.isdir(path):
+        return []
+    versions = [
+        (int(entry[1:]), os.path.join(path, entry))
+        for entry in os.listdir(path)
+        if entry[:1] == "v" and entry[1:].isdigit()
+    ]
+    return sorted(versions)
+
+
+def _complete_versions(path):
+    """
+    Enumera las versiones de un modelo que ya tienen state.pkl, el último archivo que se escribe.
+
+    Args:
+        path (str): Directorio del modelo.
+
+    Returns:
+        list: Pares (número, directorio) ordenados por número de versión.
+    """
+    return [
+        (number, version)
+        for number, version in _versions(path)
+        if os.path.exists(os.path.join(version, "state.pkl"))
+    ]
+
+
+def _current_version(path):
+    """
+    Devuelve el directorio de la última versión completa de un modelo.
+
+    Args:
+        path (str): Directorio del modelo.
+
+    Returns:
+        str: Directorio de la versión, o None si no hay ninguna versión completa.
+    """
+    versions = _complete_versions(path)
+    return versions[-1][1] if versions else None
+
+
+def _new_version(path):
+    """
+    Crea el directorio de una versión nueva, con un número mayor que el de las existentes.
+
+    Si otro proceso crea la misma versión a la vez, se prueba con el número siguiente.
+
+    Args:
+        path (str): Directorio del modelo. Se crea si no existe.
+
+    Returns:
+        str: Directorio de la versión creada.
+    """
+    os.makedirs(path, exist_ok=True)
+    versions = _versions(path)
+    number = versions[-1][0] + 1 if versions else 1
+    while True:
+        version = os.path.join(path, f"v{number}")
+        try:
+            os.mkdir(version)
+            return version
+        except FileExistsError:
+            number += 1
+
+
+def _remove_old_versions(path):
+    """
+    Borra las versiones anteriores a la penúltima versión completa.
+
+    La penúltima se conserva para los procesos que la eligieron justo antes de que se
+    completara la última. Las versiones incompletas posteriores pueden estar escribiéndose
+    en otro proceso y no se tocan. Los archivos que no se pueden borrar (en Windows, los que
+    otro proceso tiene proyectados en memoria) se dejan para el siguiente save.
+
+    Args:
+        path (str): Directorio del modelo.
+    """
+    complete = _complete_versions(path)
+    if len(complete) < 2:
+        return
+    oldest_kept = complete[-2][0]
+    for number, version in _versions(path):
+        if number < oldest_kept:
+            shutil.rmtree(version, ignore_errors=True)
+
+
+def _write_file(filename, write):
+    """
+    Escribe un archivo con un nombre temporal y lo renombra al terminar, de modo que el
+    archivo final solo existe cuando está completo.
+
+    Args:
+        filename (str): Ruta final del archivo.
+        write (callable): Función que recibe el archivo abierto en modo binario y lo escribe.
+    """
+    temporary = filename + ".tmp"
+    with open(temporary, "wb") as file:
+        write(file)
+    os.replace(temporary, filename)
+
+
+def _save_array(path, name, array):
+    """
+    Guarda un array en path/name.npy.
+
+    Args:
+        path (str): Directorio de la versión del modelo.
+        name (str): Nombre del archivo sin extensión.
+        array (np.ndarray): Array a guardar.
+    """
+    np.save(os.path.join(path, name + ".npy"), np.ascontiguousarray(array))
+
+
+def _save_frame(path, name, frame):
+    """
+    Guarda las columnas de un DataFrame como archivos .npy.
+
+    Las columnas numéricas se guardan tal cual; las categóricas, como sus códigos (las
+    categorías van en state.pkl con el tipo de la columna); las numéricas con nulos de pandas,
+    como sus valores y su máscara; y las de texto, como los bytes UTF-8 de todos los valores
+    seguidos, sus desplazamientos y la máscara de valores ausentes.
+
+    Args:
+        path (str): Directorio de la versión del modelo.
+        name (str): Prefijo de los nombres de archivo.
+        frame (pd.DataFrame): DataFrame a guardar.
+
+    Returns:
+        _Stored: Referencia al DataFrame guardado, o None si tiene columnas o un índice que
+            no se pueden guardar así (y debe guardarse con pickle).
+    """
+    index = frame.index
+    if isinstance(index, pd.RangeIndex):
+        index_details = ("range", index.start, index.stop, index.step, index.name)
+    elif index.dtype.kind in "biuf":
+        index_details = ("array", index.name)
+    else:
+        return None
+
+    kinds = []
+    for _, values in frame.items():
+        if isinstance(values.dtype, np.dtype) and values.dtype.kind in "biufM":
+            kinds.append("array")
+        elif isinstance(values.dtype, pd.CategoricalDtype):
+            kinds.append("category")
+        elif isinstance(values.array, _MASKED_ARRAYS):
+            kinds.append("masked")
+        elif pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty"):
+            kinds.append("text")
+        else:
+            return None
+
+    if index_details[0] == "array":
+        _save_array(path, name + ".index", index.to_numpy())
+    columns = []
+    for position, ((column, values), kind) in enumerate(zip(frame.items(), kinds)):
+        column_name = f"{name}.{position}"
+        if kind == "array":
+            _save_array(path, column_name, values.to_numpy())
+        elif kind == "category":
+            _save_array(path, column_name, values.cat.codes.to_numpy())
+        elif kind == "masked":
+            missing = values.isna().to_numpy()
+            _save_array(
+                path,
+                column_name,
+                values.to_numpy(dtype=values.dtype.numpy_dtype, na_value=0),
+            )
+            _save_array(path, column_name + ".missing", missing)
+        else:
+            missing = values.isna().to_numpy()
+            encoded = [text.encode("utf-8") for text in values[~missing]]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(text) for text in encoded], out=offsets[1:])
+            _save_array(
+                path,
+                column_name + ".bytes",
+                np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            )
+            _save_array(path, column_name + ".offsets", offsets)
+            _save_array(path, column_name + ".missing", missing)
+        columns.append((column, kind, values.dtype))
+    return _Stored("frame", name, columns=columns, index=index_details)
+
+
+def _save_state(state, path, prefix="", shared=None):
+    """
+    Guarda como .npy los arrays de un diccionario de atributos y sustituye cada uno por una
+    referencia _Stored; el resto de valores se devuelven sin cambios para pickle.
+
+    Los objetos de las clases del paquete (por ejemplo, los índices de vecinos o
+    StreamedRatings) y las listas de recomendadores se guardan de forma recursiva. Un
+    objeto que ya se guardó en la misma llamada a save se sustituye por la misma referencia.
+
+    Args:
+        state (dict): Atributos a guardar.
+        path (str): Directorio de la versión del modelo.
+        prefix (str, optional): Prefijo de los nombres de archivo, para objetos anidados.
+        shared (dict, optional): Objetos ya guardados, por id, con su referencia _Stored.
+
+    Returns:
+        dict: Atributos con los arrays sustituidos por referencias _Stored.
+    """
+    if shared is None:
+        shared = {}
+    saved = {}
+    for attribute, value in state.items():
+        name = prefix + attribute
+        stored = None
+        if id(value) in shared:
+            stored = shared[id(value)][1]
+        elif isinstance(value, np.ndarray) and value.dtype != object:
+            _save_array(path, name, value)
+            stored = _Stored("array", name)
+        elif sparse.issparse(value) and value.format == "csr":
+            matrix = value.copy()
+            matrix.sort_indices()
+            _save_array(path, name + ".data", matrix.data)
+            _save_array(path, name + ".indices", matrix.indices)
+            _save_array(path, name + ".indptr", matrix.indptr)
+            stored = _Stored("csr", name, shape=matrix.shape, sparse_class=type(matrix))
+        elif isinstance(value, pd.Index) and value.dtype.kind in "biuf":
+            _save_array(path, name, value.to_numpy())
+            stored = _Stored("index", name, index_name=value.name)
+        elif isinstance(value, pd.DataFrame):
+            stored = _save_frame(path, name, value)
+        elif (
+            isinstance(value, list)
+            and value
+            and all(isinstance(item, Recommender) for item in value)
+        ):
+            stored = _Stored(
+                "recommenders",
+                name,
+                recommenders=[
+                    (
+                        type(item),
+                        _save_state(
+                            item._saved_state(), path, f"{name}_{position}.", shared
+                        ),
+                    )
+                    for position, item in enumerate(value)
+                ],
+            )
+        elif hasattr(value, "__dict__") and (
+            type(value).__module__.startswith("recommenders.")
+            or type(value).__module__ == "data_loader"
+        ):
+            stored = _Stored(
+                "object",
+                name,
+                object_class=type(value),
+                state=_save_state(vars(value), path, name + ".", shared),
+            )
+
+        if stored is None:
+            saved[attribute] = value
+        else:
+            # Se conserva el objeto para que su id no se reutilice mientras dura save
+            shared[id(value)] = (value, stored)
+            saved[attribute] = stored
+    return saved
+
+
+def _load_frame(stored, load_array):
+    """
+    Reconstruye un DataFrame guardado con _save_frame.
+
+    Las columnas numéricas usan directamente los arrays cargados (proyectados en memoria con
+    mmap_mode), sin copiarlos.
+
+    Args:
+        stored (_Stored): Referencia al DataFrame.
+        load_array (callable): Función que carga un array a partir de su nombre.
+
+    Returns:
+        pd.DataFrame: El DataFrame guardado.
+    """
+    columns = {}
+    for position, (_, kind, dtype) in enumerate(stored.details["columns"]):
+        column_name = f"{stored.name}.{position}"
+        if kind == "array":
+            columns[position] = np.asarray(load_array(column_name))
+            continue
+        if kind == "category":
+            columns[position] = pd.Categorical.from_codes(
+                np.asarray(load_array(column_name)), dtype=dtype
+            )
+            continue
+        if kind == "masked":
+            columns[position] = dtype.construct_array_type()(
+                np.asarray(load_array(column_name)),
+                np.asarray(load_array(column_name + ".missing")),
+            )
+            continue
+        buffer = bytes(np.asarray(load_array(column_name + ".bytes")))
+        offsets = load_array(column_name + ".offsets")
+        missing = np.asarray(load_array(column_name + ".missing"))
+        values = np.full(len(missing), np.nan, dtype=object)
+        values[~missing] = [
+            buffer[start:end].decode("utf-8")
+            for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())
+        ]
+        columns[position] = pd.Series(values, dtype=dtype).array
+
+    index_details = stored.details["index"]
+    if index_details[0] == "range":
+        _, start, stop, step, index_name = index_details
+        index = pd.RangeIndex(start, stop, step, name=index_name)
+    else:
+        index = pd.Index(load_array(stored.name + ".index"), name=index_details[1])
+
+    frame = pd.DataFrame(columns, index=index, copy=False)
+    frame.columns = [column for column, _, _ in stored.details["columns"]]
+    return frame
+
+
+def _load_state(state, path, mmap_mode, loaded):
+    """
+    Reconstruye los atributos guardados con _save_state.
+
+    Args:
+        state (dict): Atributos con referencias _Stored.
+        path (str): Directorio de la versión del modelo.
+        mmap_mode (str): Modo de np.load para los arrays.
+        loaded (dict): Valores ya reconstruidos en la misma carga, por nombre; las
+            referencias repetidas devuelven el mismo objeto.
+
+    Returns:
+        dict: Atributos con los arrays cargados.
+    """
+
+    def load_array(name):
+        return np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode)
+
+    result = {}
+    for attribute, value in state.items():
+        if not isinstance(value, _Stored):
+            result[attribute] = value
+            continue
+        if value.name in loaded:
+            result[attribute] = loaded[value.name]
+            continue
+
+        if value.kind == "array":
+            restored = load_array(value.name)
+        elif value.kind == "csr":
+            restored = value.details["sparse_class"](
+                (
+                    load_array(value.name + ".data"),
+                    load_array(value.name + ".indices"),
+                    load_array(value.name + ".indptr"),
+                ),
+                shape=value.details["shape"],
+                copy=False,
+            )
+            restored.has_sorted_indices = True
+        elif value.kind == "index":
+            restored = pd.Index(
+                load_array(value.name), name=value.details["index_name"]
+            )
+        elif value.kind == "frame":
+            restored = _load_frame(value, load_array)
+        elif value.kind == "recommenders":
+            restored = [
+                _restore(recommender_class, recommender_state, path, mmap_mode, loaded)
+                for recommender_class, recommender_state in value.details[
+                    "recommenders"
+                ]
+            ]
+        else:
+            restored = value.details["object_class"].__new__(
+                value.details["object_class"]
+            )
+            restored.__dict__.update(
+                _load_state(value.details["state"], path, mmap_mode, loaded)
+            )
+        loaded[value.name] = restored
+        result[attribute] = restored
+    return result
+
+
+def _restore(recommender_class, state, path, mmap_mode, loaded):
+    """
+    Crea un recomendador a partir de sus atributos guardados, sin llamar a __init__.
+
+    Args:
+        recommender_class (type): Clase del recomendador.
+        state (dict): Atributos guardados con _save_state.
+        path (str): Directorio de la versión del modelo.
+        mmap_mode (str): Modo de np.load para los arrays.
+        loaded (dict): Valores ya reconstruidos en la misma carga (véase _load_state).
+
+    Returns:
+        Recommender: El recomendador reconstruido.
+    """
+    recommender = recommender_class.__new__(recommender_class)
+    for name in recommender_class._unsaved_attributes:
+        setattr(recommender, name, None)
+    recommender.__dict__.update(_load_state(state, path, mmap_mode, loaded))
+    return recommender
+
+
+def _describe(value):
+    """
+    Describe un argumento del constructor de un modelo con valores que se pueden guardar en
+    JSON.
+
+    Las clases se describen por su módulo y su nombre cualificado. Los datos (DataFrames,
+    StreamedRatings, ...) se describen solo por su tipo: sus cambios se detectan con los
+    archivos de los que se leen.
+
+    Args:
+        value: Argumento del constructor.
+
+    Returns:
+        Valor equivalente formado por listas, diccionarios, números, cadenas y None.
+    """
+    if isinstance(value, type):
+        return f"{value.__module__}.{value.__qualname__}"
+    if isinstance(value, (list, tuple)):
+        return [_describe(item) for item in value]
+    if isinstance(value, dict):
+        return {str(name): _describe(item) for name, item in value.items()}
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return f"<{_describe(type(value))}>"
+
+
+def load_or_build(path, recommender_class, *args, sources=(), **kwargs):
+    """
+    Carga un modelo guardado o lo construye y lo guarda si no existe o está desactualizado.
+
+    El manifiesto de cada versión guardada contiene la versión del formato de los archivos y
+    una clave con la clase del modelo y los argumentos de su constructor (las clases, por
+    ejemplo las de los recomendadores base de un híbrido, por su nombre cualificado). El
+    modelo se vuelve a construir, y se guarda como una versión nueva, si la clave o el
+    formato no coinciden o si algún archivo de datos es más reciente que la versión actual.
+
+    Args:
+        path (str): Directorio del modelo.
+        recommender_class (type): Clase del recomendador.
+        *args: Argumentos posicionales del constructor.
+        sources (iterable, optional): Archivos de datos del modelo.
+        **kwargs: Argumentos con nombre del constructor.
+
+    Returns:
+        Recommender: El recomendador cargado o recién construido.
+    """
+    key = json.loads(
+        json.dumps(
+            {
+                "class": _describe(recommender_class),
+                "args": _describe(args),
+                "kwargs": _describe(kwargs),
+            }
         )
+    )
+    version = _current_version(path)
+    if version is not None:
+        manifest_file = os.path.join(version, "manifest.json")
+        state_file = os.path.join(version, "state.pkl")
+        manifest = {}
+        if os.path.exists(manifest_file):
+            with open(manifest_file) as file:
+                manifest = json.load(file)
+        if (
+            manifest.get("format") == _FORMAT_VERSION
+            and manifest.get("key") == key
+            and all(
+                os.path.getmtime(source) <= os.path.getmtime(state_file)
+                for source in sources
+            )
+        ):
+            return Recommender.load(path)
+    recommender = recommender_class(*args, **kwargs)
+    recommender.save(path, key)
+    return recommender
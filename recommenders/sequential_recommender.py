@@ -1,24 +1,161 @@
-from recommenders.recommender_base import Recommender
+from recommenders.recommender_base import (
+    Recommender,
+    ratings_delta,
+    sorted_rating_columns,
+    top_n_positions,
+)
+from scipy import sparse
+import numpy as np
 import pandas as pd
 
 
 class SequentialRecommender(Recommender):
-    def __init__(self, movies, ratings):
+    def __init__(self, movies, ratings, order=1, window=1, decay=1.0):
         """
         Inicializa el recomendador secuencial con los datos de películas y calificaciones.
 
         Parámetros:
         movies (DataFrame): Datos de las películas.
         ratings (DataFrame): Datos de las calificaciones de los usuarios para las películas.
+        order (int): Número de últimas películas del usuario que se usan para recomendar.
+        window (int): Número de películas siguientes a cada película que cuentan como transición.
+        decay (float): Factor por el que se multiplica el peso de una transición por cada posición
+            de distancia, tanto dentro de la ventana como entre las últimas películas del usuario.
+            Con 1.0 todas las transiciones pesan lo mismo.
         """
         # Inicializa la clase base con los datos de películas y calificaciones
         super().__init__(movies, ratings)
+        self.order = order
+        self.window = window
+        self.decay = decay
 
-        # Ordena las calificaciones por 'userId' y 'timestamp' para obtener una secuencia temporal
-        self.ratings = ratings.sort_values(by=["userId", "timestamp"])
+        # Construye la tabla de transiciones entre películas cercanas en las secuencias
+        self._fit(ratings)
 
-        # Agrupa las calificaciones por 'userId' y crea una lista de películas vistas por cada usuario
-        self.user_sequences = self.ratings.groupby("userId")["movieId"].apply(list)
+    def _fit(self, ratings):
+        """
+        Ordena las calificaciones y construye la tabla de transiciones película -> películas siguientes.
+
+        Parámetros:
+        ratings (DataFrame o StreamedRatings): Datos de las calificaciones de los usuarios para las películas.
+        """
+        # Columnas ordenadas por 'userId' y 'timestamp' para obtener una secuencia temporal; se
+        # conservan las calificaciones recibidas, que el híbrido comparte con los demás
+        # recomendadores, en lugar de una copia ordenada
+        self.ratings = ratings
+        user_col, movie_col, timestamps = sorted_rating_columns(ratings)
+
+        # Códigos enteros de las películas
+        movie_ids, movie_codes = np.unique(movie_col, return_inverse=True)
+        self.movie_index = pd.Index(movie_ids)
+
+        # Solo cuenta las transiciones desde la primera aparición de cada película en cada secuencia
+        pair_keys = self._pair_keys(user_col, movie_col)
+        first_seen = np.zeros(len(pair_keys), dtype=bool)
+        first_seen[np.unique(pair_keys, return_index=True)[1]] = True
+
+        # Tabla dispersa de pesos: fila = película, columna = película vista a continuación
+        sources, targets, weights = self._window_transitions(
+            user_col, movie_codes, first_seen, np.ones(len(movie_codes), dtype=bool)
+        )
+        n_movies = len(self.movie_index)
+        self.transitions = sparse.csr_matrix(
+            (weights, (sources, targets)), shape=(n_movies, n_movies)
+        )
+
+        # Últimas películas de cada usuario, para responder sin recorrer las secuencias
+        last_rows = np.append(user_col[1:] != user_col[:-1], True)
+        self.user_index = pd.Index(user_col[last_rows])
+        self._user_recent, self._user_recent_first = self._recent_items(
+            np.cumsum(np.append(False, user_col[1:] != user_col[:-1])),
+            movie_codes,
+            first_seen,
+            len(self.user_index),
+        )
+        self._user_last_timestamp = timestamps[last_rows]
+
+        # Pares (usuario, película) ya vistos, para detectar calificaciones repetidas
+        self._seen = np.sort(pair_keys)
+
+    def _window_transitions(self, groups, codes, first_seen, counted):
+        """
+        Obtiene las transiciones entre cada película y las window películas siguientes de su secuencia.
+
+        Parámetros:
+        groups (numpy.ndarray): Secuencia a la que pertenece cada posición (ordenadas por secuencia).
+        codes (numpy.ndarray): Código de la película en cada posición (-1 si no hay película).
+        first_seen (numpy.ndarray): Indica si la posición es la primera aparición de la película.
+        counted (numpy.ndarray): Indica si las transiciones que llegan a la posición se cuentan.
+
+        Devuelve:
+        tuple: Códigos de origen, códigos de destino y pesos de las transiciones.
+        """
+        sources, targets, weights = [], [], []
+        for distance in range(1, self.window + 1):
+            valid = (
+                (groups[:-distance] == groups[distance:])
+                & first_seen[:-distance]
+                & counted[distance:]
+                & (codes[:-distance] >= 0)
+            )
+            sources.append(codes[:-distance][valid])
+            targets.append(codes[distance:][valid])
+            weights.append(np.full(valid.sum(), self.decay ** (distance - 1)))
+        return np.concatenate(sources), np.concatenate(targets), np.concatenate(weights)
+
+    def _recent_items(self, groups, codes, first_seen, n_groups):
+        """
+        Obtiene las últimas películas de cada secuencia, empezando por la más reciente.
+
+        Parámetros:
+        groups (numpy.ndarray): Posición de la secuencia de cada fila (0..n_groups-1, ordenadas).
+        codes (numpy.ndarray): Código de la película en cada fila.
+        first_seen (numpy.ndarray): Indica si la fila es la primera aparición de la película.
+        n_groups (int): Número de secuencias.
+
+        Devuelve:
+        tuple: Matrices (secuencias x max(order, window)) con los códigos de las últimas películas
+            (-1 si la secuencia es más corta) y sus indicadores de primera aparición.
+        """
+        history = max(self.order, self.window)
+        recent = np.full((n_groups, history), -1, dtype=np.int64)
+        recent_first = np.zeros((n_groups, history), dtype=bool)
+
+        # Distancia de cada fila al final de su secuencia
+        group_ends = np.searchsorted(groups, groups, side="right")
+        from_end = group_ends - 1 - np.arange(len(groups))
+        keep = from_end < history
+        recent[groups[keep], from_end[keep]] = codes[keep]
+        recent_first[groups[keep], from_end[keep]] = first_seen[keep]
+        return recent, recent_first
+
+    @staticmethod
+    def _pair_keys(user_ids, movie_ids):
+        """
+        Codifica pares (userId, movieId) como enteros de 64 bits.
+        """
+        return (np.asarray(user_ids, dtype=np.int64) << 32) + np.asarray(
+            movie_ids, dtype=np.int64
+        )
+
+    def _recent_weights(self, user_rows):
+        """
+        Construye los pesos de las últimas order películas de cada usuario.
+
+        Parámetros:
+        user_rows (numpy.ndarray): Posiciones de los usuarios en user_index.
+
+        Devuelve:
+        scipy.sparse.csr_matrix: Matriz (usuarios x películas) con el peso de cada película reciente.
+        """
+        recent = self._user_recent[user_rows, : self.order]
+        valid = recent >= 0
+        weights = np.broadcast_to(self.decay ** np.arange(self.order), recent.shape)
+        n_movies = len(self.movie_index)
+        return sparse.csr_matrix(
+            (weights[valid], (np.nonzero(valid)[0], recent[valid])),
+            shape=(len(user_rows), n_movies),
+        )
 
     def recommend(self, user_id, top_n=10):
         """
@@ -32,46 +169,235 @@ class SequentialRecommender(Recommender):
         numpy.ndarray: IDs de las películas recomendadas.
         """
         # Si el ID del usuario no está en las secuencias de usuarios, devuelve una lista vacía
-        if user_id not in self.user_sequences.index:
+        user_row = self.user_index.get_indexer([user_id])[0]
+        if user_row < 0:
             return []
 
-        # Obtén la secuencia de películas vistas por el usuario dado
-        user_sequence = self.user_sequences[user_id]
+        # Filas de la tabla de transiciones de las últimas películas vistas por el usuario
+        recent = self._user_recent[user_row, : self.order]
+        recent_weights = (self.decay ** np.arange(self.order))[recent >= 0]
+        recent = recent[recent >= 0]
+        indptr = self.transitions.indptr
+        starts = indptr[recent]
+        lengths = indptr[recent + 1] - starts
 
-        # Obtén la última película vista por el usuario
-        last_movie = user_sequence[-1]
+        # Si no se encuentran próximas películas, devuelve una lista vacía
+        if lengths.sum() == 0:
+            return []
 
-        # Lista para almacenar las próximas películas vistas después de la última película
-        next_movies = []
+        # Suma las transiciones de cada película reciente ponderadas por su antigüedad
+        positions = np.repeat(
+            starts - np.cumsum(lengths) + lengths, lengths
+        ) + np.arange(lengths.sum())
+        next_movies, inverse = np.unique(
+            self.transitions.indices[positions], return_inverse=True
+        )
+        next_movie_counts = np.bincount(
+            inverse,
+            weights=np.repeat(recent_weights, lengths)
+            * self.transitions.data[positions],
+        )
 
-        # Busca en las secuencias de todos los usuarios para encontrar qué película vieron después de la última película
-        for seq in self.user_sequences:
-            if last_movie in seq:
-                idx = seq.index(last_movie)
-                # Si hay una película después de la última película en la secuencia, añádela a la lista de próximas películas
-                if idx + 1 < len(seq):
-                    next_movies.append(seq[idx + 1])
+        # Devuelve las películas siguientes con más peso hasta un máximo de 'top_n'
+        order = top_n_positions(next_movie_counts, top_n)
+        return self.movie_index.to_numpy()[next_movies[order]]
 
-        # Si no se encuentran próximas películas, devuelve una lista vacía
-        if not next_movies:
-            return []
+    def recommend_many(self, user_ids, top_n=10, batch_size=256):
+        """
+        Recomienda películas a varios usuarios leyendo en bloque las filas de la tabla de transiciones.
 
-        # Cuenta cuántas veces aparece cada próxima película y ordena por frecuencia
-        next_movie_counts = pd.Series(next_movies).value_counts()
+        Parámetros:
+        user_ids (array-like): IDs de los usuarios para los que se harán las recomendaciones.
+        top_n (int): Número de películas a recomendar por usuario.
+        batch_size (int): Número de usuarios puntuados en cada bloque.
+
+        Devuelve:
+        numpy.ndarray: Matriz (usuarios x top_n) con los IDs recomendados; -1 donde no hay recomendación.
+        """
+        recommendations = np.full((len(user_ids), top_n), -1, dtype=np.int64)
+        user_rows = self.user_index.get_indexer(user_ids)
+        known_users = np.flatnonzero(user_rows >= 0)
+        movie_ids = self.movie_index.to_numpy()
 
-        # Devuelve las películas recomendadas (las más frecuentes) hasta un máximo de 'top_n'
-        recommendations = next_movie_counts.head(top_n).index.values
+        for start in range(0, len(known_users), batch_size):
+            block = known_users[start : start + batch_size]
+            scores = (
+                self._recent_weights(user_rows[block]) @ self.transitions
+            ).toarray()
+            scores[scores == 0] = -np.inf
+            movie_indices = top_n_positions(scores, top_n)
+            recommendations[block, : movie_indices.shape[1]] = np.where(
+                movie_indices >= 0, movie_ids[movie_indices], -1
+            )
         return recommendations
 
+    def score_many(self, user_ids, batch_size=256):
+        """
+        Puntúa todas las películas del catálogo para varios usuarios con el peso de las
+        transiciones desde sus últimas películas.
+
+        Parámetros:
+        user_ids (array-like): IDs de los usuarios.
+        batch_size (int): Número de usuarios puntuados en cada bloque.
+
+        Devuelve:
+        numpy.ndarray: Matriz (usuarios x películas del catálogo); NaN para las películas sin
+            transiciones desde las últimas películas del usuario y para los usuarios
+            desconocidos.
+        """
+        scores = np.full((len(user_ids), len(self.catalog_index)), np.nan)
+        user_rows = self.user_index.get_indexer(user_ids)
+        known_users = np.flatnonzero(user_rows >= 0)
+
+        # Posiciones en el catálogo de las películas de la tabla de transiciones
+        catalog_positions = self.catalog_index.get_indexer(self.movie_index)
+        in_catalog = catalog_positions >= 0
+
+        for start in range(0, len(known_users), batch_size):
+            block = known_users[start : start + batch_size]
+            block_scores = (
+                self._recent_weights(user_rows[block]) @ self.transitions
+            ).toarray()
+
+            # Sin transiciones desde las últimas películas del usuario no hay puntuación, como
+            # en recommend_many
+            block_scores[block_scores == 0] = np.nan
+            scores[np.ix_(block, catalog_positions[in_catalog])] = block_scores[
+                :, in_catalog
+            ]
+        return scores
+
     def update_data(self, ratings):
         """
-        Actualiza los datos de calificaciones y recalcula las secuencias de usuarios.
+        Actualiza los datos de calificaciones y la tabla de transiciones.
+
+        Si los nuevos datos solo añaden películas al final de las secuencias de los usuarios,
+        se suman únicamente las transiciones nuevas; en otro caso se reconstruye la tabla.
 
         Parámetros:
         ratings (DataFrame): Datos de las calificaciones de los usuarios para las películas.
         """
-        # Actualiza las calificaciones y las ordena por 'userId' y 'timestamp' para mantener la secuencia temporal
-        self.ratings = ratings.sort_values(by=["userId", "timestamp"])
+        delta = ratings_delta(self.ratings, ratings)
+        if delta is None or not self._append_ratings(delta):
+            self._fit(ratings)
+            return
+
+        self.ratings = ratings
+
+    def _append_ratings(self, delta):
+        """
+        Añade a la tabla de transiciones las calificaciones nuevas que continúan las secuencias.
+
+        Parámetros:
+        delta (DataFrame): Calificaciones nuevas o modificadas.
+
+        Devuelve:
+        bool: False si alguna calificación no puede añadirse al final de su secuencia y es
+            necesario reconstruir la tabla.
+        """
+        if delta.empty:
+            return True
+        delta = delta.sort_values(by=["userId", "timestamp"])
+        user_col = delta["userId"].to_numpy()
+        movie_col = delta["movieId"].to_numpy()
+        timestamps = delta["timestamp"].to_numpy(dtype=float)
+
+        # Las calificaciones modificadas o repetidas cambian secuencias ya contadas
+        keys = self._pair_keys(user_col, movie_col)
+        seen = np.minimum(np.searchsorted(self._seen, keys), len(self._seen) - 1)
+        if len(self._seen) and (self._seen[seen] == keys).any():
+            return False
+        if len(np.unique(keys)) < len(keys):
+            return False
+
+        # Las calificaciones nuevas deben ir después de la última de cada usuario
+        # (los timestamps ausentes se ordenan al final, como en sort_values)
+        user_rows = self.user_index.get_indexer(user_col)
+        known = user_rows >= 0
+        last_timestamps = np.full(len(delta), -np.inf)
+        last_timestamps[known] = self._user_last_timestamp[user_rows[known]]
+        comparable_timestamps = np.where(np.isnan(timestamps), np.inf, timestamps)
+        comparable_last = np.where(np.isnan(last_timestamps), np.inf, last_timestamps)
+        if (comparable_timestamps < comparable_last).any():
+            return False
+
+        # Añade al índice las películas y usuarios nuevos
+        self.movie_index = self.movie_index.append(
+            pd.Index(np.unique(movie_col)).difference(self.movie_index)
+        )
+        movie_codes = self.movie_index.get_indexer(movie_col)
+        new_users = pd.Index(np.unique(user_col)).difference(self.user_index)
+        self.user_index = self.user_index.append(new_users)
+        history = self._user_recent.shape[1]
+        user_recent = np.vstack(
+            [self._user_recent, np.full((len(new_users), history), -1)]
+        )
+        user_recent_first = np.vstack(
+            [self._user_recent_first, np.zeros((len(new_users), history), dtype=bool)]
+        )
+
+        # Secuencia extendida de cada usuario afectado: sus últimas películas conocidas
+        # (de la más antigua a la más reciente) seguidas de las nuevas
+        affected, new_counts = np.unique(
+            self.user_index.get_indexer(user_col), return_counts=True
+        )
+        n_affected = len(affected)
+        extended_groups = np.concatenate(
+            [
+                np.repeat(np.arange(n_affected), history),
+                np.repeat(np.arange(n_affected), new_counts),
+            ]
+        )
+        extended_codes = np.concatenate(
+            [user_recent[affected, ::-1].ravel(), movie_codes]
+        )
+        extended_first = np.concatenate(
+            [user_recent_first[affected, ::-1].ravel(), np.ones(len(delta), dtype=bool)]
+        )
+        extended_new = np.concatenate(
+            [
+                np.zeros(n_affected * history, dtype=bool),
+                np.ones(len(delta), dtype=bool),
+            ]
+        )
+        order = np.argsort(extended_groups, kind="stable")
+        extended_groups = extended_groups[order]
+        extended_codes = extended_codes[order]
+        extended_first = extended_first[order]
+        extended_new = extended_new[order]
+
+        # Suma las nuevas transiciones a la tabla, ampliándola si hay películas nuevas
+        sources, targets, weights = self._window_transitions(
+            extended_groups, extended_codes, extended_first, extended_new
+        )
+        n_movies = len(self.movie_index)
+        transitions = self.transitions.tocoo()
+        self.transitions = sparse.csr_matrix(
+            (
+                np.concatenate([transitions.data, weights]),
+                (
+                    np.concatenate([transitions.row, sources]),
+                    np.concatenate([transitions.col, targets]),
+                ),
+            ),
+            shape=(n_movies, n_movies),
+        )
 
-        # Recalcula las secuencias de usuarios con los datos actualizados
-        self.user_sequences = self.ratings.groupby("userId")["movieId"].apply(list)
+        # Actualiza las últimas películas y el último timestamp de cada usuario afectado
+        recent, recent_first = self._recent_items(
+            extended_groups, extended_codes, extended_first, n_affected
+        )
+        user_recent[affected] = recent
+        user_recent_first[affected] = recent_first
+        last_timestamp = np.concatenate(
+            [self._user_last_timestamp, np.full(len(new_users), -np.inf)]
+        )
+        group_end = np.append(user_col[1:] != user_col[:-1], True)
+        last_timestamp[self.user_index.get_indexer(user_col[group_end])] = timestamps[
+            group_end
+        ]
+        self._user_recent = user_recent
+        self._user_recent_first = user_recent_first
+        self._user_last_timestamp = last_timestamp
+        self._seen = np.sort(np.concatenate([self._seen, keys]))
+        return True
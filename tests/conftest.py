@@ -0,0 +1,103 @@
+# conftest.py
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+# Los módulos del proyecto se importan desde la raíz del repositorio, como en los scripts main_*
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+GENRES = ["Action", "Adventure", "Comedy", "Drama", "Horror", "Romance", "Sci-Fi"]
+TAGS = ["funny", "dark", "space", "love story", "twist ending", "classic"]
+
+
+def make_dataset(n_users=40, n_movies=60, seed=0):
+    """
+    Genera un conjunto pequeño de películas y calificaciones con la forma de MovieLens.
+
+    Los IDs de películas no son consecutivos y algunas películas no tienen calificaciones,
+    para que los recomendadores no puedan confundir IDs con posiciones.
+
+    Parámetros:
+    n_users (int): Número de usuarios.
+    n_movies (int): Número de películas.
+    seed (int): Semilla del generador aleatorio.
+
+    Devuelve:
+    tuple: Un par (ratings, movies) de DataFrames.
+    """
+    rng = np.random.default_rng(seed)
+    movie_ids = np.arange(1, n_movies + 1) * 3
+    genres = [
+        "|".join(sorted(rng.choice(GENRES, size=rng.integers(1, 4), replace=False)))
+        for _ in range(n_movies)
+    ]
+    tags = [
+        " ".join(rng.choice(TAGS, size=rng.integers(0, 3))) for _ in range(n_movies)
+    ]
+    movies = pd.DataFrame(
+        {
+            "movieId": movie_ids,
+            "title": [f"Movie {movie_id}" for movie_id in movie_ids],
+            "genres": genres,
+            "tag": tags,
+            "metadata": [
+                f"{genre.replace('|', ' ')} {tag}" for genre, tag in zip(genres, tags)
+            ],
+        }
+    )
+
+    # Las últimas películas del catálogo no reciben calificaciones
+    popularity = np.linspace(2.0, 0.2, n_movies)
+    popularity[-5:] = 0
+    popularity /= popularity.sum()
+    rows = []
+    for user_id in range(1, n_users + 1):
+        count = rng.integers(4, 20)
+        rated = rng.choice(movie_ids, size=count, replace=False, p=popularity)
+        timestamps = 1_000_000 + np.cumsum(rng.integers(1, 5000, size=count))
+        ratings = rng.choice(np.arange(1, 11) / 2, size=count)
+        rows.extend(zip([user_id] * count, rated, ratings, timestamps))
+    ratings = pd.DataFrame(rows, columns=["userId", "movieId", "rating", "timestamp"])
+    return ratings, movies
+
+
+@pytest.fixture
+def dataset():
+    """
+    Calificaciones y películas de prueba; cada test recibe su propia copia.
+    """
+    return make_dataset()
+
+
+@pytest.fixture
+def ratings(dataset):
+    return dataset[0]
+
+
+@pytest.fixture
+def movies(dataset):
+    return dataset[1]
+
+
+@pytest.fixture
+def csv_files(tmp_path, dataset):
+    """
+    Escribe las calificaciones, las películas y sus tags de prueba en CSV con el formato de
+    MovieLens.
+
+    Devuelve:
+    tuple: Rutas (ratings_file, movies_file, tags_file).
+    """
+    ratings, movies = dataset
+    tags = movies.loc[movies["tag"] != "", ["movieId", "tag"]]
+    tags = tags.assign(userId=1, timestamp=1_000_000)
+    paths = tuple(
+        str(tmp_path / name) for name in ("ratings.csv", "movies.csv", "tags.csv")
+    )
+    ratings.to_csv(paths[0], index=False)
+    movies[["movieId", "title", "genres"]].to_csv(paths[1], index=False)
+    tags[["userId", "movieId", "tag", "timestamp"]].to_csv(paths[2], index=False)
+    return paths
@@ -0,0 +1,46 @@
+# test_benchmark.py
+
+import pytest
+from benchmarks.benchmark import benchmark_recommender, measure_recall
+from recommenders.content_based_recommender import ContentBasedRecommender
+from recommenders.collaborative_filtering import CollaborativeFilteringRecommender
+from recommenders.matrix_factorization import MatrixFactorizationRecommender
+from tests.test_persistence import BUILDERS
+
+
+@pytest.mark.parametrize(
+    "name", ["content", "sequential", "kmeans", "matrix_factorization", "hybrid"]
+)
+def test_exact_recommenders_have_full_recall(name, movies, ratings):
+    recommender = BUILDERS[name](movies, ratings)
+    user_ids = ratings["userId"].unique()
+    assert measure_recall(recommender, user_ids, top_n=10, batch_size=7) == 1.0
+
+
+def test_collaborative_recall_follows_neighbour_count(movies, ratings):
+    # recommend usa top_n vecinos y score_many n_neighbors: solo coinciden si son iguales
+    user_ids = ratings["userId"].unique()
+    same = CollaborativeFilteringRecommender(movies, ratings, n_neighbors=10)
+    more = CollaborativeFilteringRecommender(movies, ratings, n_neighbors=50)
+    assert measure_recall(same, user_ids, top_n=10) == 1.0
+    assert measure_recall(more, user_ids, top_n=10) < 1.0
+
+
+@pytest.mark.parametrize(
+    "recommender_class, options",
+    [
+        (ContentBasedRecommender, {}),
+        (MatrixFactorizationRecommender, {"n_factors": 4, "iterations": 3}),
+    ],
+)
+def test_approximate_recall_is_measured(recommender_class, options, movies, ratings):
+    user_ids = ratings["userId"].unique()
+    partial = recommender_class(movies, ratings, n_lists=4, n_probe=1, **options)
+    full = recommender_class(movies, ratings, n_lists=4, n_probe=4, **options)
+    assert 0 < measure_recall(partial, user_ids, top_n=10) < 1.0
+    assert measure_recall(full, user_ids, top_n=10) == 1.0
+
+    result = benchmark_recommender(
+        lambda: partial, ratings, n_queries=5, n_batch=20, memory=False, repeat=1
+    )
+    assert 0 < result["recall"]["exact_top_n"] <= 1.0
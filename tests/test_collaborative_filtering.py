@@ -0,0 +1,111 @@
+# test_collaborative_filtering.py
+
+import numpy as np
+import pandas as pd
+from recommenders.collaborative_filtering import CollaborativeFilteringRecommender
+
+
+def loop_scores(recommender, ratings, user_id, n_neighbors):
+    """
+    Media de las calificaciones de los vecinos ponderada por su similitud, calculada película a
+    película. Las películas que ningún vecino con similitud no nula calificó y las ya
+    calificadas por el usuario valen NaN.
+    """
+    row = recommender.user_index.get_loc(user_id)
+    neighbors = recommender.neighbors[row, :n_neighbors]
+    sims = recommender.neighbor_sims[row, :n_neighbors][neighbors >= 0]
+    neighbor_ids = recommender.user_index[neighbors[neighbors >= 0]]
+    rated = set(ratings.loc[ratings["userId"] == user_id, "movieId"])
+
+    scores = {}
+    for movie_id in recommender.catalog_index:
+        total, supported = 0.0, False
+        for neighbor_id, sim in zip(neighbor_ids, sims):
+            rating = ratings.loc[
+                (ratings["userId"] == neighbor_id) & (ratings["movieId"] == movie_id),
+                "rating",
+            ]
+            if len(rating):
+                total += sim * rating.iloc[-1]
+                supported |= sim != 0
+        if supported and sims.sum() != 0 and movie_id not in rated:
+            scores[movie_id] = total / sims.sum() if sims.sum() > 0 else total
+        else:
+            scores[movie_id] = np.nan
+    return np.array([scores[movie_id] for movie_id in recommender.catalog_index])
+
+
+def test_score_many_matches_neighbour_loop(movies, ratings):
+    recommender = CollaborativeFilteringRecommender(movies, ratings, n_neighbors=5)
+    user_ids = ratings["userId"].unique()[:8]
+    scores = recommender.score_many(user_ids)
+    for user_id, user_scores in zip(user_ids, scores):
+        np.testing.assert_allclose(
+            user_scores, loop_scores(recommender, ratings, user_id, 5), rtol=1e-6
+        )
+
+
+def test_movies_no_neighbour_rated_have_no_score(movies, ratings):
+    recommender = CollaborativeFilteringRecommender(movies, ratings, n_neighbors=3)
+    user_ids = ratings["userId"].unique()
+    scores = recommender.score_many(user_ids)
+
+    # Las películas sin ninguna calificación nunca tienen puntuación
+    unrated = ~recommender.catalog_index.isin(ratings["movieId"])
+    assert unrated.any()
+    assert np.isnan(scores[:, unrated]).all()
+
+    # Con tres vecinos, la mayoría del catálogo queda sin puntuar en lugar de valer 0
+    assert np.isnan(scores).mean() > 0.5
+    assert not (scores == 0).any()
+
+
+def test_recommend_many_matches_recommend(movies, ratings):
+    recommender = CollaborativeFilteringRecommender(movies, ratings)
+    user_ids = np.append(ratings["userId"].unique(), -1)
+    batch = recommender.recommend_many(user_ids, top_n=10, batch_size=7)
+    for user_id, row in zip(user_ids, batch):
+        np.testing.assert_array_equal(row[row >= 0], recommender.recommend(user_id))
+
+
+def test_user_without_neighbours_gets_no_recommendations(movies, ratings):
+    # Un usuario que solo calificó una película que nadie más vio no tiene vecinos
+    lonely = pd.DataFrame(
+        {
+            "userId": [999],
+            "movieId": [movies["movieId"].iloc[-1]],
+            "rating": [4.0],
+            "timestamp": [1_000_000],
+        }
+    )
+    recommender = CollaborativeFilteringRecommender(
+        movies, pd.concat([ratings, lonely], ignore_index=True)
+    )
+    assert list(recommender.recommend(999)) == []
+    assert np.isnan(recommender.score_many([999])).all()
+
+
+def test_incremental_update_matches_full_rebuild(movies, ratings, monkeypatch):
+    # Calificaciones nuevas de usuarios existentes, una modificada y un usuario nuevo
+    last = ratings.groupby("userId").cumcount(ascending=False) == 0
+    updated = ratings.copy()
+    updated.loc[updated.index[0], "rating"] = 0.5
+    new_user = ratings[ratings["userId"] == 2].assign(userId=999)
+    updated = pd.concat([updated, new_user], ignore_index=True)
+
+    incremental = CollaborativeFilteringRecommender(
+        movies, ratings[~last], n_neighbors=5, drift_threshold=1.0
+    )
+    refits = []
+    monkeypatch.setattr(incremental, "_fit", lambda: refits.append(1))
+    incremental.update_data(updated)
+    assert not refits
+    rebuilt = CollaborativeFilteringRecommender(movies, updated, n_neighbors=5)
+
+    user_ids = updated["userId"].unique()
+    np.testing.assert_allclose(
+        incremental.score_many(user_ids), rebuilt.score_many(user_ids), rtol=1e-12
+    )
+    np.testing.assert_array_equal(
+        incremental.recommend_many(user_ids), rebuilt.recommend_many(user_ids)
+    )
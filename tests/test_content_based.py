@@ -0,0 +1,64 @@
+# test_content_based.py
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import linear_kernel
+from recommenders.content_based_recommender import ContentBasedRecommender
+
+
+def dense_scores(movies, ratings, user_id):
+    """
+    Puntuaciones de la implementación original: la suma de las filas de la matriz de similitud
+    del coseno completa (N x N) de las películas valoradas, ponderadas por la calificación.
+    Las películas valoradas y las de similitud nula, que no tienen puntuación, se excluyen
+    con -inf.
+    """
+    tfidf = TfidfVectorizer(stop_words="english").fit_transform(movies["metadata"])
+    cosine_sim = linear_kernel(tfidf, tfidf)
+    scores = np.zeros(len(movies))
+    user_ratings = ratings[ratings["userId"] == user_id]
+    for row in user_ratings.itertuples():
+        scores += (
+            cosine_sim[movies.index[movies["movieId"] == row.movieId][0]] * row.rating
+        )
+    scores[movies["movieId"].isin(user_ratings["movieId"]).to_numpy()] = -np.inf
+    scores[scores == 0] = -np.inf
+    return scores
+
+
+def test_scores_match_dense_cosine_matrix(movies, ratings):
+    recommender = ContentBasedRecommender(movies, ratings)
+    user_ids = ratings["userId"].unique()
+    scores = recommender.score_many(user_ids)
+    for user_id, user_scores in zip(user_ids, scores):
+        expected = dense_scores(movies, ratings, user_id)
+        np.testing.assert_allclose(
+            np.nan_to_num(user_scores, nan=-np.inf), expected, atol=1e-12
+        )
+
+
+def test_recommend_matches_stable_sort_of_dense_scores(movies, ratings):
+    recommender = ContentBasedRecommender(movies, ratings)
+    for user_id in ratings["userId"].unique():
+        expected = dense_scores(movies, ratings, user_id)
+        order = np.argsort(-expected, kind="stable")[:10]
+        np.testing.assert_array_equal(
+            recommender.recommend(user_id), movies["movieId"].to_numpy()[order]
+        )
+
+
+def test_recommend_many_matches_recommend(movies, ratings):
+    recommender = ContentBasedRecommender(movies, ratings)
+    user_ids = np.append(ratings["userId"].unique(), -1)
+    batch = recommender.recommend_many(user_ids, top_n=10, batch_size=7)
+    for user_id, row in zip(user_ids, batch):
+        np.testing.assert_array_equal(row[row >= 0], recommender.recommend(user_id))
+
+
+def test_ivf_search_visiting_every_list_is_exact(movies, ratings):
+    exact = ContentBasedRecommender(movies, ratings)
+    approximate = ContentBasedRecommender(movies, ratings, n_lists=4, n_probe=4)
+    user_ids = ratings["userId"].unique()
+    np.testing.assert_array_equal(
+        approximate.recommend_many(user_ids), exact.recommend_many(user_ids)
+    )
@@ -0,0 +1,86 @@
+# test_cross_validation.py
+
+import numpy as np
+import pytest
+from data_loader import StreamedRatings
+from evaluation.cross_validation import cross_validate
+from evaluation.splitters import leave_last_n
+from recommenders import content_based_recommender
+from recommenders.content_based_recommender import ContentBasedRecommender
+from recommenders.collaborative_filtering import CollaborativeFilteringRecommender
+from recommenders.sequential_recommender import SequentialRecommender
+from recommenders.k_mean_collaborative_filtering import (
+    KMeansCollaborativeFilteringRecommender,
+)
+from recommenders.matrix_factorization import MatrixFactorizationRecommender
+from recommenders.hybrid_recommender import HybridRecommender
+
+INCREMENTAL = {
+    "collaborative": lambda movies, ratings: CollaborativeFilteringRecommender(
+        movies, ratings, drift_threshold=1.0
+    ),
+    "sequential": lambda movies, ratings: SequentialRecommender(movies, ratings),
+    "kmeans": lambda movies, ratings: KMeansCollaborativeFilteringRecommender(
+        movies, ratings, num_clusters=3, n_components=5, drift_threshold=1.0
+    ),
+}
+
+
+@pytest.mark.parametrize("name", list(INCREMENTAL))
+def test_streamed_ratings_are_updated_incrementally(movies, ratings, name, monkeypatch):
+    streamed = StreamedRatings.from_chunks([ratings])
+    train_index, _ = leave_last_n(ratings)
+    from_frame = INCREMENTAL[name](movies, ratings.iloc[train_index])
+    from_streamed = INCREMENTAL[name](movies, streamed.subset(train_index))
+
+    # Las calificaciones añadidas al final de cada usuario no obligan a volver a entrenar
+    refits = []
+    fit = type(from_streamed)._fit
+    monkeypatch.setattr(
+        type(from_streamed),
+        "_fit",
+        lambda self, *args: refits.append(1) or fit(self, *args),
+    )
+    from_frame.update_data(ratings)
+    from_streamed.update_data(streamed)
+    assert not refits
+
+    user_ids = ratings["userId"].unique()
+    np.testing.assert_array_equal(
+        from_streamed.score_many(user_ids), from_frame.score_many(user_ids)
+    )
+
+
+def test_folds_reuse_the_prototype_state(movies, ratings, monkeypatch):
+    tfidf_fits, als_iterations = [], []
+    vectorizer = content_based_recommender.TfidfVectorizer
+    fit_transform = vectorizer.fit_transform
+    monkeypatch.setattr(
+        vectorizer,
+        "fit_transform",
+        lambda self, *args: tfidf_fits.append(1) or fit_transform(self, *args),
+    )
+    fit = MatrixFactorizationRecommender._fit
+    monkeypatch.setattr(
+        MatrixFactorizationRecommender,
+        "_fit",
+        lambda self, iterations, *args: als_iterations.append(iterations)
+        or fit(self, iterations, *args),
+    )
+
+    build = lambda fold_ratings: HybridRecommender(
+        [
+            ContentBasedRecommender,
+            lambda movies, ratings: MatrixFactorizationRecommender(
+                movies, ratings, n_factors=4, iterations=6, warm_iterations=2
+            ),
+        ],
+        movies,
+        fold_ratings,
+    )
+    results = cross_validate(build, ratings, n_folds=3, seed=0)
+    assert len(results["folds"]) == 3
+
+    # La matriz TF-IDF se calcula una vez y los factores se refinan de una partición a otra
+    assert len(tfidf_fits) == 1
+    assert als_iterations == [6, 2, 2]
@@ -0,0 +1,155 @@
+# test_data_loader.py
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from data_loader import DataLoader, StreamedRatings
+from evaluation.evaluation import Evaluator
+from recommenders.collaborative_filtering import CollaborativeFilteringRecommender
+
+
+def assert_same_ratings(actual, expected):
+    """
+    Comprueba que dos StreamedRatings tienen las mismas columnas y estructuras.
+    """
+    for name, values in expected.columns().items():
+        np.testing.assert_array_equal(actual.columns()[name], values)
+    assert actual.user_index.equals(expected.user_index)
+    assert actual.movie_index.equals(expected.movie_index)
+    np.testing.assert_array_equal(actual.user_item.indptr, expected.user_item.indptr)
+    np.testing.assert_array_equal(actual.user_item.indices, expected.user_item.indices)
+    np.testing.assert_array_equal(actual.user_item.data, expected.user_item.data)
+    np.testing.assert_array_equal(actual.sequence_order, expected.sequence_order)
+    np.testing.assert_array_equal(actual.movie_counts, expected.movie_counts)
+    np.testing.assert_array_equal(actual.movie_rating_sums, expected.movie_rating_sums)
+    for actual_values, expected_values in zip(
+        actual._encodings(), expected._encodings()
+    ):
+        np.testing.assert_array_equal(actual_values, expected_values)
+
+
+def with_repeats(ratings):
+    """
+    Añade calificaciones repetidas de algunos pares (usuario, película) y timestamps
+    ausentes, los casos que la construcción por bloques tiene que resolver como el conjunto
+    completo.
+    """
+    repeated = ratings.sample(n=30, random_state=0).assign(rating=0.5)
+    ratings = pd.concat([ratings, repeated], ignore_index=True)
+    ratings.loc[ratings.index[::17], "timestamp"] = np.nan
+    return ratings
+
+
+def test_streamed_structures_match_pandas_semantics(ratings):
+    ratings = with_repeats(ratings)
+    streamed = StreamedRatings.from_chunks([ratings])
+
+    last = ratings.drop_duplicates(subset=["userId", "movieId"], keep="last")
+    matrix = last.pivot(index="userId", columns="movieId", values="rating").fillna(0)
+    np.testing.assert_array_equal(streamed.user_item.toarray(), matrix.to_numpy())
+
+    order = ratings.sort_values(by=["userId", "timestamp"], kind="stable").index
+    np.testing.assert_array_equal(streamed.sequence_order, order)
+    counts = ratings["movieId"].value_counts().sort_index()
+    np.testing.assert_array_equal(streamed.movie_counts, counts.to_numpy())
+
+
+def test_chunks_spilled_to_disk_build_the_same_ratings(ratings, tmp_path):
+    ratings = with_repeats(ratings)
+    chunks = [ratings.iloc[start : start + 37] for start in range(0, len(ratings), 37)]
+    expected = StreamedRatings.from_chunks(chunks)
+    spilled = StreamedRatings.from_chunks(chunks, str(tmp_path / "streamed"))
+
+    assert isinstance(spilled.user_ids, np.memmap)
+    assert_same_ratings(spilled, expected)
+    positions = np.random.default_rng(0).choice(len(ratings), 200, replace=False)
+    assert_same_ratings(spilled.subset(positions), expected.subset(positions))
+
+
+def assert_same_frame(actual, expected):
+    """
+    Comprueba que dos DataFrames tienen los mismos valores, aunque la caché use tipos
+    compactos (int32, float32 y categóricas).
+    """
+    assert list(actual.columns) == list(expected.columns)
+    for column in expected.columns:
+        if expected[column].dtype.kind in "biuf":
+            np.testing.assert_array_equal(
+                actual[column].to_numpy(dtype=float, na_value=np.nan),
+                expected[column].to_numpy(dtype=float, na_value=np.nan),
+            )
+        else:
+            assert (
+                actual[column].astype(object).tolist()
+                == expected[column].astype(object).tolist()
+            )
+
+
+@pytest.mark.parametrize("aggregate_tags", [False, True])
+def test_cached_load_matches_csv_load(csv_files, tmp_path, aggregate_tags, monkeypatch):
+    expected = DataLoader(*csv_files, aggregate_tags=aggregate_tags).load_data()
+    loader = DataLoader(
+        *csv_files, aggregate_tags=aggregate_tags, cache_dir=str(tmp_path / "cache")
+    )
+    built = loader.load_data()
+
+    # La segunda carga no vuelve a leer los CSV
+    monkeypatch.setattr(pd, "read_csv", None)
+    reopened = loader.load_data()
+    for ratings, movies in (built, reopened):
+        assert_same_frame(ratings, expected[0])
+        assert_same_frame(movies, expected[1])
+    assert reopened[0]["userId"].dtype == np.int32
+    assert reopened[0]["rating"].dtype == np.float32
+
+
+def test_cache_is_rebuilt_when_a_csv_changes(csv_files, tmp_path, ratings):
+    cache_dir = str(tmp_path / "cache")
+    DataLoader(*csv_files, cache_dir=cache_dir).load_data()
+    cached_at = os.stat(os.path.join(cache_dir, "ratings.rating.npy")).st_mtime_ns
+
+    # Cambiar la fecha sin cambiar el contenido conserva la caché
+    os.utime(csv_files[0], ns=(cached_at + 10**9, cached_at + 10**9))
+    DataLoader(*csv_files, cache_dir=cache_dir).load_data()
+    assert os.stat(os.path.join(cache_dir, "ratings.rating.npy")).st_mtime_ns == (
+        cached_at
+    )
+
+    # Una calificación modificada y una sin timestamp invalidan la caché
+    ratings.loc[0, "rating"] = 0.5
+    ratings["timestamp"] = ratings["timestamp"].astype("Int64")
+    ratings.loc[1, "timestamp"] = pd.NA
+    ratings.to_csv(csv_files[0], index=False)
+    reloaded, _ = DataLoader(*csv_files, cache_dir=cache_dir).load_data()
+    assert reloaded.loc[0, "rating"] == 0.5
+    assert pd.isna(reloaded.loc[1, "timestamp"])
+    assert_same_frame(reloaded, pd.read_csv(csv_files[0]))
+
+
+def test_chunked_cache_is_built_once_and_reopened(csv_files, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    expected, _ = DataLoader(*csv_files, chunksize=50).load_data()
+    built, _ = DataLoader(*csv_files, cache_dir=cache_dir, chunksize=50).load_data()
+    built_at = os.stat(os.path.join(cache_dir, "streamed", "userId.npy")).st_mtime_ns
+    reopened, _ = DataLoader(*csv_files, cache_dir=cache_dir, chunksize=50).load_data()
+    assert_same_ratings(built, expected)
+    assert_same_ratings(reopened, expected)
+
+    # La segunda carga proyecta los archivos ya construidos en memoria
+    assert os.stat(os.path.join(cache_dir, "streamed", "userId.npy")).st_mtime_ns == (
+        built_at
+    )
+    assert isinstance(reopened.user_ids, np.memmap)
+    assert isinstance(reopened.sequence_order, np.memmap)
+
+
+def test_evaluator_splits_streamed_ratings_like_dataframe(movies, ratings):
+    streamed = StreamedRatings.from_chunks([ratings])
+    results = []
+    for data in (ratings, streamed):
+        recommender = CollaborativeFilteringRecommender(movies, data)
+        evaluator = Evaluator(recommender, data, seed=0)
+        assert isinstance(evaluator.train_data, type(data))
+        results.append(evaluator.evaluate())
+    assert results[0] == results[1]
@@ -0,0 +1,93 @@
+# test_evaluation.py
+
+import numpy as np
+import pytest
+from evaluation.evaluation import Evaluator
+from recommenders.collaborative_filtering import CollaborativeFilteringRecommender
+
+
+def loop_metrics(evaluator):
+    """
+    Métricas de la implementación original: cada usuario de prueba se recorre en un bucle,
+    con sus recomendaciones y sus películas de prueba como listas.
+    """
+    test_data, k = evaluator.test_data, evaluator.k
+    precisions, recalls, ndcgs, average_precisions, ranks, hits = [], [], [], [], [], []
+    for user_id in test_data["userId"].unique():
+        actual = test_data.loc[test_data["userId"] == user_id, "movieId"].tolist()
+        recommended = list(evaluator.recommender.recommend(user_id, top_n=k))
+        if not any(recommended):
+            continue
+        common = set(recommended) & set(actual)
+        precisions.append(len(common) / len(set(recommended)))
+        recalls.append(len(common) / len(set(actual)))
+        dcg = sum(
+            1 / np.log2(i + 2) for i, rec in enumerate(recommended) if rec in actual
+        )
+        idcg = sum(1 / np.log2(i + 2) for i in range(min(len(actual), k)))
+        ndcgs.append(dcg / idcg if idcg > 0 else 0)
+        positions = [i for i, rec in enumerate(recommended) if rec in actual]
+        if positions:
+            average_precisions.append(
+                sum((n + 1) / (i + 1) for n, i in enumerate(positions)) / len(actual)
+            )
+            ranks.append(1 / (positions[0] + 1))
+        hits.append(bool(common))
+
+    covered = set()
+    for user_id in evaluator.train_data["userId"].unique():
+        covered.update(evaluator.recommender.recommend(user_id, top_n=k))
+    precision, recall = np.mean(precisions), np.mean(recalls)
+    return {
+        "Precision@k": precision,
+        "Recall@k": recall,
+        "F1-Score@k": 2 * precision * recall / (precision + recall),
+        "NDCG@k": np.mean(ndcgs),
+        "MAP@k": np.mean(average_precisions),
+        "MRR@k": np.mean(ranks),
+        "Hit Rate@k": np.mean(hits),
+        "Coverage": len(covered) / evaluator.train_data["movieId"].nunique(),
+    }
+
+
+@pytest.mark.parametrize("split", ["random", "leave_last", "temporal"])
+def test_evaluate_matches_per_user_loop(movies, ratings, split):
+    recommender = CollaborativeFilteringRecommender(movies, ratings)
+    evaluator = Evaluator(recommender, ratings, k=5, split=split, seed=0)
+    expected = loop_metrics(evaluator)
+    results = evaluator.evaluate()
+    assert results.keys() == expected.keys()
+    for name, value in expected.items():
+        assert results[name] == pytest.approx(value, rel=1e-12), name
+
+
+def test_metrics_are_read_from_one_evaluation(movies, ratings, monkeypatch):
+    recommender = CollaborativeFilteringRecommender(movies, ratings)
+    evaluator = Evaluator(recommender, ratings, seed=0)
+    passes = []
+    recommend_many = recommender.recommend_many
+    monkeypatch.setattr(
+        recommender,
+        "recommend_many",
+        lambda *args, **kwargs: passes.append(1) or recommend_many(*args, **kwargs),
+    )
+
+    results = evaluator.evaluate()
+    assert evaluator.precision_at_k() == results["Precision@k"]
+    assert evaluator.recall_at_k() == results["Recall@k"]
+    assert evaluator.f1_score_at_k() == results["F1-Score@k"]
+    assert evaluator.ndcg_at_k() == results["NDCG@k"]
+    assert evaluator.map_at_k() == results["MAP@k"]
+    assert evaluator.mrr_at_k() == results["MRR@k"]
+    assert evaluator.hit_rate_at_k() == results["Hit Rate@k"]
+    assert evaluator.coverage() == results["Coverage"]
+    assert len(passes) == 1
+
+    # Cambiar k, volver a entrenar o volver a dividir descarta las métricas guardadas
+    evaluator.k = 5
+    evaluator.precision_at_k()
+    evaluator.fit()
+    evaluator.precision_at_k()
+    evaluator.train_test_split()
+    evaluator.precision_at_k()
+    assert len(passes) == 4
@@ -0,0 +1,85 @@
+# test_hybrid.py
+
+import numpy as np
+import pandas as pd
+from recommenders.content_based_recommender import ContentBasedRecommender
+from recommenders.collaborative_filtering import CollaborativeFilteringRecommender
+from recommenders.sequential_recommender import SequentialRecommender
+from recommenders.hybrid_recommender import HybridRecommender
+
+BASES = [
+    ContentBasedRecommender,
+    CollaborativeFilteringRecommender,
+    SequentialRecommender,
+]
+
+
+def with_unsupported_movie(movies):
+    """
+    Añade una película sin calificaciones cuyos metadatos no comparten ningún término con los
+    de las demás, de modo que ningún recomendador base puede puntuarla.
+    """
+    movie = pd.DataFrame(
+        {
+            "movieId": [999],
+            "title": ["Unsupported"],
+            "genres": ["Documentary"],
+            "tag": ["quokka"],
+            "metadata": ["Documentary quokka"],
+        }
+    )
+    return pd.concat([movies, movie], ignore_index=True)
+
+
+def test_movie_without_support_stays_nan_after_fusion(movies, ratings):
+    movies = with_unsupported_movie(movies)
+    hybrid = HybridRecommender(BASES, movies, ratings)
+    user_ids = ratings["userId"].unique()
+    position = hybrid.catalog_index.get_loc(999)
+
+    # Ningún recomendador base la puntúa: no puede entrar en la fusión como un 0
+    for recommender in hybrid.recommenders:
+        assert np.isnan(recommender.score_many(user_ids)[:, position]).all()
+    combined = hybrid._combine_scores(user_ids, 256)
+    assert np.isnan(combined[:, position]).all()
+    assert 999 not in hybrid.recommend_many(user_ids, top_n=20)
+
+
+def test_fusion_is_weighted_sum_of_normalized_scores(movies, ratings):
+    hybrid = HybridRecommender(BASES, movies, ratings, weights=[0.5, 0.3, 0.2])
+    user_ids = ratings["userId"].unique()[:10]
+    expected = np.zeros((len(user_ids), len(hybrid.catalog_index)))
+    scored = np.zeros(expected.shape, dtype=bool)
+    for weight, recommender in zip(hybrid.weights, hybrid.recommenders):
+        scores = recommender.score_many(user_ids)
+        for i, row in enumerate(scores):
+            valid = ~np.isnan(row)
+            if valid.any():
+                low, high = row[valid].min(), row[valid].max()
+                span = high - low if high > low else 1
+                expected[i, valid] += weight * (row[valid] - low) / span
+            scored[i] |= valid
+    expected[~scored] = np.nan
+    rated = hybrid._rated_mask(user_ids)
+    expected[rated] = np.nan
+    np.testing.assert_allclose(hybrid.score_many(user_ids), expected, atol=1e-12)
+
+
+def test_short_recommendations_are_filled_with_popular_movies(movies, ratings):
+    hybrid = HybridRecommender([CollaborativeFilteringRecommender], movies, ratings)
+    user_ids = ratings["userId"].unique()
+    recommendations = hybrid.recommend_many(user_ids, top_n=30)
+    scores = hybrid.score_many(user_ids)
+    for user_id, row, user_scores in zip(user_ids, recommendations, scores):
+        rated = set(ratings.loc[ratings["userId"] == user_id, "movieId"])
+        row = row[row >= 0]
+        assert len(set(row)) == len(row) and not rated & set(row)
+
+        # Primero las puntuadas, después las más populares que faltan
+        n_scored = min((~np.isnan(user_scores)).sum(), 30)
+        popular = [
+            movie_id
+            for movie_id in hybrid.recommend_popular(len(hybrid.catalog_index))
+            if movie_id not in rated and movie_id not in set(row[:n_scored])
+        ]
+        np.testing.assert_array_equal(row[n_scored:], popular[: len(row) - n_scored])
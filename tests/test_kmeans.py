@@ -0,0 +1,116 @@
+# test_kmeans.py
+
+import copy
+import numpy as np
+import pandas as pd
+from recommenders.k_mean_collaborative_filtering import (
+    KMeansCollaborativeFilteringRecommender,
+)
+
+
+def build(movies, ratings, **options):
+    return KMeansCollaborativeFilteringRecommender(
+        movies, ratings, num_clusters=3, n_components=5, **options
+    )
+
+
+def loop_similarities(ratings):
+    """
+    Similitud de Pearson de la implementación original: correlación entre las filas de la
+    matriz usuario-item rellenadas con la media de cada usuario, 0 si no está definida.
+    """
+    user_item = ratings.pivot_table(index="userId", columns="movieId", values="rating")
+    filled = user_item.apply(lambda row: row.fillna(row.mean()), axis=1)
+    return filled.T.corr(method="pearson").fillna(0), user_item
+
+
+def test_neighbours_are_most_similar_cluster_members(movies, ratings):
+    recommender = build(movies, ratings)
+    similarity, _ = loop_similarities(ratings)
+    labels = recommender.cluster_labels
+    for user_id in recommender.user_index:
+        # Los vecinos se eligen en el cluster del usuario, o entre todos si está solo
+        members = labels.index[labels == labels[user_id]]
+        if len(members) < 2:
+            members = labels.index
+        sims = similarity.loc[members.drop(user_id), user_id]
+        expected = np.sort(sims.to_numpy())[::-1][: recommender.num_clusters]
+
+        row = recommender.user_index.get_loc(user_id)
+        found = recommender.neighbors[row] >= 0
+        np.testing.assert_allclose(
+            recommender.neighbor_sims[row][found], expected, atol=1e-12
+        )
+        neighbor_ids = recommender.user_index[recommender.neighbors[row][found]]
+        np.testing.assert_allclose(
+            similarity.loc[neighbor_ids, user_id], expected, atol=1e-12
+        )
+
+
+def test_scores_are_mean_neighbour_ratings(movies, ratings):
+    recommender = build(movies, ratings)
+    _, user_item = loop_similarities(ratings)
+    user_ids = np.append(ratings["userId"].unique(), -1)
+    scores = recommender.score_many(user_ids)
+    for user_id, user_scores in zip(user_ids, scores):
+        if user_id not in user_item.index:
+            # Los usuarios desconocidos reciben puntuaciones neutras
+            expected = np.where(
+                recommender.catalog_index.isin(user_item.columns), 0, np.nan
+            )
+            np.testing.assert_array_equal(user_scores, expected)
+            continue
+        row = recommender.user_index.get_loc(user_id)
+        neighbors = recommender.neighbors[row]
+        neighbor_ids = recommender.user_index[neighbors[neighbors >= 0]]
+        mean_ratings = user_item.loc[neighbor_ids].mean(axis=0)
+        mean_ratings[user_item.loc[user_id].notna()] = np.nan
+        np.testing.assert_allclose(
+            user_scores, mean_ratings.reindex(recommender.catalog_index), rtol=1e-12
+        )
+
+
+def test_recommend_many_matches_recommend(movies, ratings):
+    recommender = build(movies, ratings)
+    user_ids = np.append(ratings["userId"].unique(), -1)
+    batch = recommender.recommend_many(user_ids, top_n=10, batch_size=7)
+    for user_id, row in zip(user_ids, batch):
+        np.testing.assert_array_equal(row[row >= 0], recommender.recommend(user_id))
+
+
+def test_incremental_update_matches_recomputing_every_cluster(movies, ratings):
+    # Calificaciones nuevas de usuarios existentes, una modificada y un usuario nuevo
+    last = ratings.groupby("userId").cumcount(ascending=False) == 0
+    updated = ratings.copy()
+    updated.loc[updated.index[0], "rating"] = 0.5
+    new_user = ratings[ratings["userId"] == 2].assign(userId=999)
+    updated = pd.concat([updated, new_user], ignore_index=True)
+
+    incremental = build(movies, ratings[~last], drift_threshold=1.0)
+    incremental.update_data(updated)
+    assert incremental._drift > 0
+
+    # Con los mismos clusters, recalcular todas las listas de vecinos da el mismo resultado
+    rebuilt = copy.deepcopy(incremental)
+    del rebuilt.neighbors, rebuilt.neighbor_sims
+    rebuilt._build_cluster_index(np.arange(rebuilt.num_clusters))
+    np.testing.assert_array_equal(incremental.neighbor_sims, rebuilt.neighbor_sims)
+    np.testing.assert_array_equal(incremental.neighbors, rebuilt.neighbors)
+
+    user_ids = updated["userId"].unique()
+    np.testing.assert_array_equal(
+        incremental.score_many(user_ids), rebuilt.score_many(user_ids)
+    )
+
+
+def test_drift_threshold_triggers_full_fit(movies, ratings):
+    last = ratings.groupby("userId").cumcount(ascending=False) == 0
+    incremental = build(movies, ratings[~last], drift_threshold=0.01)
+    incremental.update_data(ratings)
+    assert incremental._drift == 0
+
+    fitted = build(movies, ratings)
+    user_ids = ratings["userId"].unique()
+    np.testing.assert_array_equal(
+        incremental.score_many(user_ids), fitted.score_many(user_ids)
+    )
@@ -0,0 +1,95 @@
+# test_matrix_factorization.py
+
+import numpy as np
+import pandas as pd
+from recommenders.matrix_factorization import MatrixFactorizationRecommender
+
+
+def ridge_rows(matrix, fixed, regularization):
+    """
+    Regresión ridge de cada fila por separado, como un bucle de np.linalg.solve por usuario.
+    """
+    factors = np.zeros((matrix.shape[0], fixed.shape[1]))
+    for row in range(matrix.shape[0]):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        if start == end:
+            continue
+        columns = fixed[matrix.indices[start:end]]
+        gram = columns.T @ columns + regularization * (end - start) * np.eye(
+            fixed.shape[1]
+        )
+        factors[row] = np.linalg.solve(gram, columns.T @ matrix.data[start:end])
+    return factors
+
+
+def test_batched_solve_matches_per_row_ridge(movies, ratings):
+    recommender = MatrixFactorizationRecommender(
+        movies, ratings, n_factors=4, iterations=2, block_nnz=16
+    )
+    matrix = recommender.user_item_matrix.copy()
+    matrix.data -= recommender.global_mean
+    np.testing.assert_allclose(
+        recommender._solve(matrix, recommender.item_factors),
+        ridge_rows(matrix, recommender.item_factors, recommender.regularization),
+        atol=1e-10,
+    )
+
+
+def test_factors_load_without_training(movies, ratings, tmp_path, monkeypatch):
+    path = str(tmp_path / "factors.npz")
+    trained = MatrixFactorizationRecommender(movies, ratings, n_factors=4)
+    trained.save_factors(path)
+
+    solves = []
+    solve = MatrixFactorizationRecommender._solve
+    monkeypatch.setattr(
+        MatrixFactorizationRecommender,
+        "_solve",
+        lambda self, *args: solves.append(1) or solve(self, *args),
+    )
+    loaded = MatrixFactorizationRecommender(movies, ratings, n_factors=4, fit=False)
+    assert not solves
+    loaded.load_factors(path)
+    assert not solves
+
+    user_ids = ratings["userId"].unique()
+    np.testing.assert_array_equal(
+        loaded.score_many(user_ids), trained.score_many(user_ids)
+    )
+
+
+def test_loaded_factors_keep_their_mean_and_fold_in_new_users(
+    movies, ratings, tmp_path
+):
+    path = str(tmp_path / "factors.npz")
+    trained = MatrixFactorizationRecommender(movies, ratings, n_factors=4)
+    trained.save_factors(path)
+
+    newcomer = pd.DataFrame(
+        {
+            "userId": [999, 999, 999],
+            "movieId": movies["movieId"].iloc[:3],
+            "rating": [5.0, 5.0, 5.0],
+            "timestamp": [2_000_000, 2_000_001, 2_000_002],
+        }
+    )
+    loaded = MatrixFactorizationRecommender(
+        movies,
+        pd.concat([ratings, newcomer], ignore_index=True),
+        n_factors=4,
+        fit=False,
+    )
+    loaded.load_factors(path)
+    assert loaded.global_mean == trained.global_mean
+
+    # Los usuarios conocidos conservan sus factores y el nuevo se resuelve frente a ellos
+    known = loaded.user_index.get_indexer(trained.user_index)
+    np.testing.assert_array_equal(loaded.user_factors[known], trained.user_factors)
+    row = loaded.user_index.get_loc(999)
+    matrix = loaded.user_item_matrix[[row]].copy()
+    matrix.data -= trained.global_mean
+    np.testing.assert_allclose(
+        loaded.user_factors[row],
+        ridge_rows(matrix, loaded.item_factors, loaded.regularization)[0],
+        atol=1e-10,
+    )
@@ -0,0 +1,127 @@
+# test_persistence.py
+
+import os
+import numpy as np
+import pytest
+from data_loader import StreamedRatings
+from recommenders import recommender_base
+from recommenders.recommender_base import Recommender, load_or_build
+from recommenders.content_based_recommender import ContentBasedRecommender
+from recommenders.collaborative_filtering import CollaborativeFilteringRecommender
+from recommenders.sequential_recommender import SequentialRecommender
+from recommenders.k_mean_collaborative_filtering import (
+    KMeansCollaborativeFilteringRecommender,
+)
+from recommenders.matrix_factorization import MatrixFactorizationRecommender
+from recommenders.hybrid_recommender import HybridRecommender
+
+BUILDERS = {
+    "content": lambda movies, ratings: ContentBasedRecommender(movies, ratings),
+    "content_ivf": lambda movies, ratings: ContentBasedRecommender(
+        movies, ratings, n_lists=4, n_probe=2
+    ),
+    "collaborative": lambda movies, ratings: CollaborativeFilteringRecommender(
+        movies, ratings
+    ),
+    "sequential": lambda movies, ratings: SequentialRecommender(
+        movies, ratings, order=2, window=2, decay=0.5
+    ),
+    "kmeans": lambda movies, ratings: KMeansCollaborativeFilteringRecommender(
+        movies, ratings, num_clusters=3, n_components=5
+    ),
+    "matrix_factorization": lambda movies, ratings: MatrixFactorizationRecommender(
+        movies, ratings, n_factors=4, iterations=3
+    ),
+    "matrix_factorization_ivf": lambda movies, ratings: MatrixFactorizationRecommender(
+        movies, ratings, n_factors=4, iterations=3, n_lists=4, n_probe=2
+    ),
+    "hybrid": lambda movies, ratings: HybridRecommender(
+        [
+            ContentBasedRecommender,
+            CollaborativeFilteringRecommender,
+            SequentialRecommender,
+        ],
+        movies,
+        ratings,
+    ),
+}
+
+
+@pytest.mark.parametrize("streamed", [False, True], ids=["dataframe", "streamed"])
+@pytest.mark.parametrize("name", list(BUILDERS))
+def test_saved_recommender_scores_like_the_original(
+    movies, ratings, tmp_path, name, streamed
+):
+    user_ids = np.append(ratings["userId"].unique(), -1)
+    if streamed:
+        ratings = StreamedRatings.from_chunks([ratings])
+    recommender = BUILDERS[name](movies, ratings)
+    recommender.save(str(tmp_path))
+    loaded = Recommender.load(str(tmp_path))
+
+    assert type(loaded) is type(recommender)
+    np.testing.assert_array_equal(
+        loaded.score_many(user_ids), recommender.score_many(user_ids)
+    )
+    np.testing.assert_array_equal(
+        loaded.recommend_many(user_ids), recommender.recommend_many(user_ids)
+    )
+
+
+def versions(path):
+    return sorted(entry for entry in os.listdir(path) if entry.startswith("v"))
+
+
+def test_load_or_build_rebuilds_when_the_key_changes(
+    movies, ratings, csv_files, tmp_path, monkeypatch
+):
+    path = str(tmp_path / "model")
+    build = lambda **kwargs: load_or_build(
+        path,
+        HybridRecommender,
+        [CollaborativeFilteringRecommender, SequentialRecommender],
+        movies,
+        ratings,
+        sources=csv_files,
+        **kwargs,
+    )
+
+    built = build()
+    loaded = build()
+    assert versions(path) == ["v1"]
+    user_ids = ratings["userId"].unique()
+    np.testing.assert_array_equal(
+        loaded.score_many(user_ids), built.score_many(user_ids)
+    )
+
+    # Otros argumentos del constructor
+    assert build(weights=[0.7, 0.3]).weights == [0.7, 0.3]
+    assert versions(path) == ["v1", "v2"]
+    build(weights=[0.7, 0.3])
+    assert versions(path) == ["v1", "v2"]
+
+    # Otros recomendadores base
+    hybrid = load_or_build(
+        path,
+        HybridRecommender,
+        [ContentBasedRecommender, SequentialRecommender],
+        movies,
+        ratings,
+        sources=csv_files,
+        weights=[0.7, 0.3],
+    )
+    assert isinstance(hybrid.recommenders[0], ContentBasedRecommender)
+    assert versions(path) == ["v2", "v3"]
+
+    # Otro formato de los archivos guardados
+    monkeypatch.setattr(recommender_base, "_FORMAT_VERSION", 0)
+    build()
+    assert versions(path) == ["v3", "v4"]
+    build()
+    assert versions(path) == ["v3", "v4"]
+
+    # Un archivo de datos más reciente que el modelo guardado
+    state_time = os.path.getmtime(os.path.join(path, "v4", "state.pkl"))
+    os.utime(csv_files[0], (state_time + 10, state_time + 10))
+    build()
+    assert versions(path) == ["v4", "v5"]
@@ -0,0 +1,123 @@
+# test_sequential.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from recommenders.sequential_recommender import SequentialRecommender
+
+
+def loop_counts(ratings, user_id):
+    """
+    Recuento de la implementación original: para cada secuencia que contiene la última película
+    del usuario, la película vista justo después de su primera aparición.
+    """
+    sequences = (
+        ratings.sort_values(by=["userId", "timestamp"])
+        .groupby("userId")["movieId"]
+        .apply(list)
+    )
+    last_movie = sequences[user_id][-1]
+    next_movies = []
+    for seq in sequences:
+        if last_movie in seq:
+            idx = seq.index(last_movie)
+            if idx + 1 < len(seq):
+                next_movies.append(seq[idx + 1])
+    return pd.Series(next_movies, dtype=float).value_counts()
+
+
+def test_scores_match_original_next_movie_counts(movies, ratings):
+    recommender = SequentialRecommender(movies, ratings)
+    user_ids = ratings["userId"].unique()
+    scores = recommender.score_many(user_ids)
+    for user_id, user_scores in zip(user_ids, scores):
+        counts = loop_counts(ratings, user_id)
+        expected = counts.reindex(recommender.catalog_index).to_numpy()
+        np.testing.assert_array_equal(user_scores, expected)
+
+        # Las películas con más apariciones, con los empates resueltos por ID
+        expected_top = counts.sort_index(kind="stable").sort_values(
+            ascending=False, kind="stable"
+        )
+        np.testing.assert_array_equal(
+            recommender.recommend(user_id), expected_top.index[:10]
+        )
+
+
+def loop_window_scores(ratings, user_id, order, window, decay):
+    """
+    Generalización del recuento original: cada una de las últimas order películas del usuario
+    pesa decay elevado a su antigüedad, y desde su primera aparición en cada secuencia cuentan
+    las window películas siguientes, cada una con peso decay elevado a su distancia menos 1.
+    """
+    sequences = (
+        ratings.sort_values(by=["userId", "timestamp"])
+        .groupby("userId")["movieId"]
+        .apply(list)
+    )
+    scores = {}
+    for age, recent_movie in enumerate(sequences[user_id][::-1][:order]):
+        for seq in sequences:
+            if recent_movie not in seq:
+                continue
+            idx = seq.index(recent_movie)
+            for distance in range(1, window + 1):
+                if idx + distance < len(seq):
+                    next_movie = seq[idx + distance]
+                    scores[next_movie] = scores.get(
+                        next_movie, 0
+                    ) + decay**age * decay ** (distance - 1)
+    return pd.Series(scores, dtype=float)
+
+
+@pytest.mark.parametrize(
+    "order, window, decay", [(1, 1, 1.0), (2, 1, 0.5), (1, 3, 0.5), (3, 2, 0.8)]
+)
+def test_scores_match_windowed_loop(movies, ratings, order, window, decay):
+    recommender = SequentialRecommender(
+        movies, ratings, order=order, window=window, decay=decay
+    )
+    user_ids = ratings["userId"].unique()
+    scores = recommender.score_many(user_ids)
+    for user_id, user_scores in zip(user_ids, scores):
+        expected = loop_window_scores(ratings, user_id, order, window, decay)
+        np.testing.assert_allclose(
+            user_scores, expected.reindex(recommender.catalog_index), rtol=1e-12
+        )
+
+
+def test_recommend_many_matches_recommend(movies, ratings):
+    recommender = SequentialRecommender(movies, ratings, order=2, window=2)
+    user_ids = np.append(ratings["userId"].unique(), -1)
+    batch = recommender.recommend_many(user_ids, top_n=10, batch_size=7)
+    for user_id, row in zip(user_ids, batch):
+        np.testing.assert_array_equal(row[row >= 0], recommender.recommend(user_id))
+
+
+@pytest.mark.parametrize("options", [{}, {"order": 2, "window": 3, "decay": 0.5}])
+def test_appended_ratings_match_full_rebuild(movies, ratings, options, monkeypatch):
+    # Las últimas calificaciones de cada usuario y las de un usuario nuevo se añaden después
+    last = ratings.groupby("userId").cumcount(ascending=False) < 2
+    new_user = ratings[ratings["userId"] == 1].assign(userId=999)
+    updated = pd.concat([ratings, new_user], ignore_index=True)
+
+    incremental = SequentialRecommender(movies, ratings[~last], **options)
+    refits = []
+    fit = SequentialRecommender._fit
+    monkeypatch.setattr(
+        SequentialRecommender,
+        "_fit",
+        lambda self, *args: refits.append(1) or fit(self, *args),
+    )
+    incremental.update_data(updated)
+    assert not refits
+    monkeypatch.undo()
+    rebuilt = SequentialRecommender(movies, updated, **options)
+
+    user_ids = updated["userId"].unique()
+    np.testing.assert_allclose(
+        incremental.score_many(user_ids), rebuilt.score_many(user_ids), atol=1e-12
+    )
+    np.testing.assert_array_equal(
+        incremental.recommend_many(user_ids), rebuilt.recommend_many(user_ids)
+    )
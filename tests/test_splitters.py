@@ -0,0 +1,98 @@
+# test_splitters.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from data_loader import StreamedRatings
+from evaluation.evaluation import Evaluator
+from evaluation.splitters import k_fold, leave_last_n, random_holdout, temporal_cutoff
+from recommenders.sequential_recommender import SequentialRecommender
+
+
+def test_random_holdout_is_reproducible(ratings):
+    first = random_holdout(ratings, seed=7)
+    second = random_holdout(ratings, seed=7)
+    other = random_holdout(ratings, seed=8)
+    for expected, actual in zip(first, second):
+        np.testing.assert_array_equal(actual, expected)
+    assert not np.array_equal(first[1], other[1])
+
+
+def test_random_holdout_takes_a_fraction_of_each_user(ratings):
+    train_index, test_index = random_holdout(ratings, test_size=0.3, seed=0)
+    np.testing.assert_array_equal(
+        np.sort(np.concatenate([train_index, test_index])), np.arange(len(ratings))
+    )
+
+    # Como groupby("userId").sample(frac=0.3): round(0.3 * n) calificaciones por usuario
+    counts = ratings.groupby("userId").size()
+    test_counts = ratings.iloc[test_index].groupby("userId").size()
+    np.testing.assert_array_equal(
+        test_counts.reindex(counts.index, fill_value=0), np.round(0.3 * counts)
+    )
+
+
+def test_leave_last_n_takes_most_recent_ratings(ratings):
+    # Las calificaciones se desordenan para que la posición no coincida con el timestamp
+    ratings = ratings.sample(frac=1, random_state=0)
+    _, test_index = leave_last_n(ratings, n=2)
+    expected = (
+        ratings.reset_index(drop=True)
+        .sort_values(by="timestamp", kind="stable")
+        .groupby("userId")
+        .tail(2)
+        .index
+    )
+    np.testing.assert_array_equal(test_index, np.sort(expected))
+
+
+def test_temporal_cutoff_splits_at_a_common_instant(ratings):
+    train_index, test_index = temporal_cutoff(ratings, test_size=0.25)
+    timestamps = ratings["timestamp"].to_numpy()
+    assert timestamps[train_index].max() < timestamps[test_index].min()
+    assert len(test_index) == pytest.approx(0.25 * len(ratings), abs=1)
+
+
+def test_k_fold_partitions_every_rating_once(ratings):
+    folds = k_fold(ratings, n_folds=4, seed=3)
+    test_indices = np.concatenate([test_index for _, test_index in folds])
+    np.testing.assert_array_equal(np.sort(test_indices), np.arange(len(ratings)))
+    for train_index, test_index in folds:
+        np.testing.assert_array_equal(
+            np.sort(np.concatenate([train_index, test_index])), np.arange(len(ratings))
+        )
+
+    # Cada usuario reparte sus calificaciones por igual entre las particiones
+    user_ids = ratings["userId"].to_numpy()
+    sizes = np.array(
+        [
+            pd.Series(user_ids[test_index])
+            .value_counts()
+            .reindex(np.unique(user_ids), fill_value=0)
+            for _, test_index in folds
+        ]
+    )
+    assert (sizes.max(axis=0) - sizes.min(axis=0) <= 1).all()
+
+    again = k_fold(ratings, n_folds=4, seed=3)
+    for (_, expected), (_, actual) in zip(folds, again):
+        np.testing.assert_array_equal(actual, expected)
+
+
+@pytest.mark.parametrize("split", [random_holdout, leave_last_n, k_fold])
+def test_streamed_ratings_split_like_dataframe(ratings, split):
+    streamed = StreamedRatings.from_chunks([ratings])
+    kwargs = {} if split is leave_last_n else {"seed": 5}
+    expected, actual = split(ratings, **kwargs), split(streamed, **kwargs)
+    if not isinstance(expected, list):
+        expected, actual = [expected], [actual]
+    for expected_fold, actual_fold in zip(expected, actual):
+        for expected_index, actual_index in zip(expected_fold, actual_fold):
+            np.testing.assert_array_equal(actual_index, expected_index)
+
+
+def test_evaluator_with_seed_repeats_the_split(movies, ratings):
+    first = Evaluator(SequentialRecommender(movies, ratings), ratings, seed=11)
+    second = Evaluator(SequentialRecommender(movies, ratings), ratings, seed=11)
+    np.testing.assert_array_equal(first.test_index, second.test_index)
+    assert first.evaluate() == second.evaluate()